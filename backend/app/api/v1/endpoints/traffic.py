@@ -6,6 +6,8 @@
 from typing import Optional, Literal
 from datetime import date
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 import time
 
@@ -20,6 +22,9 @@ from app.utils.response import (
 
 router = APIRouter()
 
+# 응답 직렬화기 (모듈 로드 시 1회 생성, FastAPI jsonable_encoder 우회)
+_hourly_traffic_adapter = TypeAdapter(HourlyTrafficSchema)
+
 
 @router.get("/hourly", response_model=HourlyTrafficSchema)
 async def get_hourly_traffic(
@@ -72,8 +77,12 @@ async def get_hourly_traffic(
         processing_time = round((time.time() - start_time) * 1000, 2)
         print(f"[API DEBUG] Processing time: {processing_time}ms")
         
-        # Pydantic 모델을 직접 반환
-        return result
+        # 캐시 역직렬화 실패 시 dict가 반환될 수 있으므로 모델로 변환
+        if not isinstance(result, HourlyTrafficSchema):
+            result = _hourly_traffic_adapter.validate_python(result)
+        
+        # 미리 생성한 직렬화기로 직접 JSON 응답 생성
+        return ORJSONResponse(content=_hourly_traffic_adapter.dump_python(result, mode="json"))
         
     except Exception as e:
         print(f"[API DEBUG] Error: {e}")
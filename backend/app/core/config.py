@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 class DRTDashboardSettings(BaseSettings):
@@ -16,8 +16,12 @@ class DRTDashboardSettings(BaseSettings):
     
     # Cache Settings
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379")  # Redis cache for dashboard
+    REDIS_MAX_CONNECTIONS: int = 50  # 워커당 Redis 커넥션 풀 크기
     
     # Cache TTL Settings (seconds)
+    CACHE_TTL_CURRENT_MONTH: int = 1800   # 30 minutes - 진행 중인 월
+    CACHE_TTL_CLOSED_MONTH: int = 86400   # 24 hours - 마감된 과거 월
+    CACHE_WARM_INTERVAL: int = 600        # 10 minutes - 인기 조회 캐시 워밍 주기
     #CACHE_TTL_KPI: int = 300        # 5 minutes - real-time metrics
     #CACHE_TTL_MAP: int = 600        # 10 minutes - map data  
     #CACHE_TTL_ANALYSIS: int = 1800  # 30 minutes - analysis results
@@ -36,10 +40,12 @@ class DRTDashboardSettings(BaseSettings):
         "http://localhost:8000", 
         "http://frontend:3000",
     ]
+    ALLOWED_HOSTS_REGEX: Optional[str] = None  # 예: r"https://.*\.example\.com" (Starlette가 시작 시 1회 컴파일)
     
     # Database Performance
     DB_POOL_SIZE: int = 20
-    DB_MAX_OVERFLOW: int = 10
+    DB_MAX_OVERFLOW: int = 30
+    DB_STATEMENT_CACHE_SIZE: int = 500  # 커넥션당 prepared statement 캐시 크기
     
     # DRT Analysis Parameters
     DRT_SCORE_WEIGHTS: dict = {
@@ -4,7 +4,9 @@ Redis 클라이언트 및 캐싱 유틸리티
 """
 
 import redis.asyncio as redis
-from typing import Optional, Any, Dict, Union
+from redis.exceptions import LockError
+import asyncio
+from typing import Optional, Any, Dict, List, Union
 import json
 import logging
 import hashlib
@@ -33,7 +35,8 @@ class RedisClient:
                     encoding="utf-8",
                     decode_responses=True,
                     socket_connect_timeout=1,
-                    socket_timeout=1
+                    socket_timeout=1,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS
                 )
                 # 연결 테스트
                 await self._redis.ping()
@@ -87,15 +90,7 @@ class RedisClient:
             redis_client = await self.get_redis()
             
             # 데이터 직렬화
-            if serialize:
-                if hasattr(data, 'dict'):  # Pydantic model
-                    serialized_data = json.dumps(data.dict())
-                elif isinstance(data, dict):
-                    serialized_data = json.dumps(data)
-                else:
-                    serialized_data = json.dumps(data, default=str)
-            else:
-                serialized_data = data
+            serialized_data = self._serialize(data) if serialize else data
             
             # TTL과 함께 저장
             success = await redis_client.setex(key, ttl, serialized_data)
@@ -111,6 +106,51 @@ class RedisClient:
             logger.warning(f"Cache set error for key {key}: {e}")
             return False
     
+    @staticmethod
+    def _serialize(data: Any) -> str:
+        """캐시 저장용 JSON 직렬화"""
+        if hasattr(data, 'dict'):  # Pydantic model
+            return json.dumps(data.dict())
+        elif isinstance(data, dict):
+            return json.dumps(data)
+        else:
+            return json.dumps(data, default=str)
+    
+    async def get_cached_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """여러 키를 pipeline으로 한 번에 조회 (네트워크 왕복 1회)"""
+        if not keys:
+            return []
+        try:
+            redis_client = await self.get_redis()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.get(key)
+                values = await pipe.execute()
+            
+            hits = sum(1 for v in values if v)
+            logger.info(f"Cache MGET: {hits}/{len(keys)} hits")
+            return [json.loads(v) if v else None for v in values]
+        except Exception as e:
+            logger.warning(f"Cache get_many error: {e}")
+            return [None] * len(keys)
+    
+    async def set_cache_many(self, items: Dict[str, Any], ttl: int = 3600) -> bool:
+        """여러 키를 pipeline으로 한 번에 저장 (네트워크 왕복 1회)"""
+        if not items:
+            return True
+        try:
+            redis_client = await self.get_redis()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key, data in items.items():
+                    pipe.set(key, self._serialize(data), ex=ttl)
+                results = await pipe.execute()
+            
+            logger.info(f"Cache MSET: {len(items)} keys (TTL: {ttl}s)")
+            return all(results)
+        except Exception as e:
+            logger.warning(f"Cache set_many error: {e}")
+            return False
+    
     async def delete_cache(self, key: str) -> bool:
         """캐시에서 키 삭제"""
         try:
@@ -147,13 +187,14 @@ class RedisClient:
                 analysis_date = datetime(year, month, 1)
             current_date = datetime.now()
             
-            # 현재 월이면 24시간, 과거 월이면 30일
+            # 현재 월은 데이터가 계속 갱신되므로 짧게, 마감된 과거 월은 길게
+            # (현재 월 인기 조회는 백그라운드 워밍으로 항상 캐시 유지)
             if analysis_date.year == current_date.year and analysis_date.month == current_date.month:
-                ttl = 24 * 60 * 60  # 24시간 (현재 진행 중인 월)
-                logger.debug(f"Current month {analysis_month}: TTL = 24 hours")
+                ttl = settings.CACHE_TTL_CURRENT_MONTH  # 현재 진행 중인 월
+                logger.debug(f"Current month {analysis_month}: TTL = {ttl}s")
             else:
-                ttl = 30 * 24 * 60 * 60  # 30일 (완료된 과거 월)
-                logger.debug(f"Past month {analysis_month}: TTL = 30 days")
+                ttl = settings.CACHE_TTL_CLOSED_MONTH  # 완료된 과거 월
+                logger.debug(f"Past month {analysis_month}: TTL = {ttl}s")
                 
             return ttl
             
@@ -212,6 +253,13 @@ def generate_cache_key(
     return f"cache:{service_name}:{method_name}:{param_hash}"
 
 
+# 캐시 미스 시 singleflight 락 설정 (초)
+SINGLEFLIGHT_LOCK_TIMEOUT = 60      # 락 자동 만료 (DB command_timeout과 동일, 계산 요청이 죽어도 해제)
+SINGLEFLIGHT_POLL_INTERVAL = 0.1    # 대기 중 캐시 확인 주기
+# 대기 요청의 최대 대기 시간 (락 만료 시점까지 기다리면 락이 풀린 것을 보고 직접 계산하므로 락 만료보다 길게)
+SINGLEFLIGHT_WAIT_TIMEOUT = SINGLEFLIGHT_LOCK_TIMEOUT + 1
+
+
 def cache_result(
     ttl: Optional[int] = None,
     key_prefix: Optional[str] = None,
@@ -226,17 +274,57 @@ def cache_result(
         use_month_ttl: analysis_month 파라미터 기반 TTL 자동 계산 여부
     """
     def decorator(func):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
+        return_annotation = inspect.signature(func).return_annotation
+        
+        def _deserialize(cached_result: Any) -> Any:
+            # Pydantic 모델로 변환 (함수 return type annotation 확인)
+            if return_annotation != inspect.Signature.empty:
+                try:
+                    if hasattr(return_annotation, '__origin__'):  # Generic type인 경우 스킵
+                        return cached_result
+                    return return_annotation(**cached_result)
+                except Exception as e:
+                    logger.warning(f"Failed to deserialize cached data: {e}")
+                    return cached_result
+            
+            return cached_result
+        
+        def _build_cache_key(args: tuple, kwargs: dict) -> str:
             # 서비스명과 메서드명 추출
             service_name = args[0].__class__.__name__.lower().replace('service', '')
             method_name = func.__name__
             
             # 캐시 키 생성
             if key_prefix:
-                cache_key = f"{key_prefix}:{generate_cache_key(service_name, method_name, args, kwargs)}"
-            else:
-                cache_key = generate_cache_key(service_name, method_name, args, kwargs)
+                return f"{key_prefix}:{generate_cache_key(service_name, method_name, args, kwargs)}"
+            return generate_cache_key(service_name, method_name, args, kwargs)
+        
+        def _resolve_ttl(args: tuple, kwargs: dict) -> int:
+            # TTL 계산
+            calculated_ttl = ttl
+            if calculated_ttl is None and use_month_ttl:
+                # analysis_month 파라미터에서 TTL 계산
+                analysis_month = kwargs.get('analysis_month')
+                if not analysis_month and len(args) > 2:
+                    # 위치 인수에서 찾기 (보통 두 번째 파라미터)
+                    try:
+                        analysis_month = args[2]
+                    except IndexError:
+                        pass
+                
+                if analysis_month:
+                    calculated_ttl = redis_client.calculate_ttl(analysis_month)
+                else:
+                    calculated_ttl = 3600  # 기본값
+            
+            if calculated_ttl is None:
+                calculated_ttl = 3600  # 기본값
+            return calculated_ttl
+        
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            method_name = func.__name__
+            cache_key = _build_cache_key(args, kwargs)
             
             # Redis 연결 확인
             try:
@@ -252,50 +340,81 @@ def cache_result(
             cached_result = await redis_client.get_cached(cache_key)
             if cached_result is not None:
                 logger.info(f"Cache HIT for {method_name}: {cache_key}")
-                
-                # Pydantic 모델로 변환 (함수 return type annotation 확인)
-                return_annotation = inspect.signature(func).return_annotation
-                if return_annotation != inspect.Signature.empty:
-                    try:
-                        if hasattr(return_annotation, '__origin__'):  # Generic type인 경우 스킵
-                            return cached_result
-                        return return_annotation(**cached_result)
-                    except Exception as e:
-                        logger.warning(f"Failed to deserialize cached data: {e}")
-                        return cached_result
-                
-                return cached_result
+                return _deserialize(cached_result)
             
-            # 캐시 미스: 실제 함수 실행
+            # 캐시 미스: 분산 락을 획득한 요청 하나만 실제 함수 실행 (thundering herd 방지)
             logger.info(f"Cache MISS for {method_name}: {cache_key}")
-            result = await func(*args, **kwargs)
+            try:
+                redis_conn = await redis_client.get_redis()
+                lock = redis_conn.lock(f"lock:{cache_key}", timeout=SINGLEFLIGHT_LOCK_TIMEOUT)
+                acquired = await lock.acquire(blocking=False)
+            except Exception as e:
+                logger.warning(f"Cache lock error: {e}, executing without cache")
+                return await func(*args, **kwargs)
             
-            # TTL 계산
-            calculated_ttl = ttl
-            if calculated_ttl is None and use_month_ttl:
-                # analysis_month 파라미터에서 TTL 계산
-                analysis_month = kwargs.get('analysis_month')
-                if not analysis_month and len(args) > 2:
-                    # 위치 인수에서 찾기 (보통 두 번째 파라미터)
+            async def _compute_and_cache():
+                # 락을 가진 요청만 호출 (실패해도 락은 해제되어 대기 요청이 이어받음)
+                try:
+                    result = await func(*args, **kwargs)
+                    
+                    # 결과 캐싱
+                    calculated_ttl = _resolve_ttl(args, kwargs)
+                    await redis_client.set_cache(cache_key, result, ttl=calculated_ttl)
+                    logger.info(f"Cache SET for {method_name}: {cache_key} (TTL: {calculated_ttl}s)")
+                    return result
+                finally:
                     try:
-                        analysis_month = args[2]
-                    except IndexError:
+                        await lock.release()
+                    except LockError:
+                        # 락 만료 후 해제 시도 - 무시
                         pass
-                
-                if analysis_month:
-                    calculated_ttl = redis_client.calculate_ttl(analysis_month)
-                else:
-                    calculated_ttl = 3600  # 기본값
             
-            if calculated_ttl is None:
-                calculated_ttl = 3600  # 기본값
+            if acquired:
+                return await _compute_and_cache()
             
-            # 결과 캐싱
-            await redis_client.set_cache(cache_key, result, ttl=calculated_ttl)
-            logger.info(f"Cache SET for {method_name}: {cache_key} (TTL: {calculated_ttl}s)")
+            # 다른 요청이 계산 중: 캐시가 채워질 때까지 대기
+            polls = int(SINGLEFLIGHT_WAIT_TIMEOUT / SINGLEFLIGHT_POLL_INTERVAL)
+            took_over = False
+            try:
+                for _ in range(polls):
+                    await asyncio.sleep(SINGLEFLIGHT_POLL_INTERVAL)
+                    data = await redis_conn.get(cache_key)
+                    if data:
+                        logger.info(f"Cache HIT after wait for {method_name}: {cache_key}")
+                        return _deserialize(json.loads(data))
+                    
+                    # 캐시 없이 락이 풀림 (계산 요청 실패/락 만료): 대기를 멈추고 직접 락을 잡아 계산
+                    if not await lock.locked() and await lock.acquire(blocking=False):
+                        # 해제 직전에 캐시가 채워졌을 수 있으므로 한 번 더 확인
+                        data = await redis_conn.get(cache_key)
+                        if data:
+                            await lock.release()
+                            return _deserialize(json.loads(data))
+                        took_over = True
+                        break
+            except Exception as e:
+                logger.warning(f"Cache wait error: {e}, executing without cache")
+                return await func(*args, **kwargs)
             
+            # 함수 실행은 try 밖에서 (함수 자체의 예외는 그대로 전달)
+            if took_over:
+                logger.info(f"Cache lock released without result for {method_name}: {cache_key}, taking over")
+                return await _compute_and_cache()
+            
+            # 대기 시간 초과: 직접 실행
+            logger.warning(f"Cache wait timed out for {method_name}: {cache_key}, executing directly")
+            return await func(*args, **kwargs)
+        
+        async def refresh(*args, **kwargs):
+            """캐시 조회 없이 재계산 후 캐시 갱신 (백그라운드 워밍용)"""
+            cache_key = _build_cache_key(args, kwargs)
+            result = await func(*args, **kwargs)
+            calculated_ttl = _resolve_ttl(args, kwargs)
+            await redis_client.set_cache(cache_key, result, ttl=calculated_ttl)
+            logger.info(f"Cache REFRESH for {func.__name__}: {cache_key} (TTL: {calculated_ttl}s)")
             return result
         
+        wrapper.refresh = refresh
         return wrapper
     return decorator
 
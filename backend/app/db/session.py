@@ -8,14 +8,17 @@ from app.core.config import settings
 engine = create_async_engine(
     settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
     echo=False,
-    pool_size=20,
-    max_overflow=30,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
     pool_pre_ping=True,
-    pool_recycle=3600,
+    pool_recycle=3600,  # 재연결 시 prepared statement 캐시가 초기화되므로 길게 유지
     connect_args={
         "server_settings": {"jit": "off"},  # PostGIS 성능 개선
         "timeout": 60,  # 연결 타임아웃 60초로 증가
-        "command_timeout": 60  # 명령 타임아웃 60초로 증가
+        "command_timeout": 60,  # 명령 타임아웃 60초로 증가
+        # 반복 조회 쿼리의 재파싱/재계획 방지 (SQLAlchemy + asyncpg 양쪽 캐시)
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
     }
 )
 
@@ -40,6 +43,18 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+def get_pool_status() -> dict:
+    """커넥션 풀 상태 조회 (모니터링용)"""
+    pool = engine.pool
+    return {
+        "status": pool.status(),
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW
+    }
+
 async def close_db():
     """Close database engine"""
     await engine.dispose()
@@ -0,0 +1,59 @@
+"""
+캐시 워밍 서비스
+가장 많이 조회되는 "현재 월 / 서울시 전체" 시간대별 교통량을 주기적으로 재계산하여
+캐시를 항상 유지 (첫 요청도 캐시 HIT)
+"""
+
+import asyncio
+from datetime import date
+import logging
+import os
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.db.session import AsyncSessionLocal
+from app.services.trafficService import HourlyTrafficService
+
+logger = logging.getLogger(__name__)
+
+# 워밍 주기마다 한 프로세스만 워밍하도록 잡는 Redis 키 (워커/레플리카 공통)
+WARMER_LEADER_KEY = "lock:cache_warmer"
+
+
+async def warm_hourly_traffic_cache() -> None:
+    """현재 월 서울시 전체 시간대별 교통량 캐시 갱신"""
+    service = HourlyTrafficService()
+    analysis_month = date.today().replace(day=1)
+
+    async with AsyncSessionLocal() as db:
+        # 엔드포인트와 동일한 키워드 인자로 호출해야 같은 캐시 키가 생성됨
+        await HourlyTrafficService.get_hourly_traffic.refresh(
+            service,
+            db=db,
+            analysis_month=analysis_month,
+            region_type="seoul",
+            district_name=None
+        )
+    logger.info(f"Warmed hourly traffic cache for {analysis_month} (seoul)")
+
+
+async def _claim_warm_slot(interval_seconds: int) -> bool:
+    """이번 주기의 워밍 담당 여부 (SET NX EX: 주기당 한 프로세스만 성공)"""
+    redis = await redis_client.get_redis()
+    return bool(await redis.set(WARMER_LEADER_KEY, os.getpid(), nx=True, ex=interval_seconds))
+
+
+async def run_cache_warmer(interval_seconds: int = settings.CACHE_WARM_INTERVAL) -> None:
+    """
+    캐시 워밍 루프 (lifespan에서 백그라운드 태스크로 실행)
+    모든 워커에서 실행되지만 주기마다 Redis 키를 먼저 잡은 프로세스만 워밍
+    """
+    while True:
+        try:
+            if await _claim_warm_slot(interval_seconds):
+                await warm_hourly_traffic_cache()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cache warm-up failed: {e}")
+        await asyncio.sleep(interval_seconds)
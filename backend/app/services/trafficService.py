@@ -3,12 +3,13 @@
 월별 기준 서울시/구별 평일/주말 시간대별 승하차 패턴 분석
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, date
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 import logging
 
+import numpy as np
+
 from app.schemas.traffic import (
     HourlyTrafficSchema,
     HourlyPatternSchema,
@@ -27,6 +28,34 @@ logger = logging.getLogger(__name__)
 
 # 스키마는 schemas/traffic.py에서 import하여 사용
 
+# 피크 구간 분류 (평일 아침 6-10시 / 평일 저녁 17-20시 / 주말 전체)
+_PEAK_BUCKET_SQL = """
+    CASE
+        WHEN day_type = 'weekday' AND hour BETWEEN 6 AND 10 THEN 'weekday_morning'
+        WHEN day_type = 'weekday' AND hour BETWEEN 17 AND 20 THEN 'weekday_evening'
+        WHEN day_type = 'weekend' THEN 'weekend'
+    END
+"""
+
+# 구간별 1위 시간대만 peak_bucket 값을 가지도록 DB에서 미리 계산
+_PEAK_RANK_SQL = """
+    SELECT
+        hour,
+        avg_ride_passengers,
+        avg_alight_passengers,
+        avg_total_passengers,
+        CASE
+            WHEN peak_bucket IS NOT NULL
+                AND ROW_NUMBER() OVER (
+                    PARTITION BY peak_bucket
+                    ORDER BY avg_total_passengers DESC NULLS LAST, hour
+                ) = 1
+            THEN peak_bucket
+        END AS peak_bucket
+    FROM patterns
+    ORDER BY hour
+"""
+
 
 class HourlyTrafficService:
     """시간대별 교통량 서비스"""
@@ -51,24 +80,24 @@ class HourlyTrafficService:
             
             # 평일 패턴 조회
             print("[DEBUG] Fetching weekday patterns...")
-            weekday_patterns = await self._get_hourly_patterns(
+            weekday_patterns, weekday_peaks, weekday_totals = await self._get_hourly_patterns(
                 db, analysis_month, "weekday", district_name
             )
             print(f"[DEBUG] Got {len(weekday_patterns)} weekday patterns")
             
             # 주말 패턴 조회
             logger.info("Fetching weekend patterns...")
-            weekend_patterns = await self._get_hourly_patterns(
+            weekend_patterns, weekend_peaks, weekend_totals = await self._get_hourly_patterns(
                 db, analysis_month, "weekend", district_name
             )
             logger.info(f"Got {len(weekend_patterns)} weekend patterns")
             
             # 피크 시간 분석
-            peak_hours = self._analyze_peak_hours(weekday_patterns, weekend_patterns)
+            peak_hours = self._analyze_peak_hours(weekday_peaks, weekend_peaks)
             
             # 총 승객수 계산 (이미 시간대별 평균이므로 * 24 불필요)
-            total_weekday = sum(p.avg_total_passengers for p in weekday_patterns)
-            total_weekend = sum(p.avg_total_passengers for p in weekend_patterns)
+            total_weekday = float(weekday_totals.sum())
+            total_weekend = float(weekend_totals.sum())
             
             # 평일/주말 비율
             ratio = total_weekday / total_weekend if total_weekend > 0 else 0
@@ -112,59 +141,61 @@ class HourlyTrafficService:
     async def _get_hourly_patterns(
         self,
         db: AsyncSession,
-        analysis_month: str,
+        analysis_month: date,
         day_type: str,
         district_name: Optional[str] = None
-    ) -> List[HourlyPatternSchema]:
-        """시간대별 승하차 패턴 조회 (mv_hourly_traffic_patterns 기반)"""
+    ) -> Tuple[List[HourlyPatternSchema], Dict[str, Tuple[int, float]], np.ndarray]:
+        """시간대별 승하차 패턴, 피크 구간별 최대 시간대, 시간대별 총 승하차 배열 조회 (mv_hourly_traffic_patterns 기반)"""
         try:
             
             # 최적화된 Materialized View 쿼리
             if district_name:
                 # 구별 쿼리: mv_hourly_traffic_patterns 사용
-                query = text("""
-                    SELECT 
-                        hour,
-                        avg_ride_passengers,
-                        avg_alight_passengers,
-                        avg_total_passengers
-                    FROM mv_hourly_traffic_patterns
-                    WHERE month_date = :analysis_month
-                        AND day_type = :day_type
-                        AND sgg_name = :district_name
-                    ORDER BY hour
-                """)
-                params = {
-                    "analysis_month": analysis_month,
-                    "day_type": day_type,
-                    "district_name": district_name
-                }
+                query = f"""
+                    WITH patterns AS (
+                        SELECT 
+                            hour,
+                            avg_ride_passengers,
+                            avg_alight_passengers,
+                            avg_total_passengers,
+                            {_PEAK_BUCKET_SQL} AS peak_bucket
+                        FROM mv_hourly_traffic_patterns
+                        WHERE month_date = $1
+                            AND day_type = $2
+                            AND sgg_name = $3
+                    )
+                    {_PEAK_RANK_SQL}
+                """
+                params = (analysis_month, day_type, district_name)
             else:
                 # 서울시 전체 쿼리: mv_seoul_hourly_patterns 사용
-                query = text("""
-                    SELECT 
-                        hour,
-                        avg_ride_passengers,
-                        avg_alight_passengers,
-                        avg_total_passengers
-                    FROM mv_seoul_hourly_patterns
-                    WHERE month_date = :analysis_month
-                        AND day_type = :day_type
-                    ORDER BY hour
-                """)
-                params = {
-                    "analysis_month": analysis_month,
-                    "day_type": day_type
-                }
+                query = f"""
+                    WITH patterns AS (
+                        SELECT 
+                            hour,
+                            avg_ride_passengers,
+                            avg_alight_passengers,
+                            avg_total_passengers,
+                            {_PEAK_BUCKET_SQL} AS peak_bucket
+                        FROM mv_seoul_hourly_patterns
+                        WHERE month_date = $1
+                            AND day_type = $2
+                    )
+                    {_PEAK_RANK_SQL}
+                """
+                params = (analysis_month, day_type)
             
             # 쿼리 실행 (Materialized View에서 조회)
-            result = await db.execute(query, params)
-            rows = result.fetchall()
+            # 24행 고정 결과이므로 SQLAlchemy Row 래핑 없이 asyncpg로 직접 조회
+            # (asyncpg statement cache로 prepared statement 재사용)
+            connection = await db.connection()
+            raw_connection = await connection.get_raw_connection()
+            rows = await raw_connection.driver_connection.fetch(query, *params)
             
             # 디버깅: 쿼리 결과 로깅
             print(f"[DEBUG] Query returned {len(rows)} rows for {day_type}")
             if len(rows) > 0:
-                # SQLAlchemy Row 객체의 속성 확인
+                # asyncpg Record 객체의 속성 확인
                 first_row = rows[0]
                 print(f"[DEBUG] Row type: {type(first_row)}")
                 print(f"[DEBUG] Row keys: {first_row.keys() if hasattr(first_row, 'keys') else 'No keys method'}")
@@ -177,29 +208,37 @@ class HourlyTrafficService:
                 print(f"[DEBUG] Params: {params}")
             
             # 결과 처리 - 24시간 모든 시간대 보장
-            patterns = []
-            # SQLAlchemy Row 객체는 인덱스로 접근해야 함
-            row_dict = {row[0]: row for row in rows}
-            
-            for hour in range(24):
-                if hour in row_dict:
-                    row = row_dict[hour]
-                    patterns.append(HourlyPatternSchema(
-                        hour=hour,
-                        avg_ride_passengers=float(row[1] or 0),
-                        avg_alight_passengers=float(row[2] or 0),
-                        avg_total_passengers=float(row[3] or 0)
-                    ))
-                else:
-                    # 데이터가 없는 시간대는 0으로 채움
-                    patterns.append(HourlyPatternSchema(
-                        hour=hour,
-                        avg_ride_passengers=0.0,
-                        avg_alight_passengers=0.0,
-                        avg_total_passengers=0.0
-                    ))
-            
-            return patterns
+            # 값 범위가 보장된 내부 집계이므로 검증 없이 model_construct로 생성
+            # (24개 항목 여부 등 응답 구조 검증은 HourlyTrafficSchema에서 수행)
+            # 데이터가 없는 시간대는 0으로 채운 리스트를 미리 할당
+            patterns = [
+                HourlyPatternSchema.model_construct(
+                    hour=hour,
+                    avg_ride_passengers=0.0,
+                    avg_alight_passengers=0.0,
+                    avg_total_passengers=0.0
+                )
+                for hour in range(24)
+            ]
+
+            # asyncpg Record는 인덱스로 접근 (hour를 인덱스로 덮어쓰기)
+            peaks = {}
+            totals = np.zeros(24, dtype=np.float64)  # 시간대별 평균 총 승하차 (합계 계산용)
+            for row in rows:
+                hour = row[0]
+                total = float(row[3] or 0)
+                totals[hour] = total
+                patterns[hour] = HourlyPatternSchema.model_construct(
+                    hour=hour,
+                    avg_ride_passengers=float(row[1] or 0),
+                    avg_alight_passengers=float(row[2] or 0),
+                    avg_total_passengers=total
+                )
+                # 피크 구간 1위 시간대 (DB에서 ROW_NUMBER로 계산)
+                if row[4] is not None:
+                    peaks[row[4]] = (hour, total)
+
+            return patterns, peaks, totals
             
         except Exception as e:
             logger.error(f"Error in _get_hourly_patterns: {e}")
@@ -207,31 +246,19 @@ class HourlyTrafficService:
     
     def _analyze_peak_hours(
         self, 
-        weekday_patterns: List[HourlyPatternSchema],
-        weekend_patterns: List[HourlyPatternSchema]
+        weekday_peaks: Dict[str, Tuple[int, float]],
+        weekend_peaks: Dict[str, Tuple[int, float]]
     ) -> PeakHoursSchema:
-        """피크 시간 분석"""
+        """피크 시간 분석 (구간별 최대 시간대는 쿼리에서 계산됨)"""
         try:
             # 평일 아침 피크 (6-10시)
-            morning_peak = max(
-                [(p.hour, p.avg_total_passengers) for p in weekday_patterns if 6 <= p.hour <= 10],
-                key=lambda x: x[1],
-                default=(8, 0)
-            )
+            morning_peak = weekday_peaks.get("weekday_morning", (8, 0))
             
             # 평일 저녁 피크 (17-20시)
-            evening_peak = max(
-                [(p.hour, p.avg_total_passengers) for p in weekday_patterns if 17 <= p.hour <= 20],
-                key=lambda x: x[1],
-                default=(18, 0)
-            )
+            evening_peak = weekday_peaks.get("weekday_evening", (18, 0))
             
             # 주말 피크 (전체 시간)
-            weekend_peak = max(
-                [(p.hour, p.avg_total_passengers) for p in weekend_patterns],
-                key=lambda x: x[1],
-                default=(14, 0)
-            )
+            weekend_peak = weekend_peaks.get("weekend", (14, 0))
             
             return PeakHoursSchema(
                 weekday_morning_peak=PeakHourInfoSchema(
@@ -1,155 +1,228 @@
 """
-캐시 유틸리티 (현재는 메모리 캐시, 나중에 Redis로 확장 가능)
+캐시 유틸리티 (Redis 기반, Redis 장애 시 프로세스 메모리 캐시로 대체)
+여러 uvicorn 워커/레플리카가 동일한 Redis 캐시를 공유
 """
 
 from typing import Any, Optional, Dict
-import hashlib
-import json
-from datetime import datetime, timedelta
+from functools import wraps
+from itertools import islice
+import asyncio
 import logging
+import sys
+import weakref
+
+from cachetools import TLRUCache
+import orjson
+import xxhash
+
+from app.core.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
 
-# 메모리 기반 간단한 캐시 (개발용)
-_memory_cache: Dict[str, Dict[str, Any]] = {}
+MEMORY_CACHE_MAXSIZE = 10_000
+STATS_SAMPLE_SIZE = 100
+# 이 모듈이 Redis에 쓰는 키 네임스페이스 (cache_result의 cache:* 키/락과 분리)
+REDIS_NAMESPACE = "utilcache"
+CLEAR_SCAN_COUNT = 500
+
+
+def _redis_key(key: str) -> str:
+    """Redis 저장용 키 (모듈 네임스페이스 접두사)"""
+    return f"{REDIS_NAMESPACE}:{key}"
+
+
+def _ttu(_key: str, entry: tuple, now: float) -> float:
+    """항목별 만료 시각 계산 (entry = (value, ttl_seconds))"""
+    return now + entry[1]
+
+
+# 메모리 기반 캐시 (Redis 연결 불가 시 fallback 용도)
+# 최대 항목 수 제한 + 항목별 TTL 자동 만료
+_memory_cache: TLRUCache = TLRUCache(maxsize=MEMORY_CACHE_MAXSIZE, ttu=_ttu)
 
 
 def generate_cache_key(prefix: str, **kwargs) -> str:
     """캐시 키 생성"""
-    # 파라미터들을 정렬하여 일관된 키 생성
-    sorted_params = sorted(kwargs.items())
-    param_str = json.dumps(sorted_params, sort_keys=True, default=str)
-    hash_str = hashlib.md5(param_str.encode()).hexdigest()[:12]
+    # 파라미터들을 정렬하여 일관된 키 생성 (중첩 dict까지 키 정렬, 타입 정보 유지)
+    param_bytes = orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    # 비암호화 용도이므로 MD5 대신 xxh3 사용
+    hash_str = xxhash.xxh3_64_hexdigest(param_bytes)[:12]
     return f"{prefix}:{hash_str}"
 
 
-def set_cache(key: str, value: Any, ttl_seconds: int = 300) -> None:
-    """캐시 설정"""
+def _set_local(key: str, value: Any, ttl_seconds: int) -> None:
+    """메모리 캐시 설정 (fallback)"""
+    _memory_cache[key] = (value, ttl_seconds)
+
+
+def _get_local(key: str) -> Optional[Any]:
+    """메모리 캐시 조회 (fallback, 만료 항목은 TLRUCache가 자동 제거)"""
+    entry = _memory_cache.get(key)
+    if entry is None:
+        return None
+    return entry[0]
+
+
+async def set_cache(key: str, value: Any, ttl_seconds: int = 300) -> None:
+    """캐시 설정 (Redis, 실패 시 메모리 캐시)"""
     try:
-        expire_time = datetime.now() + timedelta(seconds=ttl_seconds)
-        _memory_cache[key] = {
-            "value": value,
-            "expire_time": expire_time
-        }
+        redis = await redis_client.get_redis()
+        await redis.set(_redis_key(key), orjson.dumps(value, default=str), ex=ttl_seconds)
         logger.debug(f"Cache set: {key} (TTL: {ttl_seconds}s)")
     except Exception as e:
-        logger.error(f"Cache set error: {e}")
+        logger.warning(f"Redis cache set error, using memory cache: {e}")
+        try:
+            _set_local(key, value, ttl_seconds)
+        except Exception as e:
+            logger.error(f"Cache set error: {e}")
 
 
-def get_cache(key: str) -> Optional[Any]:
-    """캐시 조회"""
+async def get_cache(key: str) -> Optional[Any]:
+    """캐시 조회 (Redis, 실패 시 메모리 캐시)"""
     try:
-        if key in _memory_cache:
-            cache_data = _memory_cache[key]
-            
-            # 만료 시간 체크
-            if datetime.now() > cache_data["expire_time"]:
-                del _memory_cache[key]
-                logger.debug(f"Cache expired: {key}")
-                return None
-            
-            logger.debug(f"Cache hit: {key}")
-            return cache_data["value"]
-        
-        logger.debug(f"Cache miss: {key}")
-        return None
+        redis = await redis_client.get_redis()
+        data = await redis.get(_redis_key(key))
+        if data is None:
+            logger.debug(f"Cache miss: {key}")
+            return None
+
+        logger.debug(f"Cache hit: {key}")
+        return orjson.loads(data)
     except Exception as e:
-        logger.error(f"Cache get error: {e}")
-        return None
+        logger.warning(f"Redis cache get error, using memory cache: {e}")
+        try:
+            return _get_local(key)
+        except Exception as e:
+            logger.error(f"Cache get error: {e}")
+            return None
 
 
-def delete_cache(key: str) -> None:
+async def delete_cache(key: str) -> None:
     """캐시 삭제"""
+    _memory_cache.pop(key, None)
     try:
-        if key in _memory_cache:
-            del _memory_cache[key]
-            logger.debug(f"Cache deleted: {key}")
+        redis = await redis_client.get_redis()
+        await redis.unlink(_redis_key(key))
+        logger.debug(f"Cache deleted: {key}")
     except Exception as e:
         logger.error(f"Cache delete error: {e}")
 
 
-def clear_cache(prefix: Optional[str] = None) -> None:
-    """캐시 전체 또는 특정 prefix 삭제"""
+async def _unlink_matching(pattern: str) -> int:
+    """SCAN MATCH로 키를 나눠 조회해 UNLINK (KEYS/FLUSHDB처럼 Redis 전체를 막거나 지우지 않음)"""
+    redis = await redis_client.get_redis()
+    deleted = 0
+    batch = []
+    async for key in redis.scan_iter(match=pattern, count=CLEAR_SCAN_COUNT):
+        batch.append(key)
+        if len(batch) >= CLEAR_SCAN_COUNT:
+            deleted += await redis.unlink(*batch)
+            batch.clear()
+    if batch:
+        deleted += await redis.unlink(*batch)
+    return deleted
+
+
+async def clear_cache(prefix: Optional[str] = None) -> None:
+    """이 모듈의 캐시 전체 또는 특정 prefix 삭제 (다른 Redis 키는 유지)"""
     try:
         if prefix:
-            keys_to_delete = [k for k in _memory_cache.keys() if k.startswith(f"{prefix}:")]
+            keys_to_delete = [k for k in list(_memory_cache.keys()) if k.startswith(f"{prefix}:")]
             for key in keys_to_delete:
                 del _memory_cache[key]
-            logger.info(f"Cache cleared for prefix: {prefix}")
+            deleted = await _unlink_matching(_redis_key(f"{prefix}:*"))
+            logger.info(f"Cache cleared for prefix: {prefix} ({deleted} keys)")
         else:
             _memory_cache.clear()
-            logger.info("All cache cleared")
+            deleted = await _unlink_matching(_redis_key("*"))
+            logger.info(f"All cache cleared ({deleted} keys)")
     except Exception as e:
         logger.error(f"Cache clear error: {e}")
 
 
 def cache_stats() -> Dict[str, Any]:
-    """캐시 통계"""
+    """메모리(fallback) 캐시 통계 (Redis 통계는 redis_client.get_cache_stats 사용)"""
     try:
-        active_keys = 0
-        expired_keys = 0
-        now = datetime.now()
-        
-        for cache_data in _memory_cache.values():
-            if now > cache_data["expire_time"]:
-                expired_keys += 1
-            else:
-                active_keys += 1
-        
+        _memory_cache.expire()
+        total_keys = len(_memory_cache)
+
+        # 메모리 사용량은 일부 항목 샘플링으로 추정 (전체 직렬화 X)
+        sample = list(islice(_memory_cache.items(), STATS_SAMPLE_SIZE))
+        if sample:
+            sample_bytes = sum(sys.getsizeof(k) + sys.getsizeof(v[0]) for k, v in sample)
+            estimated_bytes = sample_bytes / len(sample) * total_keys
+        else:
+            estimated_bytes = 0
+
         return {
-            "total_keys": len(_memory_cache),
-            "active_keys": active_keys, 
-            "expired_keys": expired_keys,
-            "memory_usage_mb": len(str(_memory_cache)) / 1024 / 1024
+            "total_keys": total_keys,
+            "max_keys": _memory_cache.maxsize,
+            "memory_usage_mb": estimated_bytes / 1024 / 1024
         }
     except Exception as e:
         logger.error(f"Cache stats error: {e}")
         return {"error": str(e)}
 
 
-def cleanup_expired_cache() -> int:
-    """만료된 캐시 정리"""
-    try:
-        now = datetime.now()
-        expired_keys = []
-        
-        for key, cache_data in _memory_cache.items():
-            if now > cache_data["expire_time"]:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del _memory_cache[key]
-        
-        if expired_keys:
-            logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
-        
-        return len(expired_keys)
-    except Exception as e:
-        logger.error(f"Cache cleanup error: {e}")
-        return 0
+# 키별 비동기 락 (같은 프로세스 내 동일 키 동시 계산 방지, 사용 후 자동 해제)
+_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _get_lock(key: str) -> asyncio.Lock:
+    """키별 asyncio.Lock 조회/생성"""
+    lock = _locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _locks[key] = lock
+    return lock
 
 
 # 데코레이터 방식 캐싱 (나중에 사용)
 def cached(ttl_seconds: int = 300, prefix: str = "default"):
-    """캐싱 데코레이터"""
+    """캐싱 데코레이터 (async 함수: Redis + 키별 락, sync 함수: 메모리 캐시)"""
     def decorator(func):
-        def wrapper(*args, **kwargs):
+        def _cache_key(args: tuple, kwargs: dict) -> str:
             # 함수명과 파라미터로 캐시 키 생성
-            cache_key = generate_cache_key(
+            return generate_cache_key(
                 f"{prefix}:{func.__name__}",
                 args=args,
                 kwargs=kwargs
             )
-            
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache_key = _cache_key(args, kwargs)
+
+                # 캐시 조회
+                cached_result = await get_cache(cache_key)
+                if cached_result is not None:
+                    return cached_result
+
+                # 동일 키는 한 번만 계산 (대기한 요청은 채워진 캐시 사용)
+                async with _get_lock(cache_key):
+                    cached_result = await get_cache(cache_key)
+                    if cached_result is not None:
+                        return cached_result
+
+                    result = await func(*args, **kwargs)
+                    await set_cache(cache_key, result, ttl_seconds)
+                    return result
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = _cache_key(args, kwargs)
+
             # 캐시 조회
-            cached_result = get_cache(cache_key)
+            cached_result = _get_local(cache_key)
             if cached_result is not None:
                 return cached_result
-            
+
             # 함수 실행 및 캐싱
             result = func(*args, **kwargs)
-            set_cache(cache_key, result, ttl_seconds)
-            
+            _set_local(cache_key, result, ttl_seconds)
+
             return result
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -3,14 +3,37 @@
 API 응답 표준화, 에러 처리, 페이징 등을 담당
 """
 
+from bisect import bisect_right
 from typing import Any, Dict, List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from fastapi import HTTPException, status
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 유효성 검사용 조회 테이블 (요청마다 리스트를 만들지 않도록 모듈 로드 시 1회 생성)
+_DAY_TYPES = ("weekday", "weekend", "all")
+_VALID_DAY_TYPES: frozenset = frozenset(_DAY_TYPES)
+
+_VALID_DISTRICTS: frozenset = frozenset({
+    "강남구", "강동구", "강북구", "강서구", "관악구", "광진구", "구로구", "금천구",
+    "노원구", "도봉구", "동대문구", "동작구", "마포구", "서대문구", "서초구", 
+    "성동구", "성북구", "송파구", "양천구", "영등포구", "용산구", "은평구", 
+    "종로구", "중구", "중랑구"
+})
+
+# 등급 변환 구간표 (오름차순 경계값 + 구간별 라벨, 라벨 수 = 경계값 수 + 1)
+_EFFICIENCY_THRESHOLDS = (1, 5, 10, 20)
+_EFFICIENCY_GRADES = ("F", "D", "C", "B", "A")
+
+_DEMAND_THRESHOLDS = (1_000_000, 1_500_000, 2_000_000)
+_DEMAND_LEVELS = ("low", "medium", "high", "peak")
+
+_DELAY_BASE_TIME = 90.0  # 기준 시간 90분
+_DELAY_RATIO_THRESHOLDS = (1.1, 1.3, 1.5)
+_DELAY_LEVELS = ("smooth", "normal", "congested", "heavy")
+
 
 class APIResponse(BaseModel):
     """표준 API 응답 포맷"""
@@ -18,13 +41,9 @@ class APIResponse(BaseModel):
     data: Optional[Any] = None
     message: Optional[str] = None
     error_code: Optional[str] = None
-    timestamp: datetime = datetime.now()
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat(),
-            date: lambda v: v.isoformat()
-        }
+    # 응답 생성 시각 (클래스 정의 시점이 아닌 인스턴스 생성 시점에 계산)
+    # datetime/date는 Pydantic v2가 기본적으로 ISO 8601로 직렬화
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
 class PaginatedResponse(BaseModel):
@@ -130,64 +149,36 @@ def validate_date_range(start_date: date, end_date: date) -> None:
 
 def validate_day_type(day_type: str) -> None:
     """요일 타입 유효성 검사"""
-    valid_day_types = ["weekday", "weekend", "all"]
-    if day_type not in valid_day_types:
-        raise bad_request_response(f"day_type must be one of: {valid_day_types}")
+    if day_type not in _VALID_DAY_TYPES:
+        raise bad_request_response(f"day_type must be one of: {list(_DAY_TYPES)}")
 
 
 def validate_district_name(district_name: str) -> None:
     """자치구명 유효성 검사"""
-    valid_districts = [
-        "강남구", "강동구", "강북구", "강서구", "관악구", "광진구", "구로구", "금천구",
-        "노원구", "도봉구", "동대문구", "동작구", "마포구", "서대문구", "서초구", 
-        "성동구", "성북구", "송파구", "양천구", "영등포구", "용산구", "은평구", 
-        "종로구", "중구", "중랑구"
-    ]
-    
-    if district_name not in valid_districts:
+    if district_name not in _VALID_DISTRICTS:
         raise bad_request_response(f"Invalid district_name: {district_name}")
 
 
 def format_efficiency_grade(efficiency_ratio: float) -> str:
-    """효율성 지수를 등급으로 변환"""
-    if efficiency_ratio >= 20:
-        return "A"
-    elif efficiency_ratio >= 10:
-        return "B"
-    elif efficiency_ratio >= 5:
-        return "C"
-    elif efficiency_ratio >= 1:
-        return "D"
-    else:
-        return "F"
+    """효율성 지수를 등급으로 변환 (>=20 A, >=10 B, >=5 C, >=1 D, 그 외 F)"""
+    if efficiency_ratio != efficiency_ratio:  # NaN은 모든 비교가 거짓이므로 최하위 (기존 >= 비교와 동일)
+        return _EFFICIENCY_GRADES[0]
+    return _EFFICIENCY_GRADES[bisect_right(_EFFICIENCY_THRESHOLDS, efficiency_ratio)]
 
 
 def format_demand_level(total_passengers: int) -> str:
-    """승객수를 수요 수준으로 변환"""
-    if total_passengers >= 2000000:
-        return "peak"
-    elif total_passengers >= 1500000:
-        return "high"
-    elif total_passengers >= 1000000:
-        return "medium"
-    else:
-        return "low"
+    """승객수를 수요 수준으로 변환 (>=200만 peak, >=150만 high, >=100만 medium, 그 외 low)"""
+    if total_passengers != total_passengers:  # NaN → low
+        return _DEMAND_LEVELS[0]
+    return _DEMAND_LEVELS[bisect_right(_DEMAND_THRESHOLDS, total_passengers)]
 
 
 def format_delay_level(avg_trip_time: float) -> str:
-    """평균 운행시간을 지연 수준으로 변환"""
-    # 기준 시간을 90분으로 가정
-    base_time = 90.0
-    delay_ratio = avg_trip_time / base_time
-    
-    if delay_ratio >= 1.5:
-        return "heavy"
-    elif delay_ratio >= 1.3:
-        return "congested" 
-    elif delay_ratio >= 1.1:
-        return "normal"
-    else:
-        return "smooth"
+    """평균 운행시간을 지연 수준으로 변환 (기준 시간 대비 >=1.5 heavy, >=1.3 congested, >=1.1 normal)"""
+    delay_ratio = avg_trip_time / _DELAY_BASE_TIME
+    if delay_ratio != delay_ratio:  # NaN → smooth
+        return _DELAY_LEVELS[0]
+    return _DELAY_LEVELS[bisect_right(_DELAY_RATIO_THRESHOLDS, delay_ratio)]
 
 
 def calculate_delay_index(avg_trip_time: float, base_time: float = 90.0) -> float:
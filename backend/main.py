@@ -1,11 +1,14 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from loguru import logger
+import asyncio
 
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.db.session import close_db
+from app.db.session import close_db, get_pool_status
+from app.services.cacheWarmupService import run_cache_warmer
 
 
 @asynccontextmanager
@@ -13,9 +16,13 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
     # Startup
     logger.info("Starting DRT Dashboard API...")
+    warmer_task = asyncio.create_task(run_cache_warmer())
     yield
     # Shutdown
     logger.info("Shutting down DRT Dashboard API...")
+    warmer_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmer_task
     await close_db()
 
 
@@ -43,16 +50,21 @@ def create_app() -> FastAPI:
         version="1.0.0",
         docs_url="/docs",
         redoc_url="/redoc",
+        default_response_class=ORJSONResponse,
         lifespan=lifespan
     )
     
     # Add CORS middleware
+    # 다른 미들웨어를 추가할 경우 이 호출보다 위에 둘 것 (마지막에 추가된 미들웨어가 가장 바깥에서
+    # 실행되므로 preflight OPTIONS 요청이 가장 먼저 응답됨)
+    # 허용 메서드/헤더를 명시하여 와일드카드 처리 없이 고정 헤더 값 사용
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=settings.ALLOWED_HOSTS,
+        allow_origins=list(settings.ALLOWED_HOSTS),
+        allow_origin_regex=settings.ALLOWED_HOSTS_REGEX,
         allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+        allow_methods=["GET", "POST"],
+        allow_headers=["Authorization", "Content-Type"],
     )
     
     # Include API router
@@ -77,6 +89,11 @@ def create_app() -> FastAPI:
             "version": "1.0.0"
         }
     
+    @app.get("/debug/pool")
+    async def pool_status():
+        """DB connection pool status endpoint"""
+        return get_pool_status()
+    
     return app
 
 
@@ -1,17 +1,59 @@
 #!/usr/bin/env python3
 # data_preparation/create_mstgcn_data.py
-# CSV 데이터를 MST-GCN 형식으로 변환
+# CSV/Parquet 데이터를 MST-GCN 형식으로 변환
 
 import pandas as pd
 import numpy as np
+import math
 import os
 from datetime import datetime, timedelta
 
+# pyarrow를 선택적으로 import (없으면 CSV 입력만 청크 단위로 읽음)
+try:
+    import pyarrow.dataset as ds
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# scipy를 선택적으로 import (없으면 브로드캐스팅 방식으로 인접 행렬 계산)
+try:
+    from scipy import sparse
+    from scipy.spatial import cKDTree
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from numba_utils import NUMBA_AVAILABLE
+from mstgcn_preprocessor import load_graph_signal, mean_std
+
+if NUMBA_AVAILABLE:
+    from numba_utils import build_adj
+
+EARTH_RADIUS_KM = 6371
+CSV_CHUNK_SIZE = 200_000
+QUANTIZE_SCALE = np.float32(1 / 255)  # uint8 양자화 단위 (drt_probability ∈ [0, 1])
+
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
     Haversine 공식을 사용한 거리 계산 (km)
+    스칼라 입력은 math 함수로 계산 (값마다 작은 ndarray를 만들지 않음), 배열 입력은 numpy 경로
     """
-    R = 6371  # 지구 반지름 (km)
+    if np.ndim(lat1) or np.ndim(lon1) or np.ndim(lat2) or np.ndim(lon2):
+        return haversine_distance_vec(lat1, lon1, lat2, lon2)
+    
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def haversine_distance_vec(lat1, lon1, lat2, lon2):
+    """
+    Haversine 공식을 사용한 거리 계산 (km, numpy 배열 입력)
+    """
+    R = EARTH_RADIUS_KM  # 지구 반지름 (km)
     
     lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
     
@@ -23,82 +65,239 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     
     return R * c
 
+def create_sparse_adjacency_matrix(stops_df, threshold=5.0):
+    """
+    KD-tree 기반 희소 인접 행렬 생성 (scipy 필요)
+    위경도를 단위 구면 3차원 좌표로 변환하면 구면 거리 <= threshold 와
+    현(chord) 거리 <= 2*sin(threshold / 2R) 가 동치이므로 반경 내 쌍만 탐색
+    """
+    lat = np.radians(stops_df['latitude'].to_numpy(dtype=np.float64))
+    lon = np.radians(stops_df['longitude'].to_numpy(dtype=np.float64))
+    n = len(lat)
+    
+    xyz = np.stack([
+        np.cos(lat) * np.cos(lon),
+        np.cos(lat) * np.sin(lon),
+        np.sin(lat)
+    ], axis=1)
+    
+    tree = cKDTree(xyz)
+    chord = 2 * np.sin(threshold / (2 * EARTH_RADIUS_KM))
+    pairs = tree.query_pairs(chord, output_type='ndarray')  # (i < j) 쌍
+    
+    # 대칭 행렬 (i,j), (j,i) 모두 연결
+    rows = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    cols = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    values = np.ones(len(rows), dtype=np.float32)
+    
+    return sparse.coo_matrix((values, (rows, cols)), shape=(n, n)).tocsr()
+
+def save_sparse_adjacency(adj_matrix, output_file):
+    """
+    인접 행렬을 희소 형식(CSR)으로 저장 (scipy 미설치 시 생략)
+    """
+    if not SCIPY_AVAILABLE:
+        return None
+    
+    if not sparse.issparse(adj_matrix):
+        adj_matrix = sparse.csr_matrix(adj_matrix)
+    sparse.save_npz(output_file, adj_matrix.tocsr())
+    print(f"Saved sparse adjacency: {output_file}")
+    return output_file
+
 def create_adjacency_matrix(stops_df, threshold=5.0):
     """
-    거리 기반 인접 행렬 생성
+    거리 기반 인접 행렬 생성 (dense, float32)
+    1) scipy: KD-tree로 반경 내 쌍만 계산
+    2) numba: 상삼각 쌍별 반복을 JIT 병렬 실행
+    3) 그 외: 브로드캐스팅으로 NxN 거리 행렬을 한 번에 계산
     """
-    n = len(stops_df)
-    adj_matrix = np.zeros((n, n))
+    if SCIPY_AVAILABLE:
+        return create_sparse_adjacency_matrix(stops_df, threshold).toarray()
     
-    for i in range(n):
-        for j in range(i+1, n):
-            dist = haversine_distance(
-                stops_df.iloc[i]['latitude'], stops_df.iloc[i]['longitude'],
-                stops_df.iloc[j]['latitude'], stops_df.iloc[j]['longitude']
-            )
-            if dist <= threshold:
-                adj_matrix[i, j] = 1
-                adj_matrix[j, i] = 1
+    R = EARTH_RADIUS_KM
+    
+    lat = np.radians(stops_df['latitude'].to_numpy(dtype=np.float64))
+    lon = np.radians(stops_df['longitude'].to_numpy(dtype=np.float64))
+    
+    if NUMBA_AVAILABLE:
+        return build_adj(lat, lon, float(threshold)).astype(np.float32)
+    
+    # 삼각함수는 정류장별로 한 번만 계산 (N회), 쌍별 계산은 곱셈/덧셈만 사용
+    # sin^2(dx/2) = (1 - cos(dx)) / 2,  cos(x_i - x_j) = cos x_i cos x_j + sin x_i sin x_j
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    sin_lon, cos_lon = np.sin(lon), np.cos(lon)
+    
+    cos_lat_ij = np.outer(cos_lat, cos_lat)
+    cos_dlat = cos_lat_ij + np.outer(sin_lat, sin_lat)
+    cos_dlon = np.outer(cos_lon, cos_lon) + np.outer(sin_lon, sin_lon)
+    
+    a = (1 - cos_dlat) / 2 + cos_lat_ij * (1 - cos_dlon) / 2
+    
+    # 거리 대신 haversine a 값으로 비교 (arcsin/sqrt 생략)
+    # dist <= threshold  <=>  a <= sin(threshold / 2R)^2
+    adj_matrix = (a <= np.sin(threshold / (2 * R))**2).astype(np.float32)
+    np.fill_diagonal(adj_matrix, 0)  # 자기 자신 연결 제외
     
     return adj_matrix
 
-def create_graph_signal_matrix(df):
+def iter_file_chunks(data_file, columns, chunksize=CSV_CHUNK_SIZE):
     """
-    시공간 그래프 신호 행렬 생성
+    CSV/Parquet 파일을 청크 단위 DataFrame으로 읽기
+    Parquet(단일 파일 또는 part 파일 디렉토리)은 dtype이 보존되므로 recorded_at이 datetime64로 바로 로드됨
     """
-    print("Creating graph signal matrix...")
-    
-    # 정류장 정보 추출
-    stops_df = df[['stop_id', 'stop_name', 'latitude', 'longitude']].drop_duplicates().reset_index(drop=True)
+    if os.path.isdir(data_file) or data_file.endswith('.parquet'):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("Parquet 입력을 읽으려면 pyarrow가 필요합니다 (pip install pyarrow). CSV 입력은 pyarrow 없이 처리됩니다.")
+        dataset = ds.dataset(data_file, format='parquet')
+        for batch in dataset.to_batches(columns=columns, batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        # 청크마다 dtype 추론이 달라지지 않도록 stop_id는 문자열로 고정
+        yield from pd.read_csv(data_file, usecols=columns, dtype={'stop_id': str},
+                               parse_dates=['recorded_at'], chunksize=chunksize)
+
+def create_graph_signal_matrix_from_file(data_file, chunksize=CSV_CHUNK_SIZE):
+    """
+    CSV/Parquet 파일을 청크 단위로 읽어 시공간 그래프 신호 행렬 생성
+    (전체 파일을 메모리에 올리지 않으므로 최대 메모리 = 청크 1개 + 결과 행렬)
+    1차: 정류장 목록 및 시간 범위 수집
+    2차: 미리 할당한 (T, N, F) 행렬에 청크별 scatter
+    """
+    print("Creating graph signal matrix (chunked)...")
+    stop_cols = ['stop_id', 'stop_name', 'latitude', 'longitude']
+    
+    # 1차: 정류장 정보 / 시간 범위
+    stop_chunks = []
+    min_time, max_time = None, None
+    total_records = 0
+    for chunk in iter_file_chunks(data_file, stop_cols + ['recorded_at'], chunksize):
+        stop_chunks.append(chunk[stop_cols].drop_duplicates(subset='stop_id'))
+        chunk_min, chunk_max = chunk['recorded_at'].min(), chunk['recorded_at'].max()
+        min_time = chunk_min if min_time is None else min(min_time, chunk_min)
+        max_time = chunk_max if max_time is None else max(max_time, chunk_max)
+        total_records += len(chunk)
+    print(f"Loaded {total_records} records")
+    
+    # stop_id당 하나의 노드 (카테고리 코드 = 노드 인덱스로 사용하므로 유일해야 함)
+    stops_df = pd.concat(stop_chunks, ignore_index=True).drop_duplicates(subset='stop_id').reset_index(drop=True)
+    del stop_chunks
     print(f"Found {len(stops_df)} unique stops")
     
-    # 정류장 ID to 인덱스 매핑
-    stop_to_idx = {stop_id: idx for idx, stop_id in enumerate(stops_df['stop_id'])}
+    # stop_id → 노드 인덱스 (stops_df 순서의 카테고리 코드, 청크마다 dict 조회 없이 일괄 변환)
+    stop_dtype = pd.CategoricalDtype(categories=stops_df['stop_id'])
     
-    # 시간 범위 생성
-    df['recorded_at'] = pd.to_datetime(df['recorded_at'])
-    time_range = pd.date_range(
-        start=df['recorded_at'].min(),
-        end=df['recorded_at'].max(),
-        freq='H'
-    )
+    time_range = pd.date_range(start=min_time, end=max_time, freq='h')
     print(f"Time range: {time_range[0]} to {time_range[-1]} ({len(time_range)} steps)")
     
-    # 그래프 신호 행렬 초기화 (T, N, F)
-    num_timesteps = len(time_range)
-    num_nodes = len(stops_df)
-    num_features = 1  # DRT probability
-    
-    graph_signal_matrix = np.zeros((num_timesteps, num_nodes, num_features))
-    
-    # 데이터 채우기
+    # 2차: 청크별 scatter
     print("Filling graph signal matrix...")
-    for _, row in df.iterrows():
-        stop_idx = stop_to_idx[row['stop_id']]
-        time_idx = (row['recorded_at'] - time_range[0]).total_seconds() // 3600
-        time_idx = int(time_idx)
+    graph_signal_matrix = np.zeros((len(time_range), len(stops_df), 1), dtype=np.float32)
+    start = time_range[0].to_datetime64()
+    
+    for chunk in iter_file_chunks(data_file, ['stop_id', 'recorded_at', 'drt_probability'], chunksize):
+        chunk = chunk[chunk['drt_probability'].notna()]
+        time_idx = ((chunk['recorded_at'].to_numpy() - start) // np.timedelta64(1, 'h')).astype(np.int64)
+        stop_idx = chunk['stop_id'].astype(stop_dtype).cat.codes.to_numpy(np.int32)
         
-        if 0 <= time_idx < num_timesteps:
-            graph_signal_matrix[time_idx, stop_idx, 0] = row['drt_probability']
+        # 청크 내 중복 (시간, 정류장)은 마지막 값만 기록 (청크 간에는 뒤 청크가 덮어씀)
+        last = ~pd.DataFrame({'t': time_idx, 's': stop_idx}).duplicated(keep='last').to_numpy()
+        graph_signal_matrix[time_idx[last], stop_idx[last], 0] = chunk['drt_probability'].to_numpy()[last]
+        del chunk
     
     print(f"Graph signal matrix shape: {graph_signal_matrix.shape}")
     return graph_signal_matrix, stops_df, time_range
 
-def save_mstgcn_format(graph_signal_matrix, adj_matrix, stops_df, time_range, output_dir):
+def npy_paths(data_file):
+    """
+    NPZ 경로에 대응하는 배열별 .npy 경로 (신호 행렬, 인접 행렬)
+    """
+    stem = os.path.splitext(data_file)[0]
+    return f"{stem}.npy", f"{stem}_adj.npy"
+
+def save_npy_arrays(data_file, data, adj_matrix):
+    """
+    신호/인접 행렬을 배열별 비압축 .npy로 저장 (로드 시 mmap_mode='r'로 열 수 있도록)
+    NPZ는 기존 로더(mstgcn_utils, mstgcn_preprocessor) 호환을 위해 유지
+    """
+    data_npy, adj_npy = npy_paths(data_file)
+    np.save(data_npy, data)
+    np.save(adj_npy, adj_matrix)
+    print(f"Saved NPY files: {data_npy}, {adj_npy}")
+    return data_npy, adj_npy
+
+def fresh_npy(npy_path, data_file):
+    """
+    .npy가 있고 NPZ보다 오래되지 않았을 때만 True
+    (mstgcn_data_builder 등 .npy를 쓰지 않는 작성자가 NPZ만 다시 만든 경우 이전 .npy를 읽지 않음)
+    """
+    if not os.path.exists(npy_path):
+        return False
+    if os.path.exists(data_file) and os.path.getmtime(npy_path) < os.path.getmtime(data_file):
+        print(f"Ignoring stale NPY (older than {data_file}): {npy_path}")
+        return False
+    return True
+
+def load_graph_signal_file(data_file):
+    """
+    그래프 신호 행렬 로드 (T, N, F)
+    같은 이름의 .npy가 NPZ보다 새로우면 mmap으로 열어 실제 접근한 페이지만 읽고, 없으면 NPZ에서 로드
+    """
+    data_npy, _ = npy_paths(data_file)
+    if fresh_npy(data_npy, data_file):
+        data = np.load(data_npy, mmap_mode='r')
+        if data.dtype == np.uint8:  # 양자화 저장 → float32 복원 (복사 발생)
+            return data.astype(np.float32) * QUANTIZE_SCALE
+        return data
+    return load_graph_signal(np.load(data_file, allow_pickle=False))
+
+def load_adjacency_file(data_file):
+    """
+    인접 행렬 로드 (.npy가 NPZ보다 새로우면 mmap, 없으면 NPZ의 adj_matrix)
+    NPZ에 CSR 구성 배열(adj_data/adj_indices/adj_indptr/adj_shape)만 있으면 dense로 복원
+    """
+    _, adj_npy = npy_paths(data_file)
+    if fresh_npy(adj_npy, data_file):
+        return np.load(adj_npy, mmap_mode='r')
+    npz = np.load(data_file, allow_pickle=False)
+    if 'adj_matrix' in npz.files:
+        return npz['adj_matrix']
+    n = int(npz['adj_shape'][0])
+    indptr, indices = npz['adj_indptr'], npz['adj_indices']
+    adj_matrix = np.zeros((n, n), dtype=np.float32)
+    adj_matrix[np.repeat(np.arange(n), np.diff(indptr)), indices] = npz['adj_data']
+    return adj_matrix
+
+def save_mstgcn_format(graph_signal_matrix, adj_matrix, stops_df, time_range, output_dir, quantize=False):
     """
     MST-GCN 형식으로 저장
+    quantize=True: drt_probability를 uint8(1/255 단위)로 저장 (float32 대비 1/4 크기)
     """
     os.makedirs(output_dir, exist_ok=True)
     
     # 1. NPZ 파일로 저장
     data_file = os.path.join(output_dir, 'gapyeong_drt_data.npz')
-    np.savez_compressed(
+    if quantize:
+        data = np.round(np.clip(graph_signal_matrix, 0, 1) / QUANTIZE_SCALE).astype(np.uint8)
+        extra = {'scale': QUANTIZE_SCALE}
+    else:
+        data = graph_signal_matrix.astype(np.float32, copy=False)
+        extra = {}
+    # 대용량 배열의 단일 스레드 zlib 압축을 피하기 위해 비압축 저장 (키 구성은 동일)
+    np.savez(
         data_file,
-        data=graph_signal_matrix,  # (T, N, F)
-        adj_matrix=adj_matrix
+        data=data,  # (T, N, F)
+        adj_matrix=adj_matrix,
+        **extra
     )
     print(f"Saved NPZ file: {data_file}")
     
+    # 배열별 .npy (mmap 로드용)
+    data_npy, adj_npy = save_npy_arrays(data_file, data, adj_matrix)
+    
+    # 희소 인접 행렬 (CSR) 별도 저장
+    save_sparse_adjacency(adj_matrix, os.path.join(output_dir, 'gapyeong_drt_adj_sparse.npz'))
+    
     # 2. 메타데이터 저장
     metadata = {
         'num_nodes': len(stops_df),
@@ -118,7 +317,13 @@ def save_mstgcn_format(graph_signal_matrix, adj_matrix, stops_df, time_range, ou
             }
             for idx, row in stops_df.iterrows()
         },
-        'feature_description': 'DRT demand probability (normalized)'
+        'feature_description': 'DRT demand probability (normalized)',
+        'dtype': str(data.dtype),
+        'scale': float(QUANTIZE_SCALE) if quantize else None,
+        'arrays': {
+            'data': os.path.basename(data_npy),
+            'adj_matrix': os.path.basename(adj_npy)
+        }
     }
     
     import json
@@ -171,6 +376,47 @@ def get_sample_indices(data_sequence, num_of_weeks, num_of_days, num_of_hours,
     
     return week_sample, day_sample, hour_sample, target
 
+def build_sample_indices(num_timesteps, num_of_weeks, num_of_days, num_of_hours,
+                         num_for_predict, points_per_hour=1):
+    """
+    전체 샘플의 시점 인덱스를 한 번에 계산 (get_sample_indices의 벡터화 버전)
+    반환: ([week_idx, day_idx, hour_idx] 중 사용하는 패턴의 (B, L) 배열 목록, target_idx (B, T_pred))
+    주간 패턴은 주당 7일치 시점 (mstgcn_preprocessor.build_lag_indices는 (S, T_total) 단일 배열 + 주당 1개 시점)
+    사용하는 모든 패턴의 과거 구간이 확보되는 시점부터 샘플 생성
+    """
+    day_len = 24 * points_per_hour
+    week_len = 7 * day_len
+    
+    # 각 패턴의 label_start_idx 기준 상대 오프셋
+    offsets = []
+    if num_of_weeks > 0:
+        # 주마다 7일치 같은 시각 (week_start + week*7일 + k일)
+        week_offsets = (np.arange(num_of_weeks)[:, None] * week_len
+                        + np.arange(7)[None, :] * day_len).ravel()
+        offsets.append(week_offsets - num_of_weeks * week_len)
+    if num_of_days > 0:
+        offsets.append(np.arange(num_of_days) * day_len - num_of_days * day_len)
+    if num_of_hours > 0:
+        offsets.append(np.arange(-num_of_hours, 0))
+    
+    max_history = max((-o.min() for o in offsets), default=0)
+    valid_starts = np.arange(max_history, num_timesteps - num_for_predict + 1)
+    
+    component_idx = [valid_starts[:, None] + o[None, :] for o in offsets]
+    target_idx = valid_starts[:, None] + np.arange(num_for_predict)[None, :]
+    
+    return component_idx, target_idx
+
+def normalize(x, mean, std, inplace=False):
+    """
+    (x - mean) / std 를 float32로 계산 (inplace=True면 x 버퍼에 직접 기록, 아니면 복사본 1개만 생성)
+    """
+    out = x if inplace else np.subtract(x, mean, dtype=np.float32)
+    if inplace:
+        np.subtract(out, mean, out=out)
+    np.divide(out, std, out=out)
+    return out
+
 def read_and_generate_dataset(graph_signal_matrix_filename,
                              num_of_weeks=1, num_of_days=1, num_of_hours=3,
                              num_for_predict=1, points_per_hour=1, save=False):
@@ -179,83 +425,55 @@ def read_and_generate_dataset(graph_signal_matrix_filename,
     """
     print(f"Loading data from: {graph_signal_matrix_filename}")
     
-    # 데이터 로드
-    data_file = np.load(graph_signal_matrix_filename, allow_pickle=True)
-    data_seq = data_file['data']  # (T, N, F)
+    # 데이터 로드 (.npy가 있으면 mmap - 샘플 생성 시 필요한 시점만 읽음)
+    data_seq = load_graph_signal_file(graph_signal_matrix_filename)  # (T, N, F), float32
     
     print(f"Original data shape: {data_seq.shape}")
     print(f"Time steps: {data_seq.shape[0]}, Nodes: {data_seq.shape[1]}, Features: {data_seq.shape[2]}")
     
-    all_samples = []
-    
-    # 샘플 생성
-    for idx in range(data_seq.shape[0]):
-        sample = get_sample_indices(
-            data_seq, num_of_weeks, num_of_days,
-            num_of_hours, idx, num_for_predict,
-            points_per_hour
-        )
-        
-        if all(s is None for s in sample[:3]) or sample[3] is None:
-            continue
-            
-        week_sample, day_sample, hour_sample, target = sample
-        
-        sample_list = []
-        
-        # 주간 패턴
-        if num_of_weeks > 0 and week_sample is not None:
-            week_sample = np.expand_dims(week_sample, axis=0).transpose((0, 2, 3, 1))
-            sample_list.append(week_sample)
-        
-        # 일간 패턴  
-        if num_of_days > 0 and day_sample is not None:
-            day_sample = np.expand_dims(day_sample, axis=0).transpose((0, 2, 3, 1))
-            sample_list.append(day_sample)
-        
-        # 시간 패턴
-        if num_of_hours > 0 and hour_sample is not None:
-            hour_sample = np.expand_dims(hour_sample, axis=0).transpose((0, 2, 3, 1))
-            sample_list.append(hour_sample)
-        
-        # 타겟
-        if target is not None:
-            target = np.expand_dims(target, axis=0).transpose((0, 2, 3, 1))[:, :, 0, :]
-            sample_list.append(target)
-            
-            if len(sample_list) > 1:  # 최소한 입력과 타겟이 있어야 함
-                all_samples.append(sample_list)
+    # 샘플 인덱스 (모든 샘플의 week/day/hour/target 시점을 2차원 인덱스 배열로 미리 계산)
+    component_idx, target_idx = build_sample_indices(
+        data_seq.shape[0], num_of_weeks, num_of_days, num_of_hours,
+        num_for_predict, points_per_hour
+    )
+    num_samples = len(target_idx)
     
-    print(f"Generated {len(all_samples)} samples")
+    print(f"Generated {num_samples} samples")
     
-    if len(all_samples) == 0:
+    if num_samples == 0 or not component_idx:
         raise ValueError("No valid samples generated. Check data parameters.")
     
-    # 훈련/검증/테스트 분할 (6:2:2)
-    split_line1 = int(len(all_samples) * 0.6)
-    split_line2 = int(len(all_samples) * 0.8)
+    # 입력 (B, N, F, L) 버퍼를 한 번만 할당하고 시점(lag)별로 직접 기록
+    # (패턴별 임시 블록 + np.concatenate 복사 없음, 입력 특성 결합 순서: 주간 → 일간 → 시간)
+    lag_idx = np.concatenate(component_idx, axis=1)  # (B, L)
+    num_nodes, num_features = data_seq.shape[1], data_seq.shape[2]
+    all_x = np.empty((num_samples, num_nodes, num_features, lag_idx.shape[1]), dtype=data_seq.dtype)
+    for lag in range(lag_idx.shape[1]):
+        all_x[..., lag] = data_seq[lag_idx[:, lag]]  # (B, N, F)
+    # 타겟 (B, N, T_pred)도 최종 레이아웃으로 할당 후 예측 시점별로 기록
+    # (transpose view는 비연속이라 저장/텐서 변환 시 숨은 복사가 생김)
+    all_target = np.empty((num_samples, num_nodes, target_idx.shape[1]), dtype=data_seq.dtype)
+    for step in range(target_idx.shape[1]):
+        all_target[..., step] = data_seq[target_idx[:, step], :, 0]  # (B, N)
     
-    training_set = [np.concatenate(i, axis=0) for i in zip(*all_samples[:split_line1])]
-    validation_set = [np.concatenate(i, axis=0) for i in zip(*all_samples[split_line1:split_line2])]
-    testing_set = [np.concatenate(i, axis=0) for i in zip(*all_samples[split_line2:])]
+    # 훈련/검증/테스트 분할 (6:2:2)
+    split_line1 = int(num_samples * 0.6)
+    split_line2 = int(num_samples * 0.8)
     
-    # 입력 특성 결합
-    train_x = np.concatenate(training_set[:-1], axis=-1)
-    val_x = np.concatenate(validation_set[:-1], axis=-1)
-    test_x = np.concatenate(testing_set[:-1], axis=-1)
+    train_x = all_x[:split_line1]
+    val_x = all_x[split_line1:split_line2]
+    test_x = all_x[split_line2:]
     
     # 타겟
-    train_target = training_set[-1]
-    val_target = validation_set[-1]
-    test_target = testing_set[-1]
+    train_target = all_target[:split_line1]
+    val_target = all_target[split_line1:split_line2]
+    test_target = all_target[split_line2:]
     
-    # 정규화
-    mean = train_x.mean()
-    std = train_x.std()
+    # 정규화 (train/val/test는 all_x의 슬라이스이므로 all_x 버퍼를 제자리 정규화)
+    mean, std = mean_std(train_x)
+    normalize(all_x, mean, std, inplace=True)
     
-    train_x_norm = (train_x - mean) / std
-    val_x_norm = (val_x - mean) / std
-    test_x_norm = (test_x - mean) / std
+    train_x_norm, val_x_norm, test_x_norm = train_x, val_x, test_x
     
     all_data = {
         'train': {'x': train_x_norm, 'target': train_target},
@@ -278,7 +496,8 @@ def read_and_generate_dataset(graph_signal_matrix_filename,
         filename = os.path.join(dirpath, f"{file_name}_r{num_of_hours}_d{num_of_days}_w{num_of_weeks}_mstgcn")
         
         print(f'Saving preprocessed file to: {filename}.npz')
-        np.savez_compressed(
+        # 비압축 저장 (압축 시 단일 스레드 zlib이 병목, 키 구성은 동일하여 기존 로더 호환)
+        np.savez(
             filename,
             train_x=all_data['train']['x'], train_target=all_data['train']['target'],
             val_x=all_data['val']['x'], val_target=all_data['val']['target'],
@@ -290,16 +509,13 @@ def read_and_generate_dataset(graph_signal_matrix_filename,
 
 def main():
     """메인 실행"""
-    # CSV 파일 로드
+    # CSV/Parquet 파일 로드 (extract_drt_features_to_csv.py의 Parquet 디렉토리 출력도 그대로 사용 가능)
     csv_file = '/Users/leekyoungsoo/teamProject/DDF-ASTGCN/data/processed/gapyeong_drt_sample.csv'
     output_dir = '/Users/leekyoungsoo/teamProject/DDF-ASTGCN/data/processed'
     
-    print("Loading CSV data...")
-    df = pd.read_csv(csv_file)
-    print(f"Loaded {len(df)} records")
-    
-    # 그래프 신호 행렬 생성
-    graph_signal_matrix, stops_df, time_range = create_graph_signal_matrix(df)
+    # 그래프 신호 행렬 생성 (청크 단위 스트리밍)
+    print("Loading data...")
+    graph_signal_matrix, stops_df, time_range = create_graph_signal_matrix_from_file(csv_file)
     
     # 인접 행렬 생성
     print("Creating adjacency matrix...")
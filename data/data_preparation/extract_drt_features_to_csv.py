@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 """
-DRT Features 데이터베이스에서 CSV 파일 추출 스크립트
+DRT Features 데이터베이스에서 Parquet 파일 추출 스크립트
 대용량 데이터를 배치 처리로 안전하게 추출
+(CSV 대비 dtype 유지, 압축, 빠른 로드 - recorded_at이 datetime으로 바로 로드됨)
 """
 
 import psycopg2
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import os
 import sys
@@ -24,6 +30,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 추출 기간 (2024-11-01 ~ 2025-06-25)
+PERIOD_START = '2024-11-01 00:00:00'
+PERIOD_END = '2025-06-25 23:59:59'
+
+# 전체 추출 쿼리 (server-side cursor로 스트리밍, 컬럼 순서 = essential_columns)
+FEATURES_QUERY = """
+SELECT 
+    df.stop_id,
+    bs.stop_name,
+    df.recorded_at,
+    bs.latitude,
+    bs.longitude,
+    df.normalized_log_boarding_count,
+    df.service_availability,
+    df.is_rest_day,
+    df.normalized_interval,
+    df.drt_probability
+FROM drt_features_mstgcn df
+JOIN bus_stops bs ON df.stop_id = bs.stop_id
+WHERE bs.latitude IS NOT NULL 
+AND bs.longitude IS NOT NULL
+AND df.recorded_at >= %s
+AND df.recorded_at <= %s
+ORDER BY df.recorded_at, df.stop_id
+"""
+
+# COPY CSV 컬럼 타입 (블록별 타입 추론 차이 방지, 나머지 컬럼은 자동 추론 - recorded_at은 timestamp)
+CSV_COLUMN_TYPES = {
+    'stop_id': pa.string(),
+    'stop_name': pa.string(),
+    'latitude': pa.float64(),
+    'longitude': pa.float64(),
+    'normalized_log_boarding_count': pa.float64(),
+    'normalized_interval': pa.float64(),
+    'drt_probability': pa.float64()
+}
+
 class DRTDataExtractor:
     def __init__(self, db_config: dict, output_dir: str = "data/processed"):
         self.db_config = db_config
@@ -37,151 +80,208 @@ class DRTDataExtractor:
         # 출력 디렉토리 생성
         os.makedirs(output_dir, exist_ok=True)
     
-    def get_data_info(self) -> dict:
-        """데이터 크기 및 기본 정보 조회 (2024-11-01 ~ 2025-06-25)"""
-        query = """
-        SELECT 
-            COUNT(*) as total_records,
-            COUNT(DISTINCT df.stop_id) as unique_stops,
-            MIN(df.recorded_at) as min_date,
-            MAX(df.recorded_at) as max_date,
-            AVG(LENGTH(bs.stop_name)) as avg_name_length
-        FROM drt_features_mstgcn df
-        JOIN bus_stops bs ON df.stop_id = bs.stop_id
-        WHERE bs.latitude IS NOT NULL 
-        AND bs.longitude IS NOT NULL
-        AND df.recorded_at >= '2024-11-01 00:00:00'
-        AND df.recorded_at <= '2025-06-25 23:59:59'
+    def estimate_record_count(self) -> int:
+        """
+        추출 대상 레코드 수 추정 (COUNT(*) 전체 스캔 대신 플래너 통계 사용, 진행률 표시용)
         """
-        
         try:
             with psycopg2.connect(**self.db_config) as conn:
-                df = pd.read_sql(query, conn)
-                info = df.iloc[0].to_dict()
-                
-                # 메모리 사용량 추정 (MB)
-                estimated_memory = (info['total_records'] * len(self.essential_columns) * 20) / (1024**2)
-                info['estimated_memory_mb'] = estimated_memory
-                
-                return info
+                with conn.cursor() as cur:
+                    cur.execute("EXPLAIN (FORMAT JSON) " + FEATURES_QUERY, [PERIOD_START, PERIOD_END])
+                    plan = cur.fetchone()[0]
+                    return int(plan[0]['Plan']['Plan Rows'])
         except Exception as e:
-            logger.error(f"데이터 정보 조회 실패: {e}")
-            raise
+            logger.warning(f"레코드 수 추정 실패: {e}")
+            return 0
     
-    def extract_batch(self, offset: int, batch_size: int) -> pd.DataFrame:
-        """배치 단위로 데이터 추출 (2024-11-01 ~ 2025-06-25)"""
-        query = """
-        SELECT 
-            df.stop_id,
-            bs.stop_name,
-            df.recorded_at,
-            bs.latitude,
-            bs.longitude,
-            df.normalized_log_boarding_count,
-            df.service_availability,
-            df.is_rest_day,
-            df.normalized_interval,
-            df.drt_probability
-        FROM drt_features_mstgcn df
-        JOIN bus_stops bs ON df.stop_id = bs.stop_id
-        WHERE bs.latitude IS NOT NULL 
-        AND bs.longitude IS NOT NULL
-        AND df.recorded_at >= '2024-11-01 00:00:00'
-        AND df.recorded_at <= '2025-06-25 23:59:59'
-        ORDER BY df.recorded_at, df.stop_id
-        LIMIT %s OFFSET %s
+    def _copy_window_to_parquet(self, window_start: pd.Timestamp, window_end: pd.Timestamp,
+                                part_file: str, batch_size: int) -> int:
+        """
+        [window_start, window_end] 기간을 COPY로 추출하여 Parquet 파일 하나로 저장 (워커 1개 단위)
+        COPY (SELECT ...) TO STDOUT으로 DB가 직접 CSV를 스트리밍하고 (행별 Python 객체 변환 없음)
+        pyarrow CSV 스트리밍 리더로 읽어 batch_size 행 단위 row group으로 기록
         """
+        tmp_file = f"{part_file}.csv.tmp"
+        processed_records = 0
         
         try:
+            # DB → CSV 스트리밍 (워커별 별도 커넥션)
             with psycopg2.connect(**self.db_config) as conn:
-                df = pd.read_sql(query, conn, params=[batch_size, offset])
-                return df
-        except Exception as e:
-            logger.error(f"배치 추출 실패 (offset: {offset}, batch_size: {batch_size}): {e}")
-            raise
-    
-    def extract_to_csv(self, batch_size: int = 50000, max_memory_mb: int = 500) -> str:
-        """대용량 데이터를 배치 처리로 CSV 파일 생성"""
-        
-        logger.info("=== DRT Features CSV 추출 시작 ===")
-        
-        # 1. 데이터 정보 확인
-        info = self.get_data_info()
-        total_records = info['total_records']
-        unique_stops = info['unique_stops']
-        estimated_memory = info['estimated_memory_mb']
+                with conn.cursor() as cur:
+                    select_sql = cur.mogrify(
+                        FEATURES_QUERY, [window_start.to_pydatetime(), window_end.to_pydatetime()]
+                    ).decode()
+                    with open(tmp_file, 'wb') as f:
+                        cur.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH (FORMAT CSV, HEADER)", f)
+            
+            # CSV → Parquet (블록 단위 스트리밍 변환)
+            reader = pa_csv.open_csv(
+                tmp_file,
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=CSV_COLUMN_TYPES,
+                    # PostgreSQL boolean CSV 표기 (t/f) 포함
+                    true_values=['t', 'true', '1'],
+                    false_values=['f', 'false', '0']
+                )
+            )
+            with pq.ParquetWriter(part_file, reader.schema) as writer:
+                for batch in reader:
+                    writer.write_batch(batch, row_group_size=batch_size)
+                    processed_records += batch.num_rows
+            
+            # 빈 구간은 컬럼 타입이 null로 추론되어 데이터셋 스키마를 깨뜨리므로 파일 제거
+            if processed_records == 0:
+                os.remove(part_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
         
-        logger.info(f"총 레코드 수: {total_records:,}")
-        logger.info(f"유니크 정류장: {unique_stops:,}")
-        logger.info(f"데이터 기간: {info['min_date']} ~ {info['max_date']}")
-        logger.info(f"예상 메모리 사용량: {estimated_memory:.1f} MB")
+        return processed_records
+    
+    def extract_to_parquet(self, batch_size: int = 50000, num_workers: int = 4) -> str:
+        """
+        대용량 데이터를 Parquet 데이터셋(디렉토리)으로 추출
+        추출 기간을 num_workers개 시간 구간으로 나누어 구간별 COPY를 병렬 실행하고
+        구간마다 part-XXX.parquet 파일 하나를 기록 (파일 병합 없이 pyarrow.dataset으로 읽음)
+        """
         
-        # 2. 배치 크기 조정
-        if estimated_memory > max_memory_mb:
-            adjusted_batch_size = min(batch_size, int(batch_size * max_memory_mb / estimated_memory))
-            logger.warning(f"메모리 제한으로 배치 크기 조정: {batch_size} → {adjusted_batch_size}")
-            batch_size = adjusted_batch_size
+        logger.info("=== DRT Features Parquet 추출 시작 ===")
         
-        # 3. 출력 파일 경로
+        # 1. 출력 경로 (part 파일 디렉토리)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(self.output_dir, f"drt_features_{timestamp}.csv")
+        output_path = os.path.join(self.output_dir, f"drt_features_{timestamp}")
+        os.makedirs(output_path, exist_ok=True)
         
-        # 4. 배치별 처리
-        total_batches = (total_records + batch_size - 1) // batch_size
-        processed_records = 0
+        estimated_records = self.estimate_record_count()
         
-        logger.info(f"배치 크기: {batch_size:,}")
-        logger.info(f"총 배치 수: {total_batches}")
-        logger.info(f"출력 파일: {output_file}")
+        logger.info(f"예상 레코드 수 (플래너 추정): {estimated_records:,}")
+        logger.info(f"배치 크기: {batch_size:,}, 워커 수: {num_workers}")
+        logger.info(f"출력 경로: {output_path}")
         
-        # 첫 번째 배치로 헤더 생성
-        first_batch = True
+        # 2. 시간 구간 분할 (양 끝 포함, 구간 경계는 1µs 간격으로 겹치지 않게)
+        period_start, period_end = pd.Timestamp(PERIOD_START), pd.Timestamp(PERIOD_END)
+        bounds = [period_start + (period_end - period_start) * k / num_workers for k in range(num_workers + 1)]
+        windows = [
+            (bounds[k], bounds[k + 1] - pd.Timedelta(microseconds=1) if k < num_workers - 1 else period_end)
+            for k in range(num_workers)
+        ]
         
-        for batch_num in range(total_batches):
-            offset = batch_num * batch_size
-            
-            logger.info(f"배치 {batch_num + 1}/{total_batches} 처리 중... (offset: {offset:,})")
+        # 3. 구간별 병렬 추출 (COPY 및 CSV 파싱은 GIL 해제 구간이라 스레드로 충분)
+        processed_records = 0
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = {
+                executor.submit(
+                    self._copy_window_to_parquet, window_start, window_end,
+                    os.path.join(output_path, f"part-{k:03d}.parquet"), batch_size
+                ): (k, window_start, window_end)
+                for k, (window_start, window_end) in enumerate(windows)
+            }
             
-            try:
-                # 배치 데이터 추출
-                batch_df = self.extract_batch(offset, batch_size)
-                
-                if batch_df.empty:
-                    logger.warning(f"배치 {batch_num + 1}이 비어있음")
-                    break
-                
-                # 🔄 시간순 정렬 추가 (recorded_at, stop_id 기준)
-                batch_df = batch_df.sort_values(by=['recorded_at', 'stop_id'])
-                logger.info(f"  → 배치 정렬 완료: {len(batch_df):,}개 레코드")
-                
-                # CSV 파일에 추가
-                mode = 'w' if first_batch else 'a'
-                header = first_batch
+            for future in as_completed(futures):
+                k, window_start, window_end = futures[future]
+                try:
+                    part_records = future.result()
+                except Exception as e:
+                    logger.error(f"구간 {k} ({window_start} ~ {window_end}) 추출 실패: {e}")
+                    raise
                 
-                batch_df.to_csv(output_file, mode=mode, header=header, index=False)
-                
-                processed_records += len(batch_df)
-                first_batch = False
-                
-                logger.info(f"  → {len(batch_df):,}개 레코드 처리 완료 (누적: {processed_records:,})")
-                
-                # 메모리 정리
-                del batch_df
-                
-            except Exception as e:
-                logger.error(f"배치 {batch_num + 1} 처리 실패: {e}")
-                raise
+                processed_records += part_records
+                progress = f", 약 {processed_records / estimated_records:.0%}" if estimated_records else ""
+                logger.info(f"구간 {k}: {part_records:,}개 레코드 완료 (누적: {processed_records:,}{progress})")
         
-        # 5. 최종 검증
+        # 4. 최종 검증
         logger.info("=== 추출 완료 ===")
         logger.info(f"총 처리된 레코드: {processed_records:,}")
-        logger.info(f"출력 파일: {output_file}")
+        logger.info(f"출력 경로: {output_path}")
         
         # 파일 크기 확인
-        file_size_mb = os.path.getsize(output_file) / (1024**2)
-        logger.info(f"파일 크기: {file_size_mb:.1f} MB")
+        total_size_mb = sum(
+            os.path.getsize(os.path.join(output_path, name)) for name in os.listdir(output_path)
+        ) / (1024**2)
+        logger.info(f"전체 크기: {total_size_mb:.1f} MB")
         
-        return output_file
+        return output_path
+    
+    def extract_signal_grid(self, itersize: int = 50000):
+        """
+        (시간, 정류장) → drt_probability 격자를 DB에서 집계하여 바로 생성
+        원본 행 대신 date_trunc('hour') + GROUP BY 결과만 전송하고,
+        server-side cursor로 스트리밍하여 미리 할당한 (T, N, 1) 배열에 기록
+        (같은 시간대에 여러 행이 있으면 평균값 사용)
+        """
+        logger.info("=== DRT 신호 격자 DB 집계 추출 시작 ===")
+        
+        stops_query = """
+        SELECT bs.stop_id, bs.stop_name, bs.latitude, bs.longitude
+        FROM bus_stops bs
+        WHERE bs.latitude IS NOT NULL
+        AND bs.longitude IS NOT NULL
+        AND EXISTS (
+            SELECT 1 FROM drt_features_mstgcn df
+            WHERE df.stop_id = bs.stop_id
+            AND df.recorded_at >= %s
+            AND df.recorded_at <= %s
+        )
+        ORDER BY bs.stop_id
+        """
+        
+        grid_query = """
+        SELECT
+            date_trunc('hour', df.recorded_at) AS ts,
+            df.stop_id,
+            AVG(df.drt_probability) AS p
+        FROM drt_features_mstgcn df
+        JOIN bus_stops bs ON df.stop_id = bs.stop_id
+        WHERE bs.latitude IS NOT NULL
+        AND bs.longitude IS NOT NULL
+        AND df.recorded_at >= %s
+        AND df.recorded_at <= %s
+        GROUP BY 1, 2
+        """
+        
+        try:
+            with psycopg2.connect(**self.db_config) as conn:
+                stops_df = pd.read_sql(stops_query, conn, params=[PERIOD_START, PERIOD_END])
+                # stop_id → 노드 인덱스 (stops_df 순서의 카테고리 코드)
+                stop_dtype = pd.CategoricalDtype(categories=stops_df['stop_id'])
+                
+                time_range = pd.date_range(
+                    start=pd.Timestamp(PERIOD_START).floor('h'),
+                    end=pd.Timestamp(PERIOD_END).floor('h'),
+                    freq='h'
+                )
+                start = time_range[0].to_datetime64()
+                
+                logger.info(f"정류장 수: {len(stops_df):,}, 시간 단계: {len(time_range):,}")
+                
+                graph_signal_matrix = np.zeros((len(time_range), len(stops_df), 1), dtype=np.float32)
+                processed_rows = 0
+                
+                with conn.cursor(name='drt_stream') as cur:
+                    cur.itersize = itersize
+                    cur.execute(grid_query, [PERIOD_START, PERIOD_END])
+                    
+                    while True:
+                        rows = cur.fetchmany(itersize)
+                        if not rows:
+                            break
+                        
+                        # 행 tuple을 컬럼별로 풀어 타입을 지정해 바로 배열화 (DataFrame 타입 추론 생략)
+                        ts_col, stop_col, p_col = zip(*rows)
+                        time_idx = ((pd.to_datetime(ts_col).to_numpy() - start) // np.timedelta64(1, 'h')).astype(np.int64)
+                        stop_idx = pd.Categorical(stop_col, dtype=stop_dtype).codes.astype(np.int32)
+                        graph_signal_matrix[time_idx, stop_idx, 0] = np.asarray(p_col, dtype=np.float32)
+                        
+                        processed_rows += len(rows)
+                        logger.info(f"  → 누적 {processed_rows:,}개 (시간, 정류장) 셀 기록")
+                        del ts_col, stop_col, p_col, rows
+            
+            logger.info(f"신호 격자 shape: {graph_signal_matrix.shape}")
+            return graph_signal_matrix, stops_df, time_range
+            
+        except Exception as e:
+            logger.error(f"신호 격자 추출 실패: {e}")
+            raise
     
     def extract_sample(self, sample_size: int = 10000) -> str:
         """샘플 데이터 추출 (테스트용)"""
@@ -213,9 +313,9 @@ class DRTDataExtractor:
             
             # 출력 파일
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_file = os.path.join(self.output_dir, f"drt_features_sample_{timestamp}.csv")
+            output_file = os.path.join(self.output_dir, f"drt_features_sample_{timestamp}.parquet")
             
-            df.to_csv(output_file, index=False)
+            df.to_parquet(output_file, index=False)
             
             logger.info(f"샘플 파일 생성: {output_file}")
             logger.info(f"레코드 수: {len(df):,}")
@@ -244,6 +344,19 @@ def main():
     
     try:
         # 명령행 인자 확인
+        if len(sys.argv) > 1 and sys.argv[1] == 'grid':
+            # DB 집계 격자를 바로 MST-GCN NPZ로 저장
+            from create_mstgcn_data import create_adjacency_matrix, save_mstgcn_format
+            
+            graph_signal_matrix, stops_df, time_range = extractor.extract_signal_grid()
+            adj_matrix = create_adjacency_matrix(stops_df, threshold=5.0)
+            data_file, _, _ = save_mstgcn_format(
+                graph_signal_matrix, adj_matrix, stops_df, time_range, extractor.output_dir
+            )
+            print(f"\n✅ 추출 완료!")
+            print(f"출력 파일: {data_file}")
+            return
+        
         if len(sys.argv) > 1 and sys.argv[1] == 'sample':
             # 샘플 추출
             sample_size = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
@@ -251,13 +364,13 @@ def main():
         else:
             # 전체 데이터 추출
             batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
-            output_file = extractor.extract_to_csv(batch_size)
+            output_file = extractor.extract_to_parquet(batch_size)
         
         print(f"\n✅ 추출 완료!")
         print(f"출력 파일: {output_file}")
         
         # 간단한 통계 출력
-        df_sample = pd.read_csv(output_file, nrows=1000)
+        df_sample = next(ds.dataset(output_file, format='parquet').to_batches(batch_size=1000)).to_pandas()
         print(f"\n📊 데이터 미리보기:")
         print(df_sample.head())
         print(f"\n📋 데이터 정보:")
@@ -2,10 +2,21 @@
 # data_preparation/final_mstgcn_data.py
 # 최종 MST-GCN 데이터 생성
 
-import pandas as pd
 import numpy as np
 import os
 import json
+from numpy.lib.stride_tricks import sliding_window_view
+
+from create_mstgcn_data import (
+    create_adjacency_matrix,
+    create_graph_signal_matrix_from_file,
+    save_npy_arrays,
+    load_adjacency_file,
+    load_graph_signal_file,
+    normalize,
+    save_sparse_adjacency
+)
+from mstgcn_preprocessor import mean_std
 
 def create_simple_mstgcn_data():
     """간단한 MST-GCN 데이터 생성"""
@@ -13,67 +24,15 @@ def create_simple_mstgcn_data():
     # 큰 데이터셋 로드
     csv_file = '/Users/leekyoungsoo/teamProject/DDF-ASTGCN/data/processed/gapyeong_drt_full.csv'
     print("Loading full dataset...")
-    df = pd.read_csv(csv_file)
-    print(f"Loaded {len(df)} records")
-    
-    # 정류장 정보 추출
-    stops_df = df[['stop_id', 'stop_name', 'latitude', 'longitude']].drop_duplicates().reset_index(drop=True)
-    print(f"Found {len(stops_df)} unique stops")
-    
-    # 정류장 ID to 인덱스 매핑
-    stop_to_idx = {stop_id: idx for idx, stop_id in enumerate(stops_df['stop_id'])}
-    
-    # 시간 범위 생성
-    df['recorded_at'] = pd.to_datetime(df['recorded_at'])
-    time_range = pd.date_range(
-        start=df['recorded_at'].min(),
-        end=df['recorded_at'].max(),
-        freq='h'  # 'H' 대신 'h' 사용
-    )
-    print(f"Time range: {time_range[0]} to {time_range[-1]} ({len(time_range)} steps)")
-    
-    # 그래프 신호 행렬 초기화 (T, N, F)
-    num_timesteps = len(time_range)
-    num_nodes = len(stops_df)
-    num_features = 1
-    
-    graph_signal_matrix = np.zeros((num_timesteps, num_nodes, num_features))
-    
-    # 데이터 채우기
-    print("Filling graph signal matrix...")
-    for _, row in df.iterrows():
-        stop_idx = stop_to_idx[row['stop_id']]
-        time_idx = (row['recorded_at'] - time_range[0]).total_seconds() // 3600
-        time_idx = int(time_idx)
-        
-        if 0 <= time_idx < num_timesteps:
-            graph_signal_matrix[time_idx, stop_idx, 0] = row['drt_probability']
     
-    print(f"Graph signal matrix shape: {graph_signal_matrix.shape}")
+    # 그래프 신호 행렬 생성 (T, N, F, 청크 단위 스트리밍, CSV/Parquet 모두 지원)
+    graph_signal_matrix, stops_df, time_range = create_graph_signal_matrix_from_file(csv_file)
+    num_timesteps, num_nodes, num_features = graph_signal_matrix.shape
     
     # 간단한 인접 행렬 (가까운 거리의 정류장들 연결)
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        R = 6371
-        lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
-        c = 2 * np.arcsin(np.sqrt(a))
-        return R * c
-    
     print("Creating adjacency matrix...")
-    adj_matrix = np.zeros((num_nodes, num_nodes))
     threshold = 3.0  # 3km 이내
-    
-    for i in range(num_nodes):
-        for j in range(i+1, num_nodes):
-            dist = haversine_distance(
-                stops_df.iloc[i]['latitude'], stops_df.iloc[i]['longitude'],
-                stops_df.iloc[j]['latitude'], stops_df.iloc[j]['longitude']
-            )
-            if dist <= threshold:
-                adj_matrix[i, j] = 1
-                adj_matrix[j, i] = 1
+    adj_matrix = create_adjacency_matrix(stops_df, threshold=threshold)
     
     print(f"Adjacency matrix density: {np.sum(adj_matrix) / (adj_matrix.shape[0] * adj_matrix.shape[1]):.4f}")
     
@@ -82,13 +41,19 @@ def create_simple_mstgcn_data():
     
     # 1. NPZ 파일로 저장
     data_file = os.path.join(output_dir, 'gapyeong_drt_full.npz')
-    np.savez_compressed(
+    np.savez(
         data_file,
         data=graph_signal_matrix,
         adj_matrix=adj_matrix
     )
     print(f"Saved NPZ file: {data_file}")
     
+    # 배열별 .npy (mmap 로드용)
+    save_npy_arrays(data_file, graph_signal_matrix, adj_matrix)
+    
+    # 희소 인접 행렬 (CSR) 별도 저장
+    save_sparse_adjacency(adj_matrix, os.path.join(output_dir, 'gapyeong_drt_full_adj_sparse.npz'))
+    
     # 2. 메타데이터 저장
     metadata = {
         'num_nodes': num_nodes,
@@ -115,28 +80,20 @@ def simple_preprocessing(data_file, num_of_hours=6, num_for_predict=1):
     print(f"\\nSimple preprocessing with {num_of_hours} hours history -> {num_for_predict} hours prediction")
     
     # 데이터 로드
-    data = np.load(data_file)
-    graph_signal = data['data']  # (T, N, F)
-    adj_matrix = data['adj_matrix']
+    # .npy가 있으면 mmap으로 열어 sliding view가 복사 없이 필요한 페이지만 읽음
+    graph_signal = load_graph_signal_file(data_file)  # (T, N, F), float32
+    adj_matrix = load_adjacency_file(data_file)
     
     print(f"Data shape: {graph_signal.shape}")
     
-    samples_x = []
-    samples_y = []
-    
-    # 슬라이딩 윈도우로 샘플 생성
-    for i in range(num_of_hours, graph_signal.shape[0] - num_for_predict + 1):
-        # 입력: (num_of_hours, N, F) -> (N, F, num_of_hours)
-        x = graph_signal[i-num_of_hours:i].transpose(1, 2, 0)
-        # 타겟: (num_for_predict, N, F) -> (N, num_for_predict)
-        y = graph_signal[i:i+num_for_predict, :, 0]
-        
-        samples_x.append(x)
-        samples_y.append(y)
+    # 슬라이딩 윈도우로 샘플 생성 (복사 없는 view, 정규화 시점에 처음 복사됨)
+    num_samples = graph_signal.shape[0] - num_of_hours - num_for_predict + 1
     
-    # 배열로 변환
-    X = np.array(samples_x)  # (B, N, F, T)
-    Y = np.array(samples_y)  # (B, N, T_pred)
+    # 입력: 샘플 b = graph_signal[b:b+num_of_hours] -> (N, F, num_of_hours)
+    X = sliding_window_view(graph_signal, num_of_hours, axis=0)[:num_samples]  # (B, N, F, T)
+    # 타겟: graph_signal[b+num_of_hours : b+num_of_hours+num_for_predict, :, 0] -> (num_for_predict, N)
+    Y = sliding_window_view(graph_signal[:, :, 0], num_for_predict, axis=0)[num_of_hours:num_of_hours + num_samples]
+    Y = Y.transpose(0, 2, 1)  # (B, T_pred, N)
     
     print(f"Generated {len(X)} samples")
     print(f"X shape: {X.shape}, Y shape: {Y.shape}")
@@ -153,13 +110,12 @@ def simple_preprocessing(data_file, num_of_hours=6, num_for_predict=1):
     X_test = X[train_size+val_size:]
     Y_test = Y[train_size+val_size:]
     
-    # 정규화
-    mean = X_train.mean()
-    std = X_train.std()
+    # 정규화 (X는 읽기 전용 sliding view이므로 분할별로 float32 복사본 1개씩 생성)
+    mean, std = mean_std(X_train)
     
-    X_train_norm = (X_train - mean) / std
-    X_val_norm = (X_val - mean) / std
-    X_test_norm = (X_test - mean) / std
+    X_train_norm = normalize(X_train, mean, std)
+    X_val_norm = normalize(X_val, mean, std)
+    X_test_norm = normalize(X_test, mean, std)
     
     print(f"Train: {X_train_norm.shape}, {Y_train.shape}")
     print(f"Val: {X_val_norm.shape}, {Y_val.shape}")
@@ -167,7 +123,8 @@ def simple_preprocessing(data_file, num_of_hours=6, num_for_predict=1):
     
     # 저장
     output_file = data_file.replace('.npz', f'_processed_h{num_of_hours}_p{num_for_predict}.npz')
-    np.savez_compressed(
+    # 비압축 저장 (압축 시 단일 스레드 zlib이 병목, 키 구성은 동일하여 기존 로더 호환)
+    np.savez(
         output_file,
         train_x=X_train_norm, train_target=Y_train,
         val_x=X_val_norm, val_target=Y_val,
@@ -6,17 +6,27 @@ import pandas as pd
 import numpy as np
 import psycopg2
 import os
+import io
 import logging
 from datetime import datetime, timedelta
-import networkx as nx
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics.pairwise import haversine_distances
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
 import pickle
 
+from numba_utils import NUMBA_AVAILABLE, BALLTREE_MIN_NODES, radius_pairs
+
+if NUMBA_AVAILABLE:
+    from numba_utils import build_adj_pairs
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+CSV_SLAB_TIMESTEPS = 256  # CSV 저장 시 한 번에 DataFrame으로 만드는 시간 구간 길이
+
+
 class ASTGCNDataBuilder:
     def __init__(self, db_config):
         self.db_config = db_config
@@ -42,7 +52,10 @@ class ASTGCNDataBuilder:
         logger.info("Database connection closed")
     
     def get_active_stops_mapping(self):
-        """활성 정류장 매핑 정보 구축"""
+        """
+        활성 정류장 매핑 정보 구축
+        stop_index: 쿼리 순서 기준 정류장 ID Index (get_indexer로 ID 배열 → 노드 인덱스 일괄 변환)
+        """
         logger.info("Building active stops mapping...")
         
         # DRT features에서 실제 사용된 정류장만 추출
@@ -57,48 +70,49 @@ class ASTGCNDataBuilder:
         self.cur.execute(query)
         results = self.cur.fetchall()
         
-        stops_info = {}
-        stop_id_to_index = {}
-        
-        for idx, (stop_id, stop_name, lat, lon) in enumerate(results):
-            stops_info[stop_id] = {
-                'index': idx,
-                'name': stop_name,
-                'lat': float(lat),
-                'lon': float(lon)
-            }
-            stop_id_to_index[stop_id] = idx
+        # 컬럼별로 타입을 지정해 DataFrame 구성 (행 단위 타입 추론 생략)
+        stop_ids, names, lats, lons = zip(*results) if results else ((), (), (), ())
+        stops_df = pd.DataFrame({
+            'stop_id': np.asarray(stop_ids, dtype=object),
+            'name': np.asarray(names, dtype=object),
+            'lat': np.asarray(lats, dtype=np.float64),
+            'lon': np.asarray(lons, dtype=np.float64)
+        })
+        stop_index = pd.Index(stops_df['stop_id'])
+        
+        # 메타데이터/CSV 저장용 정류장 정보 (인덱스는 쿼리 순서)
+        stops_info = {
+            stop_id: {'index': idx, 'name': name, 'lat': lat, 'lon': lon}
+            for idx, (stop_id, name, lat, lon) in enumerate(
+                zip(stop_index, stops_df['name'], stops_df['lat'].to_numpy(copy=False), stops_df['lon'].to_numpy(copy=False))
+            )
+        }
             
         logger.info(f"Found {len(stops_info)} active stops")
-        return stops_info, stop_id_to_index
+        return stops_info, stop_index
     
     def build_adjacency_matrix(self, stops_info, method='distance', threshold=5.0):
-        """인접 행렬 구축"""
+        """인접 행렬 구축 (희소 CSR, 대칭)"""
         logger.info(f"Building adjacency matrix using {method} method...")
         
         num_stops = len(stops_info)
-        adj_matrix = np.zeros((num_stops, num_stops))
+        rows = cols = np.empty(0, dtype=np.int64)
         
-        # 좌표 배열 생성
-        coords = []
-        stop_ids = list(stops_info.keys())
-        
-        for stop_id in stop_ids:
-            lat = stops_info[stop_id]['lat']
-            lon = stops_info[stop_id]['lon']
-            coords.append([np.radians(lat), np.radians(lon)])
-        
-        coords = np.array(coords)
+        # 좌표 배열 생성 (위도/경도 각각 연속 float32 배열, km 단위 임계값에는 float32 정밀도로 충분)
+        lat = np.radians(np.fromiter((info['lat'] for info in stops_info.values()), dtype=np.float32, count=num_stops))
+        lon = np.radians(np.fromiter((info['lon'] for info in stops_info.values()), dtype=np.float32, count=num_stops))
         
         if method == 'distance':
-            # Haversine 거리 기반 인접성
-            distances = haversine_distances(coords) * 6371  # km 단위
-            
-            # threshold km 이내의 정류장들을 연결
-            adj_matrix = (distances <= threshold).astype(float)
-            
-            # 대각선 제거 (자기 자신과의 연결 제거)
-            np.fill_diagonal(adj_matrix, 0)
+            # Haversine 거리 기반 인접성 (threshold km 이내의 정류장 쌍, 대각선 제외)
+            if num_stops >= BALLTREE_MIN_NODES:
+                # 반경 질의로 이웃만 조회 (NxN 거리 행렬 없이 O(N log N))
+                rows, cols = radius_pairs(np.column_stack((lat, lon)), threshold)
+            elif NUMBA_AVAILABLE:
+                # 거리 계산 + 임계값 비교를 병렬 루프로 처리하여 (i < j) 쌍만 반환
+                rows, cols = build_adj_pairs(lat, lon, float(threshold))
+            else:
+                distances = haversine_distances(np.column_stack((lat, lon))) * 6371  # km 단위
+                rows, cols = np.nonzero(np.triu(distances <= threshold, k=1))
             
         elif method == 'route_based':
             # 노선 기반 인접성 (같은 노선을 공유하는 정류장들)
@@ -113,12 +127,20 @@ class ASTGCNDataBuilder:
             self.cur.execute(route_query)
             route_connections = self.cur.fetchall()
             
-            for stop1, stop2, route_id in route_connections:
-                if stop1 in stops_info and stop2 in stops_info:
-                    idx1 = stops_info[stop1]['index']
-                    idx2 = stops_info[stop2]['index']
-                    adj_matrix[idx1, idx2] = 1
-                    adj_matrix[idx2, idx1] = 1
+            pairs = [
+                (stops_info[stop1]['index'], stops_info[stop2]['index'])
+                for stop1, stop2, route_id in route_connections
+                if stop1 in stops_info and stop2 in stops_info
+            ]
+            if pairs:
+                rows, cols = np.array(pairs, dtype=np.int64).T
+        
+        # (i, j), (j, i) 모두 연결한 대칭 CSR (중복 쌍은 1로 정리)
+        adj_matrix = sparse.coo_matrix(
+            (np.ones(2 * len(rows)), (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+            shape=(num_stops, num_stops)
+        ).tocsr()
+        adj_matrix.data[:] = 1.0
         
         # 연결성 확인
         connected_components = self._get_connected_components(adj_matrix)
@@ -129,8 +151,8 @@ class ASTGCNDataBuilder:
     
     def _get_connected_components(self, adj_matrix):
         """그래프의 연결 성분 수 계산"""
-        G = nx.from_numpy_array(adj_matrix)
-        return nx.number_connected_components(G)
+        n_components = connected_components(adj_matrix, directed=False, return_labels=False)
+        return n_components
     
     def extract_temporal_data(self, start_date='2024-11-01', end_date='2025-06-25', 
                              feature_type='drt_prob_normalized'):
@@ -153,21 +175,34 @@ class ASTGCNDataBuilder:
         ORDER BY df.recorded_at, df.stop_id
         """
         
-        self.cur.execute(query, (start_date, end_date))
-        results = self.cur.fetchall()
-        
-        # DataFrame으로 변환
-        df = pd.DataFrame(results, columns=[
-            'stop_id', 'recorded_at', 'hour_of_day', 'day_of_week',
-            'is_weekend', 'boarding_count', 'alighting_count', 
-            'feature_value', 'is_operational'
-        ])
+        # COPY (SELECT ...) TO STDOUT으로 결과를 CSV 스트림으로 받아 바로 DataFrame 구성
+        # (fetchall의 행별 tuple 생성 없이, 컬럼 타입을 미리 지정해 추론 생략)
+        select_sql = self.cur.mogrify(query, (start_date, end_date)).decode()
+        buf = io.BytesIO()
+        self.cur.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH (FORMAT CSV, HEADER)", buf)
+        buf.seek(0)
+        
+        df = pd.read_csv(
+            buf,
+            dtype={
+                'stop_id': str,
+                'hour_of_day': np.int16,
+                'day_of_week': np.int16,
+                'boarding_count': np.float32,
+                'alighting_count': np.float32,
+                'feature_value': np.float32
+            },
+            parse_dates=['recorded_at'],
+            # PostgreSQL boolean CSV 표기 (t/f)
+            true_values=['t'],
+            false_values=['f']
+        )
         
         logger.info(f"Extracted {len(df)} records")
         return df
     
-    def create_graph_signal_matrix(self, df, stops_info, stop_id_to_index):
-        """그래프 신호 행렬 생성 (N x F x T)"""
+    def create_graph_signal_matrix(self, df, stops_info, stop_index):
+        """그래프 신호 행렬 생성 (T x N x F, 저장 형식과 동일한 순서로 바로 할당)"""
         logger.info("Creating graph signal matrix...")
         
         # 시간 인덱스 생성
@@ -183,42 +218,49 @@ class ASTGCNDataBuilder:
         num_timesteps = len(time_range)
         
         # 초기화
-        graph_signal_matrix = np.zeros((num_nodes, num_features, num_timesteps))
+        graph_signal_matrix = np.zeros((num_timesteps, num_nodes, num_features), dtype=np.float32)
         
-        # 데이터 채우기
-        for _, row in df.iterrows():
-            stop_id = row['stop_id']
-            if stop_id in stop_id_to_index:
-                node_idx = stop_id_to_index[stop_id]
-                time_idx = (row['recorded_at'] - time_range[0]).total_seconds() // 3600
-                time_idx = int(time_idx)
-                
-                if 0 <= time_idx < num_timesteps:
-                    graph_signal_matrix[node_idx, 0, time_idx] = row['feature_value']
+        # 데이터 채우기 (행 단위 루프 대신 인덱스 배열로 한 번에 scatter)
+        # 정류장 ID → 노드 인덱스는 해시 조회 한 번 (매핑에 없는 정류장은 -1)
+        node_idx = stop_index.get_indexer(df['stop_id'])
+        time_idx = ((df['recorded_at'] - time_range[0]).dt.total_seconds() // 3600).to_numpy()
+
+        valid = (node_idx >= 0) & (time_idx >= 0) & (time_idx < num_timesteps)
+
+        graph_signal_matrix[
+            time_idx[valid].astype(np.int64), node_idx[valid], 0
+        ] = df['feature_value'].to_numpy()[valid]
         
         logger.info(f"Graph signal matrix shape: {graph_signal_matrix.shape}")
         return graph_signal_matrix, time_range
     
     def save_for_mstgcn(self, graph_signal_matrix, adj_matrix, stops_info, time_range, 
-                       output_dir='data/processed'):
-        """MST-GCN 형식으로 데이터 저장"""
+                       output_dir='data/processed', timeseries_format='parquet'):
+        """
+        MST-GCN 형식으로 데이터 저장
+        timeseries_format: 분석용 시계열 파일 형식 ('parquet' 기본, 'csv'는 호환용)
+        """
         logger.info("Saving data for MST-GCN...")
         
         os.makedirs(output_dir, exist_ok=True)
         
         # 1. Graph signal matrix 저장 (npz 형식)
+        # 인접 행렬은 dense NxN 대신 CSR 구성 배열(adj_data/adj_indices/adj_indptr/adj_shape)로 저장
         data_file = os.path.join(output_dir, 'gapyeong_drt_data.npz')
         np.savez_compressed(
             data_file,
-            data=graph_signal_matrix.transpose(2, 0, 1),  # (T, N, F) 형식으로 변환
-            adj_matrix=adj_matrix
+            data=graph_signal_matrix,  # (T, N, F)
+            adj_data=adj_matrix.data,
+            adj_indices=adj_matrix.indices,
+            adj_indptr=adj_matrix.indptr,
+            adj_shape=np.array(adj_matrix.shape)
         )
         
         # 2. 메타데이터 저장
         metadata = {
             'num_nodes': len(stops_info),
-            'num_features': graph_signal_matrix.shape[1],
-            'num_timesteps': graph_signal_matrix.shape[2],
+            'num_features': graph_signal_matrix.shape[2],
+            'num_timesteps': graph_signal_matrix.shape[0],
             'time_range': {
                 'start': str(time_range[0]),
                 'end': str(time_range[-1]),
@@ -232,47 +274,87 @@ class ASTGCNDataBuilder:
         with open(metadata_file, 'wb') as f:
             pickle.dump(metadata, f)
         
-        # 3. CSV 형식으로도 저장 (분석용)
-        csv_file = os.path.join(output_dir, 'gapyeong_drt_timeseries.csv')
-        self._save_as_csv(graph_signal_matrix, stops_info, time_range, csv_file)
+        # 3. 시계열 long-form 파일로도 저장 (분석용)
+        if timeseries_format == 'csv':
+            timeseries_file = os.path.join(output_dir, 'gapyeong_drt_timeseries.csv')
+            self._save_as_csv(graph_signal_matrix, stops_info, time_range, timeseries_file)
+        else:
+            timeseries_file = os.path.join(output_dir, 'gapyeong_drt_timeseries.parquet')
+            self._save_as_parquet(graph_signal_matrix, stops_info, time_range, timeseries_file)
         
         logger.info(f"Data saved to {output_dir}")
         logger.info(f"- NPZ file: {data_file}")
         logger.info(f"- Metadata: {metadata_file}")
-        logger.info(f"- CSV file: {csv_file}")
+        logger.info(f"- Timeseries file: {timeseries_file}")
         
-        return data_file, metadata_file, csv_file
+        return data_file, metadata_file, timeseries_file
+    
+    def _save_as_parquet(self, graph_signal_matrix, stops_info, time_range, parquet_file):
+        """시계열 데이터를 Parquet로 저장 (정류장 ID/이름은 dictionary 인코딩, 값은 float32)"""
+        df = self._build_timeseries_frame(graph_signal_matrix, stops_info, time_range)
+        df['stop_id'] = df['stop_id'].astype('category')
+        df['stop_name'] = df['stop_name'].astype('category')
+        df.to_parquet(parquet_file, engine='pyarrow', compression='zstd', index=False)
+        logger.info(f"Parquet saved with {len(df)} records")
     
     def _save_as_csv(self, graph_signal_matrix, stops_info, time_range, csv_file):
-        """시계열 데이터를 CSV로 저장"""
-        data_list = []
-        
-        stop_ids = list(stops_info.keys())
-        
-        for t_idx, timestamp in enumerate(time_range):
-            for stop_id in stop_ids:
-                node_idx = stops_info[stop_id]['index']
-                drt_prob = graph_signal_matrix[node_idx, 0, t_idx]
-                
-                data_list.append({
-                    'timestamp': timestamp,
-                    'stop_id': stop_id,
-                    'stop_name': stops_info[stop_id]['name'],
-                    'latitude': stops_info[stop_id]['lat'],
-                    'longitude': stops_info[stop_id]['lon'],
-                    'drt_probability': drt_prob,
-                    'hour_of_day': timestamp.hour,
-                    'day_of_week': timestamp.weekday(),
-                    'is_weekend': timestamp.weekday() >= 5
-                })
-        
-        df = pd.DataFrame(data_list)
-        df.to_csv(csv_file, index=False)
-        logger.info(f"CSV saved with {len(df)} records")
+        """
+        시계열 데이터를 CSV로 저장
+        CSV_SLAB_TIMESTEPS 시간 구간씩 DataFrame을 만들어 이어 쓰기 (메모리 사용량이 구간 크기로 제한)
+        """
+        num_records = 0
+        with open(csv_file, 'w', newline='') as f:
+            for t_start in range(0, len(time_range), CSV_SLAB_TIMESTEPS):
+                df = self._build_timeseries_frame(
+                    graph_signal_matrix, stops_info, time_range,
+                    t_start, t_start + CSV_SLAB_TIMESTEPS
+                )
+                df.to_csv(f, header=(t_start == 0), index=False)
+                num_records += len(df)
+        logger.info(f"CSV saved with {num_records} records")
+    
+    def _build_timeseries_frame(self, graph_signal_matrix, stops_info, time_range,
+                                t_start=0, t_end=None):
+        """
+        시계열 long-form DataFrame 구성 (시간 순 → 정류장 순, 행 단위 dict 생성 없이 배열로 구성)
+        t_start, t_end: 시간 인덱스 구간 (기본값은 전체)
+        """
+        stop_ids = np.array(list(stops_info.keys()), dtype=object)
+        stop_idx_arr = np.array([stops_info[s]['index'] for s in stop_ids], dtype=np.int64)
+        stop_names = np.array([stops_info[s]['name'] for s in stop_ids], dtype=object)
+        stop_lats = np.array([stops_info[s]['lat'] for s in stop_ids])
+        stop_lons = np.array([stops_info[s]['lon'] for s in stop_ids])
+
+        time_range = time_range[t_start:t_end]
+        num_stops = len(stop_ids)
+        num_timesteps = len(time_range)
+
+        # (T, N) 순서로 펼쳐 기존 행 순서(시간 바깥, 정류장 안쪽) 유지
+        values = graph_signal_matrix[t_start:t_end, stop_idx_arr, 0]
+        timestamps = pd.DatetimeIndex(np.repeat(time_range.to_numpy(copy=False), num_stops))
+
+        # 달력 컬럼은 시간 단위(T개)로 한 번만 계산 후 정류장 수만큼 반복
+        ti = pd.DatetimeIndex(time_range)
+        hours = ti.hour.to_numpy(dtype=np.int8)
+        dow = ti.weekday.to_numpy(dtype=np.int8)
+        weekend = dow >= 5
+
+        df = pd.DataFrame({
+            'timestamp': timestamps,
+            'stop_id': np.tile(stop_ids, num_timesteps),
+            'stop_name': np.tile(stop_names, num_timesteps),
+            'latitude': np.tile(stop_lats, num_timesteps),
+            'longitude': np.tile(stop_lons, num_timesteps),
+            'drt_probability': values.ravel(),
+            'hour_of_day': np.repeat(hours, num_stops),
+            'day_of_week': np.repeat(dow, num_stops),
+            'is_weekend': np.repeat(weekend, num_stops)
+        })
+        return df
     
     def build_complete_dataset(self, start_date='2024-11-01', end_date='2025-06-25',
                               adjacency_method='distance', distance_threshold=5.0,
-                              output_dir='data/processed'):
+                              output_dir='data/processed', timeseries_format='parquet'):
         """완전한 MST-GCN 데이터셋 구축"""
         logger.info("Building complete MST-GCN dataset...")
         
@@ -280,7 +362,7 @@ class ASTGCNDataBuilder:
             self.connect_db()
             
             # 1. 활성 정류장 매핑
-            stops_info, stop_id_to_index = self.get_active_stops_mapping()
+            stops_info, stop_index = self.get_active_stops_mapping()
             
             # 2. 인접 행렬 구축
             adj_matrix = self.build_adjacency_matrix(
@@ -294,12 +376,13 @@ class ASTGCNDataBuilder:
             
             # 4. 그래프 신호 행렬 생성
             graph_signal_matrix, time_range = self.create_graph_signal_matrix(
-                temporal_df, stops_info, stop_id_to_index
+                temporal_df, stops_info, stop_index
             )
             
             # 5. MST-GCN 형식으로 저장
-            data_file, metadata_file, csv_file = self.save_for_mstgcn(
-                graph_signal_matrix, adj_matrix, stops_info, time_range, output_dir
+            data_file, metadata_file, timeseries_file = self.save_for_mstgcn(
+                graph_signal_matrix, adj_matrix, stops_info, time_range, output_dir,
+                timeseries_format=timeseries_format
             )
             
             # 6. 데이터 통계 출력
@@ -308,10 +391,10 @@ class ASTGCNDataBuilder:
             return {
                 'data_file': data_file,
                 'metadata_file': metadata_file,
-                'csv_file': csv_file,
+                'timeseries_file': timeseries_file,
                 'num_nodes': len(stops_info),
                 'num_timesteps': len(time_range),
-                'adjacency_density': np.sum(adj_matrix) / (adj_matrix.shape[0] * adj_matrix.shape[1])
+                'adjacency_density': adj_matrix.nnz / (adj_matrix.shape[0] * adj_matrix.shape[1])
             }
             
         finally:
@@ -325,7 +408,7 @@ class ASTGCNDataBuilder:
         logger.info(f"- Time range: {time_range[0]} to {time_range[-1]}")
         logger.info(f"- Graph signal matrix shape: {graph_signal_matrix.shape}")
         logger.info(f"- Adjacency matrix shape: {adj_matrix.shape}")
-        logger.info(f"- Adjacency matrix density: {np.sum(adj_matrix) / (adj_matrix.shape[0] * adj_matrix.shape[1]):.4f}")
+        logger.info(f"- Adjacency matrix density: {adj_matrix.nnz / (adj_matrix.shape[0] * adj_matrix.shape[1]):.4f}")
         logger.info(f"- DRT probability range: [{np.min(graph_signal_matrix):.4f}, {np.max(graph_signal_matrix):.4f}]")
         logger.info(f"- Non-zero values: {np.count_nonzero(graph_signal_matrix)} / {graph_signal_matrix.size}")
 
@@ -350,7 +433,8 @@ def main():
         end_date='2025-06-25',
         adjacency_method='distance',  # 'distance' or 'route_based'
         distance_threshold=5.0,  # km
-        output_dir='data/processed'
+        output_dir='data/processed',
+        timeseries_format='parquet'  # 'parquet' or 'csv'
     )
     
     logger.info("Dataset building completed!")
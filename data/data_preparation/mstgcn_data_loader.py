@@ -3,14 +3,27 @@
 
 import pandas as pd
 import numpy as np
-import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import logging
 import os
+import io
 import gc
+import hashlib
+import threading
 from typing import Dict, List, Tuple, Optional
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.metrics.pairwise import haversine_distances
+from scipy import sparse
 import pickle
+
+from numba_utils import NUMBA_AVAILABLE, BALLTREE_MIN_NODES, radius_pairs, warmup as warmup_numba_kernels
+
+if NUMBA_AVAILABLE:
+    from numba_utils import build_adj_pairs
+
 try:
     from dateutil.relativedelta import relativedelta
 except ImportError:
@@ -23,48 +36,63 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+POOL_MAX_CONNECTIONS = 8
+MONTH_WORKERS = 4  # 월별 처리 병렬 스레드 수 (DB 조회와 NumPy 연산이 겹치도록)
+
 class MSTGCN_DataLoader:
     """MST-GCN 모델을 위한 4개 피처 데이터 로더"""
     
     def __init__(self, db_config: Dict):
         self.db_config = db_config
-        self.conn = None
-        self.cur = None
+        self.pool = None
+        # 정류장 집합별 인접 행렬 캐시 (월마다 정류장 좌표는 동일하므로 재계산 생략)
+        self._adj_cache: Dict[str, sparse.csr_matrix] = {}
+        self._adj_lock = threading.Lock()
         
     def connect_db(self):
-        """DB 연결"""
+        """DB 커넥션 풀 생성 (여러 스레드가 쿼리 단위로 커넥션을 빌려 사용)"""
         try:
-            self.conn = psycopg2.connect(**self.db_config)
-            self.cur = self.conn.cursor()
-            logger.info("Database connected successfully")
+            self.pool = ThreadedConnectionPool(1, POOL_MAX_CONNECTIONS, **self.db_config)
+            logger.info("Database connection pool created successfully")
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
             
     def close_db(self):
-        """DB 연결 종료"""
-        if self.cur:
-            self.cur.close()
-        if self.conn:
-            self.conn.close()
+        """DB 커넥션 풀 종료"""
+        if self.pool:
+            self.pool.closeall()
         logger.info("Database connection closed")
     
+    @contextmanager
+    def _cursor(self):
+        """풀에서 커넥션을 빌려 커서 제공 (쿼리 후 즉시 반납, 긴 NumPy 연산 중 커넥션 점유 X)"""
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                yield cur
+            conn.rollback()  # 읽기 전용 트랜잭션 종료
+        finally:
+            self.pool.putconn(conn)
+    
     def load_mstgcn_features(self, start_date: Optional[str] = None, 
                             end_date: Optional[str] = None) -> Tuple[np.ndarray, List[str], pd.DatetimeIndex]:
         """
         MST-GCN 4개 피처 데이터 로딩
         
         Returns:
-            feature_matrix: (4, N, T) shape의 피처 행렬
+            feature_matrix: (5, N, T) shape의 피처 행렬 (float32, 4개 입력 + 1개 타겟)
             stop_ids: 정류장 ID 리스트
             time_index: 시간 인덱스
         """
         logger.info("Loading MST-GCN features from database...")
         
-        # 날짜 필터 조건
+        # 날짜 필터 조건 (값은 문자열에 넣지 않고 파라미터로 바인딩)
         date_filter = ""
+        params = ()
         if start_date and end_date:
-            date_filter = f"AND recorded_at >= '{start_date}' AND recorded_at <= '{end_date}'"
+            date_filter = "AND recorded_at >= %s AND recorded_at <= %s"
+            params = (start_date, end_date)
         
         # 4개 입력 피처 + DRT 확률 (타겟) 조회 (Log+Z-score 정규화 적용)
         query = f"""
@@ -78,62 +106,62 @@ class MSTGCN_DataLoader:
             drt_probability
         FROM drt_features_mstgcn 
         WHERE 1=1 {date_filter}
-        ORDER BY recorded_at, stop_id;
+        ORDER BY recorded_at, stop_id
         """
         
-        self.cur.execute(query)
-        results = self.cur.fetchall()
+        # COPY (SELECT ...) TO STDOUT으로 결과를 CSV 스트림으로 받아 바로 DataFrame 구성
+        # (fetchall의 행별 tuple 생성 없이, 컬럼 타입을 미리 지정해 추론 생략)
+        buf = io.BytesIO()
+        with self._cursor() as cur:
+            select_sql = cur.mogrify(query, params).decode()
+            cur.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH (FORMAT CSV, HEADER)", buf)
+        buf.seek(0)
+        
+        df = pd.read_csv(
+            buf,
+            dtype={
+                'stop_id': str,
+                'normalized_log_boarding_count': np.float32,
+                'service_availability': np.float32,
+                'is_rest_day_int': np.float32,
+                'normalized_interval': np.float32,
+                'drt_probability': np.float32
+            },
+            parse_dates=['recorded_at']
+        )
         
-        if not results:
+        if df.empty:
             raise ValueError("No MST-GCN features found in database")
         
-        # DataFrame으로 변환
-        df = pd.DataFrame(results, columns=[
-            'stop_id', 'recorded_at', 'normalized_log_boarding_count', 
-            'service_availability', 'is_rest_day_int', 'normalized_interval', 'drt_probability'
-        ])
-        
-        df['recorded_at'] = pd.to_datetime(df['recorded_at'])
-        
         logger.info(f"Loaded {len(df)} feature records")
         
-        # 피벗 테이블 생성 (각 피처별)
-        pivot_features = {}
-        feature_names = ['normalized_log_boarding_count', 'service_availability', 
+        # 4개 입력 피처 + DRT 확률 (타겟)
+        feature_names = ['normalized_log_boarding_count', 'service_availability',
                         'is_rest_day_int', 'normalized_interval']
-        
-        for feature in feature_names:
-            pivot_features[feature] = df.pivot_table(
-                index='stop_id', 
-                columns='recorded_at', 
-                values=feature, 
-                fill_value=0
-            )
-        
-        # DRT 확률 (타겟)
-        pivot_features['drt_probability'] = df.pivot_table(
-            index='stop_id', 
-            columns='recorded_at', 
-            values='drt_probability', 
-            fill_value=0
+        columns = feature_names + ['drt_probability']
+
+        # (stop_id, recorded_at) 키로 한 번만 그룹핑 후 시간 축을 펼침
+        # (중복 키는 pivot_table 기본값과 동일하게 평균, 빈 칸은 0)
+        wide = (
+            df.groupby(['stop_id', 'recorded_at'], sort=True)[columns]
+            .mean()
+            .unstack('recorded_at', fill_value=0)
         )
-        
-        # 모든 피처가 같은 shape인지 확인
-        shapes = [pivot_features[f].shape for f in feature_names + ['drt_probability']]
-        if not all(s == shapes[0] for s in shapes):
-            raise ValueError("Feature matrices have inconsistent shapes")
-        
+
+        num_stops = len(wide.index)
+        num_times = wide.shape[1] // len(columns)
+
         # Feature matrix 구성: (5, N, T) - 4개 입력 피처 + 1개 타겟
-        feature_matrix = np.stack([
-            pivot_features['normalized_log_boarding_count'].values,
-            pivot_features['service_availability'].values, 
-            pivot_features['is_rest_day_int'].values,
-            pivot_features['normalized_interval'].values,
-            pivot_features['drt_probability'].values  # 타겟
-        ])
-        
-        stop_ids = pivot_features['normalized_log_boarding_count'].index.tolist()
-        time_index = pivot_features['normalized_log_boarding_count'].columns
+        # unstack 결과 컬럼은 (피처, 시간) 순이므로 reshape 한 번으로 분리
+        # float32로 유지 (이후 시퀀스 텐서/저장 파일 크기 절반)
+        feature_matrix = (
+            wide.to_numpy(dtype=np.float32, copy=False)
+            .reshape(num_stops, len(columns), num_times)
+            .transpose(1, 0, 2)
+        )
+
+        stop_ids = wide.index.tolist()
+        time_index = pd.DatetimeIndex(wide.columns.get_level_values('recorded_at')[:num_times])
         
         logger.info(f"Feature matrix shape: {feature_matrix.shape}")
         logger.info(f"Number of stops: {len(stop_ids)}")
@@ -141,7 +169,7 @@ class MSTGCN_DataLoader:
         
         return feature_matrix, stop_ids, time_index
     
-    def load_adjacency_matrix(self, stop_ids: List[str], threshold_km: float = 1.0) -> np.ndarray:
+    def load_adjacency_matrix(self, stop_ids: List[str], threshold_km: float = 1.0) -> sparse.csr_matrix:
         """
         정류장 인접 행렬 생성
         
@@ -150,47 +178,91 @@ class MSTGCN_DataLoader:
             threshold_km: 인접성 판정 거리 임계값 (km)
             
         Returns:
-            adj_matrix: (N, N) 인접 행렬
+            adj_matrix: (N, N) 인접 행렬 (희소 CSR, 대칭)
         """
         logger.info(f"Building adjacency matrix for {len(stop_ids)} stops...")
         
-        # 정류장 좌표 조회
-        stop_ids_str = "','".join(stop_ids)
-        query = f"""
+        # 정류장 좌표 조회 (stop_ids를 배열 파라미터 하나로 전달 → 쿼리 텍스트가 고정되어 plan 재사용)
+        query = """
         SELECT stop_id, latitude, longitude
-        FROM bus_stops 
-        WHERE stop_id IN ('{stop_ids_str}')
+        FROM bus_stops
+        WHERE stop_id = ANY(%s)
         AND latitude IS NOT NULL AND longitude IS NOT NULL
-        ORDER BY ARRAY_POSITION(ARRAY['{stop_ids_str}']::text[], stop_id);
         """
         
-        self.cur.execute(query)
-        coords_data = self.cur.fetchall()
-        
-        if len(coords_data) != len(stop_ids):
-            logger.warning(f"Coordinate mismatch: {len(coords_data)} vs {len(stop_ids)}")
-        
-        # 좌표 배열 생성
-        coords = []
-        for stop_id, lat, lon in coords_data:
-            coords.append([np.radians(float(lat)), np.radians(float(lon))])
-        
-        coords = np.array(coords)
-        
-        # Haversine 거리 계산
-        distances = haversine_distances(coords) * 6371  # km 단위
-        
-        # 임계값 기반 인접 행렬 생성
-        adj_matrix = (distances <= threshold_km).astype(float)
-        np.fill_diagonal(adj_matrix, 0)  # 자기 자신 제거
+        with self._cursor() as cur:
+            cur.execute(query, (list(stop_ids),))
+            coords_by_id = {stop_id: (lat, lon) for stop_id, lat, lon in cur.fetchall()}
+        
+        if len(coords_by_id) != len(stop_ids):
+            logger.warning(f"Coordinate mismatch: {len(coords_by_id)} vs {len(stop_ids)}")
+        
+        # 좌표 배열 생성 (stop_ids 순서대로 클라이언트에서 정렬)
+        # 위도/경도 각각 연속 float32 배열 (km 단위 임계값에는 float32 정밀도로 충분)
+        coords = np.radians(np.array(
+            [coords_by_id[stop_id] for stop_id in stop_ids if stop_id in coords_by_id],
+            dtype=np.float32
+        ).reshape(-1, 2))
+        lat = np.ascontiguousarray(coords[:, 0])
+        lon = np.ascontiguousarray(coords[:, 1])
+        
+        # 임계값 이내 정류장 쌍 (i < j, 자기 자신 제외)
+        if len(coords) >= BALLTREE_MIN_NODES:
+            # 반경 질의로 이웃만 조회 (NxN 거리 행렬 없이 O(N log N))
+            rows, cols = radius_pairs(coords, threshold_km)
+        elif NUMBA_AVAILABLE:
+            # 거리 계산 + 임계값 비교를 병렬 루프로 처리하여 쌍만 반환
+            rows, cols = build_adj_pairs(lat, lon, float(threshold_km))
+        else:
+            distances = haversine_distances(coords) * 6371  # km 단위
+            rows, cols = np.nonzero(np.triu(distances <= threshold_km, k=1))
+        
+        # 대칭 CSR 인접 행렬 생성
+        num_nodes = len(coords)
+        adj_matrix = sparse.csr_matrix(
+            (np.ones(2 * len(rows), dtype=np.float32), (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+            shape=(num_nodes, num_nodes)
+        )
         
-        edge_count = np.sum(adj_matrix) / 2
-        avg_degree = np.sum(adj_matrix, axis=1).mean()
+        edge_count = adj_matrix.nnz / 2
+        avg_degree = np.diff(adj_matrix.indptr).mean()
         
         logger.info(f"Adjacency matrix: {adj_matrix.shape}, edges: {edge_count}, avg degree: {avg_degree:.2f}")
         
         return adj_matrix
     
+    def get_adjacency_matrix(self, stop_ids: List[str], threshold_km: float = 1.0,
+                             cache_dir: Optional[str] = None) -> sparse.csr_matrix:
+        """
+        정류장 집합별로 캐시된 인접 행렬 조회 (메모리 → 파일 → 새로 계산 순)
+        활성 정류장 집합이 바뀐 달에만 load_adjacency_matrix로 다시 계산
+        cache_dir을 지정한 경우에만 파일 캐시 사용 (키에 좌표가 포함되지 않으므로
+        bus_stops 좌표가 수정되면 해당 캐시 파일을 직접 삭제해야 함)
+        """
+        # 정류장 순서/임계값이 같으면 같은 키 (실행 간에도 동일하도록 hashlib 사용)
+        key = hashlib.sha1(
+            f"{threshold_km}|".encode() + "\n".join(map(str, stop_ids)).encode()
+        ).hexdigest()[:16]
+        
+        # 동시에 여러 달이 같은 인접 행렬을 계산하지 않도록 잠금
+        with self._adj_lock:
+            if key in self._adj_cache:
+                logger.info(f"Adjacency matrix cache hit: {key}")
+                return self._adj_cache[key]
+            
+            cache_file = os.path.join(cache_dir, f"adj_cache_{key}.npz") if cache_dir else None
+            if cache_file and os.path.exists(cache_file):
+                logger.info(f"Loading cached adjacency matrix: {cache_file}")
+                adj_matrix = sparse.load_npz(cache_file).tocsr()
+            else:
+                adj_matrix = self.load_adjacency_matrix(stop_ids, threshold_km)
+                if cache_file:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    sparse.save_npz(cache_file, adj_matrix)
+            
+            self._adj_cache[key] = adj_matrix
+            return adj_matrix
+    
     def create_multi_scale_sequences(self, feature_matrix: np.ndarray, 
                                    hour_len: int = 6, day_len: int = 24, week_len: int = 24,
                                    output_len: int = 24, week_offset: int = 168) -> Tuple[np.ndarray, ...]:
@@ -214,35 +286,33 @@ class MSTGCN_DataLoader:
         input_features = feature_matrix[:4, :, :]  # (4, N, T)
         target_feature = feature_matrix[4, :, :]   # (N, T) - DRT 확률
         
-        X_hour, X_day, X_week, y = [], [], [], []
+        # 샘플 i ∈ [week_offset, T - output_len] 에 대해 각 스케일 구간을
+        # 복사 없는 sliding window view에서 시작 위치만 잘라 선택
+        num_samples = max(input_features.shape[2] - output_len - week_offset + 1, 0)
         
-        for i in range(week_offset, input_features.shape[2] - output_len + 1):
-            # Recent pattern (최근 6시간)
-            hour_slice = input_features[:, :, i-hour_len:i]
-            X_hour.append(hour_slice)
-            
-            # Daily pattern (과거 24시간)
-            day_slice = input_features[:, :, i-day_len:i]
-            X_day.append(day_slice)
-            
-            # Weekly pattern (1주일 전 24시간)
-            week_slice = input_features[:, :, i-week_offset:i-week_offset+week_len]
-            X_week.append(week_slice)
-            
-            # Target (다음 24시간 DRT 확률)
-            y_slice = target_feature[:, i:i+output_len]
-            y.append(y_slice)
+        def windows(array, length, first_start):
+            # array[..., s:s+length] (s = first_start ... first_start + num_samples - 1)
+            view = sliding_window_view(array, length, axis=-1)
+            return view[..., first_start:first_start + num_samples, :]
+        
+        # Recent pattern (최근 6시간): input[:, :, i-hour_len:i]
+        X_hour = windows(input_features, hour_len, week_offset - hour_len)
+        
+        # Daily pattern (과거 24시간): input[:, :, i-day_len:i]
+        X_day = windows(input_features, day_len, week_offset - day_len)
+        
+        # Weekly pattern (1주일 전 24시간): input[:, :, i-week_offset:i-week_offset+week_len]
+        X_week = windows(input_features, week_len, 0)
         
-        # Numpy 배열로 변환
-        X_hour = np.array(X_hour)  # (samples, features, nodes, time)
-        X_day = np.array(X_day)
-        X_week = np.array(X_week)
-        y = np.array(y)  # (samples, nodes, time)
+        # Target (다음 24시간 DRT 확률): target[:, i:i+output_len]
+        y = windows(target_feature, output_len, week_offset)
         
-        # MST-GCN 입력 형태로 변환: (samples, nodes, features, time)
-        X_hour = X_hour.transpose(0, 2, 1, 3)
-        X_day = X_day.transpose(0, 2, 1, 3)
-        X_week = X_week.transpose(0, 2, 1, 3)
+        # MST-GCN 입력 형태로 변환: (features, nodes, samples, time) -> (samples, nodes, features, time)
+        # 텐서별로 이 시점에 한 번만 복사
+        X_hour = X_hour.transpose(2, 1, 0, 3).copy()
+        X_day = X_day.transpose(2, 1, 0, 3).copy()
+        X_week = X_week.transpose(2, 1, 0, 3).copy()
+        y = y.transpose(1, 0, 2).copy()  # (samples, nodes, time)
         
         logger.info(f"Multi-scale sequences created:")
         logger.info(f"  X_hour: {X_hour.shape}")
@@ -253,16 +323,17 @@ class MSTGCN_DataLoader:
         return X_hour, X_day, X_week, y
     
     def save_mstgcn_data(self, save_path: str, feature_matrix: np.ndarray, 
-                        stop_ids: List[str], adj_matrix: np.ndarray,
+                        stop_ids: List[str], adj_matrix: sparse.csr_matrix,
                         X_hour: np.ndarray, X_day: np.ndarray, X_week: np.ndarray, y: np.ndarray):
         """MST-GCN 학습 데이터 저장"""
         logger.info(f"Saving MST-GCN data to {save_path}")
         
+        # 학습 노트북이 adj_matrix 키를 dense (N, N)로 읽으므로 저장 시점에만 변환
         np.savez_compressed(
             save_path,
             feature_matrix=feature_matrix,
             stop_ids=np.array(stop_ids),
-            adj_matrix=adj_matrix,
+            adj_matrix=adj_matrix.toarray(),
             X_hour=X_hour,
             X_day=X_day,
             X_week=X_week,
@@ -271,9 +342,47 @@ class MSTGCN_DataLoader:
         
         logger.info("MST-GCN data saved successfully")
 
+def process_month(loader: MSTGCN_DataLoader, period_start: datetime, period_end: datetime,
+                  save_dir: str) -> Optional[str]:
+    """한 달 기간의 MST-GCN 데이터셋 생성 및 저장 (스레드 작업 단위)"""
+    month_label = period_start.strftime('%Y-%m')
+    logger.info(f"===== Processing data for {month_label} =====")
+    
+    try:
+        # 데이터 로딩
+        feature_matrix, stop_ids, time_index = loader.load_mstgcn_features(
+            start_date=period_start.strftime('%Y-%m-%d'), 
+            end_date=period_end.strftime('%Y-%m-%d')
+        )
+        
+        if feature_matrix.size == 0:
+            logger.warning(f"No data found for {month_label}. Skipping.")
+            return None
+
+        # 정류장 집합이 이전 달과 같으면 캐시된 인접 행렬 재사용
+        adj_matrix = loader.get_adjacency_matrix(stop_ids)
+        
+        # 다중 스케일 시퀀스 생성
+        X_hour, X_day, X_week, y = loader.create_multi_scale_sequences(feature_matrix)
+        
+        # 데이터 저장
+        save_path = os.path.join(save_dir, f"mstgcn_data_{period_start.strftime('%Y_%m')}.npz")
+        loader.save_mstgcn_data(save_path, feature_matrix, stop_ids, adj_matrix, X_hour, X_day, X_week, y)
+        
+        print(f"✅ MST-GCN 데이터 저장 완료: {save_path}")
+        return save_path
+
+    except ValueError as ve:
+        logger.error(f"Skipping {month_label} due to ValueError: {ve}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred for {month_label}: {e}")
+    finally:
+        gc.collect() # 메모리 관리
+    return None
+
 def main():
     """월별로 MST-GCN 데이터셋을 생성하고 저장하는 메인 함수"""
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(threadName)s - %(levelname)s - %(message)s')
     
     db_config = {
         'host': 'localhost',
@@ -287,56 +396,31 @@ def main():
     
     start_date = datetime(2024, 11, 1)
     end_date = datetime(2025, 6, 25)
+    
+    save_dir = "/Users/leekyoungsoo/teamProject/DDF-ASTGCN/data/processed/monthly"
+    os.makedirs(save_dir, exist_ok=True)
+    
+    # 처리할 월 기간 목록 (전체 기간을 넘지 않도록)
+    periods = []
     current_date = start_date
+    while current_date <= end_date:
+        month_start = current_date.replace(day=1)
+        month_end = month_start + relativedelta(months=1) - timedelta(days=1)
+        periods.append((max(month_start, start_date), min(month_end, end_date)))
+        current_date = month_start + relativedelta(months=1)
     
     try:
         loader.connect_db()
         
-        while current_date <= end_date:
-            # 월의 시작일과 마지막일 계산
-            month_start = current_date.replace(day=1)
-            month_end = month_start + relativedelta(months=1) - timedelta(days=1)
-            
-            # 데이터 기간 설정 (전체 기간을 넘지 않도록)
-            period_start = max(month_start, start_date)
-            period_end = min(month_end, end_date)
-            
-            logger.info(f"===== Processing data for {period_start.strftime('%Y-%m')} =====")
-            
-            try:
-                # 데이터 로딩
-                feature_matrix, stop_ids, time_index = loader.load_mstgcn_features(
-                    start_date=period_start.strftime('%Y-%m-%d'), 
-                    end_date=period_end.strftime('%Y-%m-%d')
-                )
-                
-                if feature_matrix.size == 0:
-                    logger.warning(f"No data found for {period_start.strftime('%Y-%m')}. Skipping.")
-                    current_date += relativedelta(months=1)
-                    continue
-
-                adj_matrix = loader.load_adjacency_matrix(stop_ids)
-                
-                # 다중 스케일 시퀀스 생성
-                X_hour, X_day, X_week, y = loader.create_multi_scale_sequences(feature_matrix)
-                
-                # 데이터 저장
-                save_dir = "/Users/leekyoungsoo/teamProject/DDF-ASTGCN/data/processed/monthly"
-                os.makedirs(save_dir, exist_ok=True)
-                save_path = os.path.join(save_dir, f"mstgcn_data_{period_start.strftime('%Y_%m')}.npz")
-                
-                loader.save_mstgcn_data(save_path, feature_matrix, stop_ids, adj_matrix, X_hour, X_day, X_week, y)
-                
-                print(f"✅ MST-GCN 데이터 저장 완료: {save_path}")
-
-            except ValueError as ve:
-                logger.error(f"Skipping {period_start.strftime('%Y-%m')} due to ValueError: {ve}")
-            except Exception as e:
-                logger.error(f"An unexpected error occurred for {period_start.strftime('%Y-%m')}: {e}")
-
-            # 다음 달로 이동
-            current_date = month_start + relativedelta(months=1)
-            gc.collect() # 메모리 관리
+        # 월별 스레드 시작 전에 numba 커널 컴파일/캐시 로드 (첫 달 작업에서 JIT 지연 제거)
+        warmup_numba_kernels()
+        
+        # 월별 작업을 스레드 풀에서 병렬 실행 (각 작업은 풀에서 커넥션을 빌려 조회)
+        with ThreadPoolExecutor(max_workers=MONTH_WORKERS) as executor:
+            list(executor.map(
+                lambda period: process_month(loader, period[0], period[1], save_dir),
+                periods
+            ))
 
     except Exception as e:
         logger.error(f"Main process failed: {e}")
@@ -344,4 +428,4 @@ def main():
         loader.close_db()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -4,6 +4,54 @@
 
 import numpy as np
 import os
+import json
+
+STATS_CHUNK_SIZE = 256  # 평균/표준편차 계산 시 한 번에 읽는 샘플 수
+
+# numba를 선택적으로 import (없으면 같은 함수를 일반 Python으로 실행)
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def _sample_index_arrays(label_start_idx, num_of_weeks, num_of_days, num_of_hours, points_per_hour):
+    """
+    한 샘플의 주간/일간/시간 패턴 시점 인덱스 배열 (과거 구간이 없는 패턴은 길이 0)
+    Python 객체 없이 미리 할당한 정수 배열에만 기록 (numba JIT 대상)
+    """
+    week_idx = np.empty(num_of_weeks, np.int64)
+    num_weeks = 0
+    for w in range(num_of_weeks):
+        idx = label_start_idx - (w + 1) * 7 * 24 * points_per_hour
+        if idx >= 0:
+            week_idx[num_weeks] = idx
+            num_weeks += 1
+    
+    day_idx = np.empty(num_of_days, np.int64)
+    num_days = 0
+    for d in range(num_of_days):
+        idx = label_start_idx - (d + 1) * 24 * points_per_hour
+        if idx >= 0:
+            day_idx[num_days] = idx
+            num_days += 1
+    
+    hour_start = label_start_idx - num_of_hours
+    if hour_start >= 0:
+        hour_idx = np.arange(hour_start, label_start_idx)
+    else:
+        hour_idx = np.empty(0, np.int64)
+    
+    return week_idx[:num_weeks], day_idx[:num_days], hour_idx
+
 
 def get_sample_indices(data_sequence, num_of_weeks, num_of_days, num_of_hours, 
                       label_start_idx, num_for_predict, points_per_hour=1):
@@ -13,117 +61,212 @@ def get_sample_indices(data_sequence, num_of_weeks, num_of_days, num_of_hours,
     if label_start_idx + num_for_predict > data_sequence.shape[0]:
         return week_sample, day_sample, hour_sample, None
     
+    week_idx, day_idx, hour_idx = _sample_index_arrays(
+        label_start_idx, num_of_weeks, num_of_days, num_of_hours, points_per_hour
+    )
+    
     # 시간 패턴
-    if num_of_hours > 0:
-        hour_start = label_start_idx - num_of_hours
-        if hour_start >= 0:
-            hour_sample = data_sequence[hour_start:label_start_idx]
+    if num_of_hours > 0 and len(hour_idx) > 0:
+        hour_sample = data_sequence[hour_idx]
     
     # 일간 패턴 (24시간 간격으로 추출)
-    if num_of_days > 0:
-        day_samples = []
-        for d in range(num_of_days):
-            day_idx = label_start_idx - (d + 1) * 24 * points_per_hour
-            if day_idx >= 0:
-                day_samples.append(data_sequence[day_idx:day_idx + 1])
-        if day_samples:
-            day_sample = np.concatenate(day_samples, axis=0)
+    if num_of_days > 0 and len(day_idx) > 0:
+        day_sample = data_sequence[day_idx]
     
     # 주간 패턴 (7일 간격으로 추출)
-    if num_of_weeks > 0:
-        week_samples = []
-        for w in range(num_of_weeks):
-            week_idx = label_start_idx - (w + 1) * 7 * 24 * points_per_hour
-            if week_idx >= 0:
-                week_samples.append(data_sequence[week_idx:week_idx + 1])
-        if week_samples:
-            week_sample = np.concatenate(week_samples, axis=0)
+    if num_of_weeks > 0 and len(week_idx) > 0:
+        week_sample = data_sequence[week_idx]
     
     target = data_sequence[label_start_idx:label_start_idx + num_for_predict]
     
     return week_sample, day_sample, hour_sample, target
 
 
+def build_lag_indices(num_timesteps, num_of_weeks, num_of_days, num_of_hours,
+                      num_for_predict, points_per_hour=1):
+    """
+    전체 샘플의 입력/타겟 시점 인덱스를 한 번에 계산 (get_sample_indices의 벡터화 버전)
+    반환: lag_idx (S, T_total) - 주간 → 일간 → 시간 순 입력 시점, target_idx (S, num_for_predict)
+    주간 패턴은 주당 1개 시점 (create_mstgcn_data.build_sample_indices는 패턴별 배열 목록 + 주당 7개 시점)
+    """
+    day_len = 24 * points_per_hour
+    week_len = 7 * day_len
+    
+    # label_start_idx 기준 상대 오프셋 (get_sample_indices와 동일한 순서)
+    week_offsets = -np.arange(1, num_of_weeks + 1) * week_len
+    day_offsets = -np.arange(1, num_of_days + 1) * day_len
+    hour_offsets = np.arange(-num_of_hours, 0)
+    offsets = np.concatenate([week_offsets, day_offsets, hour_offsets]).astype(np.int64)
+    
+    # 모든 패턴의 과거 구간이 확보되는 시점부터 샘플 생성
+    min_history = int(-offsets.min()) if len(offsets) else 0
+    label_idx = np.arange(min_history, num_timesteps - num_for_predict + 1)
+    
+    lag_idx = label_idx[:, None] + offsets[None, :]
+    target_idx = label_idx[:, None] + np.arange(num_for_predict)[None, :]
+    
+    return lag_idx, target_idx
+
+
+@njit(parallel=True, cache=True)
+def _assemble_samples(data_seq, lag_idx, target_idx, x_out, y_out):
+    """
+    샘플별 입력/타겟을 미리 할당된 버퍼에 기록 (샘플 단위로 독립이므로 prange로 병렬화)
+    x_out: (S, N, F, T_total), y_out: (S, N, T_pred)
+    """
+    for i in prange(lag_idx.shape[0]):
+        for t in range(lag_idx.shape[1]):
+            x_out[i, :, :, t] = data_seq[lag_idx[i, t]]
+        for step in range(target_idx.shape[1]):
+            y_out[i, :, step] = data_seq[target_idx[i, step], :, 0]
+
+
+def load_graph_signal(npz_file):
+    """
+    NPZ의 그래프 신호 행렬을 float32로 로드 (uint8 양자화 저장 시 scale 곱으로 복원)
+    create_mstgcn_data.save_mstgcn_format(quantize=True) 출력도 원래 값 범위로 읽음
+    """
+    data = npz_file['data']
+    if 'scale' in npz_file.files:
+        return data.astype(np.float32) * npz_file['scale'].astype(np.float32)
+    return data.astype(np.float32, copy=False)
+
+
+def mean_std(x, chunk_size=STATS_CHUNK_SIZE):
+    """
+    전체 평균/표준편차를 샘플 축 청크 단위로 계산 (청크별 통계를 Chan 공식으로 병합)
+    전체 크기의 float64 임시 배열 없이 float64 정밀도 유지 (view 입력도 가능)
+    """
+    count, mean, m2 = 0, 0.0, 0.0
+    for start in range(0, x.shape[0], chunk_size):
+        chunk = np.asarray(x[start:start + chunk_size], dtype=np.float64)
+        n = chunk.size
+        if n == 0:
+            continue
+        chunk_mean = chunk.mean()
+        chunk_m2 = np.square(chunk - chunk_mean).sum()
+        
+        delta = chunk_mean - mean
+        total = count + n
+        mean += delta * n / total
+        m2 += chunk_m2 + delta**2 * count * n / total
+        count = total
+    
+    std = np.sqrt(m2 / count) if count else 0.0
+    return np.float32(mean), np.float32(std)
+
+
+def save_split_bins(filename, all_data):
+    """
+    split별 x/target을 연속 float32 원시 파일({filename}_{split}_{key}.bin)로 저장
+    shape/dtype/정규화 통계는 {filename}_bins.json에 함께 기록 (load_split_bins로 memmap 로드)
+    """
+    meta = {
+        'dtype': 'float32',
+        'mean': float(all_data['stats']['_mean']),
+        'std': float(all_data['stats']['_std']),
+        'shapes': {}
+    }
+    for split in ('train', 'val', 'test'):
+        for key in ('x', 'target'):
+            arr = np.ascontiguousarray(all_data[split][key], dtype=np.float32)
+            arr.tofile(f"{filename}_{split}_{key}.bin")
+            meta['shapes'][f"{split}_{key}"] = list(arr.shape)
+    
+    with open(f"{filename}_bins.json", 'w') as f:
+        json.dump(meta, f)
+
+
+def load_split_bins(filename):
+    """
+    save_split_bins로 저장한 .bin 파일을 np.memmap으로 로드 (압축 해제/dtype 변환/복사 없음)
+    반환: ({'train_x': memmap, ...}, mean, std), 캐시가 없거나 같은 이름의 .npz보다 오래되었으면 None
+    (bins를 쓰지 않는 다른 작성자가 .npz만 다시 만든 경우 이전 bins를 읽지 않도록 함)
+    """
+    meta_path = f"{filename}_bins.json"
+    if not os.path.exists(meta_path):
+        return None
+    npz_path = f"{filename}.npz"
+    if os.path.exists(npz_path) and os.path.getmtime(meta_path) < os.path.getmtime(npz_path):
+        print(f"Ignoring stale bins (older than {npz_path}): {meta_path}")
+        return None
+    
+    with open(meta_path) as f:
+        meta = json.load(f)
+    
+    # mode='c' (copy-on-write): 디스크 파일은 읽기 전용으로 두고 torch.from_numpy가 쓰기 가능 배열로 취급
+    arrays = {
+        name: np.memmap(f"{filename}_{name}.bin", dtype=meta['dtype'], mode='c', shape=tuple(shape))
+        for name, shape in meta['shapes'].items()
+    }
+    return arrays, np.float32(meta['mean']), np.float32(meta['std'])
+
+
 def read_and_generate_dataset(graph_signal_matrix_filename,
                              num_of_weeks=1, num_of_days=1, num_of_hours=3,
-                             num_for_predict=1, points_per_hour=1, save=False):
-    """MST-GCN 데이터셋 생성 (수정된 버전)"""
+                             num_for_predict=1, points_per_hour=1, save=False,
+                             keep_features=None):
+    """
+    MST-GCN 데이터셋 생성 (수정된 버전)
+    keep_features: 사용할 특성 인덱스 (None이면 전체, 예: [0]이면 DRT probability만 저장)
+    """
     print(f"Loading data from: {graph_signal_matrix_filename}")
     
-    # 데이터 로드
-    data_file = np.load(graph_signal_matrix_filename, allow_pickle=True)
-    data_seq = data_file['data']  # (T, N, F)
+    # 데이터 로드 (숫자 배열만 있으므로 pickle 비허용)
+    data_file = np.load(graph_signal_matrix_filename, allow_pickle=False)
+    data_seq = np.ascontiguousarray(load_graph_signal(data_file))  # (T, N, F), 이후 연산 모두 float32
     
     print(f"Original data shape: {data_seq.shape}")
     print(f"Time steps: {data_seq.shape[0]}, Nodes: {data_seq.shape[1]}, Features: {data_seq.shape[2]}")
     
-    all_samples = []
+    # 로더가 쓰지 않는 특성은 샘플 생성 전에 제외 (저장 크기/로딩 IO 감소)
+    # 타겟은 선택된 특성 중 첫 번째 특성에서 추출
+    if keep_features is not None:
+        data_seq = np.ascontiguousarray(data_seq[:, :, keep_features])
+        print(f"Keeping features {list(keep_features)}: {data_seq.shape}")
     
-    # 샘플 생성 (더 보수적인 접근)
-    min_history = max(num_of_hours, num_of_days * 24, num_of_weeks * 7 * 24)
-    for idx in range(min_history, data_seq.shape[0] - num_for_predict + 1):
-        sample = get_sample_indices(
-            data_seq, num_of_weeks, num_of_days,
-            num_of_hours, idx, num_for_predict,
-            points_per_hour
-        )
-        
-        week_sample, day_sample, hour_sample, target = sample
-        
-        # 모든 패턴이 존재하는지 확인
-        if target is None:
-            continue
-            
-        sample_list = []
-        input_sequences = []
-        
-        # 각 패턴을 (B, N, F, T) 형태로 변환
-        if num_of_weeks > 0 and week_sample is not None:
-            # (T, N, F) -> (1, N, F, T)
-            week_sample_reshaped = week_sample.transpose(1, 2, 0)[np.newaxis, :]
-            input_sequences.append(week_sample_reshaped)
-        
-        if num_of_days > 0 and day_sample is not None:
-            day_sample_reshaped = day_sample.transpose(1, 2, 0)[np.newaxis, :]
-            input_sequences.append(day_sample_reshaped)
-        
-        if num_of_hours > 0 and hour_sample is not None:
-            hour_sample_reshaped = hour_sample.transpose(1, 2, 0)[np.newaxis, :]
-            input_sequences.append(hour_sample_reshaped)
-        
-        # 타겟: (T, N, F) -> (1, N, T)
-        target_reshaped = target.transpose(1, 2, 0)[:, 0, :][np.newaxis, :]
-        
-        if input_sequences:
-            # 입력들을 시간 축으로 연결: (1, N, F, T_total)
-            concatenated_input = np.concatenate(input_sequences, axis=3)
-            sample_list = [concatenated_input, target_reshaped]
-            all_samples.append(sample_list)
+    # 샘플 인덱스 (S, T_total)를 한 번에 계산 후 fancy indexing 한 번으로 모든 샘플 추출
+    lag_idx, target_idx = build_lag_indices(
+        data_seq.shape[0], num_of_weeks, num_of_days, num_of_hours,
+        num_for_predict, points_per_hour
+    )
+    num_samples = len(lag_idx)
     
-    print(f"Generated {len(all_samples)} samples")
+    print(f"Generated {num_samples} samples")
     
-    if len(all_samples) == 0:
+    if num_samples == 0 or lag_idx.shape[1] == 0:
         raise ValueError("No valid samples generated. Check data parameters.")
     
+    # 입력 (S, N, F, T_total) / 타겟 (S, N, T_pred) 버퍼를 한 번만 할당하고 시점별로 직접 기록
+    # (샘플별 리스트 + np.concatenate 복사 없음, train/val/test는 이 버퍼의 view)
+    num_nodes, num_features = data_seq.shape[1], data_seq.shape[2]
+    all_x = np.empty((num_samples, num_nodes, num_features, lag_idx.shape[1]), dtype=np.float32)
+    all_target = np.empty((num_samples, num_nodes, target_idx.shape[1]), dtype=np.float32)
+    if NUMBA_AVAILABLE:
+        _assemble_samples(data_seq, lag_idx, target_idx, all_x, all_target)
+    else:
+        for lag in range(lag_idx.shape[1]):
+            all_x[..., lag] = data_seq[lag_idx[:, lag]]  # (S, N, F)
+        for step in range(target_idx.shape[1]):
+            all_target[..., step] = data_seq[target_idx[:, step], :, 0]  # (S, N)
+    
     # 훈련/검증/테스트 분할 (6:2:2)
-    split_line1 = int(len(all_samples) * 0.6)
-    split_line2 = int(len(all_samples) * 0.8)
+    split_line1 = int(num_samples * 0.6)
+    split_line2 = int(num_samples * 0.8)
     
-    training_set = [np.concatenate([sample[i] for sample in all_samples[:split_line1]], axis=0) for i in range(2)]
-    validation_set = [np.concatenate([sample[i] for sample in all_samples[split_line1:split_line2]], axis=0) for i in range(2)]
-    testing_set = [np.concatenate([sample[i] for sample in all_samples[split_line2:]], axis=0) for i in range(2)]
+    train_x, train_target = all_x[:split_line1], all_target[:split_line1]
+    val_x, val_target = all_x[split_line1:split_line2], all_target[split_line1:split_line2]
+    test_x, test_target = all_x[split_line2:], all_target[split_line2:]
     
-    train_x, train_target = training_set
-    val_x, val_target = validation_set
-    test_x, test_target = testing_set
+    # 정규화 (train/val/test는 all_x의 view이므로 all_x 버퍼를 제자리에서 한 번에 정규화)
+    # float32 스칼라로 연산해 float64로 승격되지 않도록 함
+    mean, std = mean_std(train_x)
+    inv_std = np.float32(1.0) / std
     
-    # 정규화
-    mean = train_x.mean()
-    std = train_x.std()
+    all_x -= mean
+    all_x *= inv_std
     
-    train_x_norm = (train_x - mean) / std
-    val_x_norm = (val_x - mean) / std
-    test_x_norm = (test_x - mean) / std
+    train_x_norm, val_x_norm, test_x_norm = train_x, val_x, test_x
     
     all_data = {
         'train': {'x': train_x_norm, 'target': train_target},
@@ -145,14 +288,16 @@ def read_and_generate_dataset(graph_signal_matrix_filename,
         dirpath = os.path.dirname(graph_signal_matrix_filename)
         filename = os.path.join(dirpath, f"{file_name}_r{num_of_hours}_d{num_of_days}_w{num_of_weeks}_mstgcn")
         
+        # 한 번 만들고 여러 번 읽는 파일이므로 zlib 압축 없이 저장 (저장/로드 모두 압축 해제 비용 없음)
         print(f'Saving preprocessed file to: {filename}.npz')
-        np.savez_compressed(
+        np.savez(
             filename,
             train_x=all_data['train']['x'], train_target=all_data['train']['target'],
             val_x=all_data['val']['x'], val_target=all_data['val']['target'],
             test_x=all_data['test']['x'], test_target=all_data['test']['target'],
             mean=all_data['stats']['_mean'], std=all_data['stats']['_std']
         )
+        save_split_bins(filename, all_data)
     
     return all_data
 
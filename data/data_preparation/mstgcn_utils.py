@@ -9,64 +9,26 @@ import os
 import pickle
 from typing import Tuple, Optional, List
 
-def get_sample_indices(data_sequence: np.ndarray, 
-                      num_of_weeks: int, 
-                      num_of_days: int,
-                      num_of_hours: int, 
-                      label_start_idx: int,
-                      num_for_predict: int, 
-                      points_per_hour: int = 1) -> Tuple:
-    """
-    MST-GCN을 위한 샘플 인덱스 생성
-    
-    Args:
-        data_sequence: (time_steps, num_nodes, features) 형태의 데이터
-        num_of_weeks: 주간 패턴 사용할 주 수
-        num_of_days: 일간 패턴 사용할 일 수  
-        num_of_hours: 시간 패턴 사용할 시간 수
-        label_start_idx: 예측 시작 인덱스
-        num_for_predict: 예측할 시간 스텝 수
-        points_per_hour: 시간당 데이터 포인트 수 (기본 1 = 1시간 단위)
-    
-    Returns:
-        (week_sample, day_sample, hour_sample, target) 튜플
-    """
-    
-    week_sample, day_sample, hour_sample = None, None, None
-    
-    if label_start_idx + num_for_predict > data_sequence.shape[0]:
-        return week_sample, day_sample, hour_sample, None
-    
-    if num_of_hours > 0:
-        hour_start = label_start_idx - num_of_hours
-        if hour_start >= 0:
-            hour_sample = data_sequence[hour_start:label_start_idx]
-    
-    if num_of_days > 0:
-        day_start = label_start_idx - num_of_days * 24 * points_per_hour
-        if day_start >= 0:
-            day_sample = data_sequence[day_start:day_start + num_of_days * 24 * points_per_hour:24 * points_per_hour]
-    
-    if num_of_weeks > 0:
-        week_start = label_start_idx - num_of_weeks * 7 * 24 * points_per_hour
-        if week_start >= 0:
-            week_indices = []
-            for week in range(num_of_weeks):
-                start_idx = week_start + week * 7 * 24 * points_per_hour
-                week_indices.extend(range(start_idx, start_idx + 7 * 24 * points_per_hour, 24 * points_per_hour))
-            if all(idx >= 0 for idx in week_indices):
-                week_sample = data_sequence[week_indices]
-    
-    target = data_sequence[label_start_idx:label_start_idx + num_for_predict]
-    
-    return week_sample, day_sample, hour_sample, target
+# 샘플 생성/데이터셋 생성은 mstgcn_preprocessor 구현을 그대로 사용 (min_history부터 벡터화 추출)
+from mstgcn_preprocessor import (
+    get_sample_indices, build_lag_indices, read_and_generate_dataset, load_split_bins,
+    mean_std
+)
+from numba_utils import radius_pairs
+
+# 재노출(re-export)하는 전처리 함수 포함 공개 API
+__all__ = [
+    'get_sample_indices', 'build_lag_indices', 'read_and_generate_dataset',
+    'normalization', 'DeviceDataLoader', 'load_graphdata_channel1',
+    'calculate_cheb_poly', 'create_adjacency_from_csv',
+]
 
 
 def normalization(train: np.ndarray, 
                  val: np.ndarray, 
                  test: np.ndarray) -> Tuple[dict, np.ndarray, np.ndarray, np.ndarray]:
     """
-    Z-score 정규화
+    Z-score 정규화 (입력 배열을 제자리에서 정규화, 복사본을 만들지 않음)
     
     Args:
         train: 훈련 데이터
@@ -74,16 +36,19 @@ def normalization(train: np.ndarray,
         test: 테스트 데이터
     
     Returns:
-        (stats, train_norm, val_norm, test_norm)
+        (stats, train_norm, val_norm, test_norm) - *_norm은 입력 배열 자체
     """
     
-    mean = train.mean()
-    std = train.std()
+    # 평균/표준편차 (mstgcn_preprocessor.mean_std, 청크별 float64 통계 병합, float32 스칼라로 반환)
+    mean, std = mean_std(train)
+    inv_std = np.float32(1.0) / std
     
     stats = {'_mean': mean, '_std': std}
     
     def normalize_data(data):
-        return (data - mean) / std
+        data -= mean
+        data *= inv_std
+        return data
     
     train_norm = normalize_data(train)
     val_norm = normalize_data(val) 
@@ -92,134 +57,23 @@ def normalization(train: np.ndarray,
     return stats, train_norm, val_norm, test_norm
 
 
-def read_and_generate_dataset(graph_signal_matrix_filename: str,
-                             num_of_weeks: int = 1, 
-                             num_of_days: int = 1,
-                             num_of_hours: int = 3, 
-                             num_for_predict: int = 1,
-                             points_per_hour: int = 1, 
-                             save: bool = False) -> dict:
+class DeviceDataLoader:
     """
-    MST-GCN을 위한 데이터셋 생성
-    
-    Args:
-        graph_signal_matrix_filename: 그래프 신호 행렬 파일 경로 (.npz)
-        num_of_weeks: 주간 패턴 수
-        num_of_days: 일간 패턴 수
-        num_of_hours: 시간 패턴 수
-        num_for_predict: 예측할 시간 스텝 수
-        points_per_hour: 시간당 포인트 수
-        save: 전처리된 데이터 저장 여부
-    
-    Returns:
-        전처리된 데이터 딕셔너리
+    DataLoader 배치를 device로 옮겨 반환하는 래퍼 (CUDA면 pinned 배치를 non_blocking으로 전송)
     """
     
-    print(f"Loading data from: {graph_signal_matrix_filename}")
-    
-    # 데이터 로드
-    data_file = np.load(graph_signal_matrix_filename, allow_pickle=True)
-    data_seq = data_file['data']  # (T, N, F) 형태
-    
-    print(f"Original data shape: {data_seq.shape}")
-    print(f"Time steps: {data_seq.shape[0]}, Nodes: {data_seq.shape[1]}, Features: {data_seq.shape[2]}")
+    def __init__(self, loader: torch.utils.data.DataLoader, device: torch.device):
+        self.loader = loader
+        self.dataset = loader.dataset
+        self.device = device
+        self.non_blocking = loader.pin_memory
     
-    all_samples = []
+    def __iter__(self):
+        for batch in self.loader:
+            yield [t.to(self.device, non_blocking=self.non_blocking) for t in batch]
     
-    # 샘플 생성
-    for idx in range(data_seq.shape[0]):
-        sample = get_sample_indices(
-            data_seq, num_of_weeks, num_of_days,
-            num_of_hours, idx, num_for_predict,
-            points_per_hour
-        )
-        
-        if all(s is None for s in sample[:3]) or sample[3] is None:
-            continue
-            
-        week_sample, day_sample, hour_sample, target = sample
-        
-        sample_list = []
-        
-        # 주간 패턴
-        if num_of_weeks > 0 and week_sample is not None:
-            week_sample = np.expand_dims(week_sample, axis=0).transpose((0, 2, 3, 1))
-            sample_list.append(week_sample)
-        
-        # 일간 패턴  
-        if num_of_days > 0 and day_sample is not None:
-            day_sample = np.expand_dims(day_sample, axis=0).transpose((0, 2, 3, 1))
-            sample_list.append(day_sample)
-        
-        # 시간 패턴
-        if num_of_hours > 0 and hour_sample is not None:
-            hour_sample = np.expand_dims(hour_sample, axis=0).transpose((0, 2, 3, 1))
-            sample_list.append(hour_sample)
-        
-        # 타겟
-        if target is not None:
-            target = np.expand_dims(target, axis=0).transpose((0, 2, 3, 1))[:, :, 0, :]
-            sample_list.append(target)
-            
-            if len(sample_list) > 1:  # 최소한 입력과 타겟이 있어야 함
-                all_samples.append(sample_list)
-    
-    print(f"Generated {len(all_samples)} samples")
-    
-    if len(all_samples) == 0:
-        raise ValueError("No valid samples generated. Check data parameters.")
-    
-    # 훈련/검증/테스트 분할 (6:2:2)
-    split_line1 = int(len(all_samples) * 0.6)
-    split_line2 = int(len(all_samples) * 0.8)
-    
-    training_set = [np.concatenate(i, axis=0) for i in zip(*all_samples[:split_line1])]
-    validation_set = [np.concatenate(i, axis=0) for i in zip(*all_samples[split_line1:split_line2])]
-    testing_set = [np.concatenate(i, axis=0) for i in zip(*all_samples[split_line2:])]
-    
-    # 입력 특성 결합
-    train_x = np.concatenate(training_set[:-1], axis=-1)
-    val_x = np.concatenate(validation_set[:-1], axis=-1)
-    test_x = np.concatenate(testing_set[:-1], axis=-1)
-    
-    # 타겟
-    train_target = training_set[-1]
-    val_target = validation_set[-1]
-    test_target = testing_set[-1]
-    
-    # 정규화
-    (stats, train_x_norm, val_x_norm, test_x_norm) = normalization(train_x, val_x, test_x)
-    
-    all_data = {
-        'train': {'x': train_x_norm, 'target': train_target},
-        'val': {'x': val_x_norm, 'target': val_target},
-        'test': {'x': test_x_norm, 'target': test_target},
-        'stats': {'_mean': stats['_mean'], '_std': stats['_std']}
-    }
-    
-    print('Train x:', all_data['train']['x'].shape)
-    print('Train target:', all_data['train']['target'].shape)
-    print('Val x:', all_data['val']['x'].shape)
-    print('Val target:', all_data['val']['target'].shape)
-    print('Test x:', all_data['test']['x'].shape)
-    print('Test target:', all_data['test']['target'].shape)
-    
-    # 저장
-    if save:
-        file_name = os.path.basename(graph_signal_matrix_filename).split('.')[0]
-        dirpath = os.path.dirname(graph_signal_matrix_filename)
-        filename = os.path.join(dirpath, f"{file_name}_r{num_of_hours}_d{num_of_days}_w{num_of_weeks}_mstgcn")
-        
-        print(f'Saving preprocessed file to: {filename}.npz')
-        np.savez_compressed(
-            filename,
-            train_x=all_data['train']['x'], train_target=all_data['train']['target'],
-            val_x=all_data['val']['x'], val_target=all_data['val']['target'],
-            test_x=all_data['test']['x'], test_target=all_data['test']['target'],
-            mean=all_data['stats']['_mean'], std=all_data['stats']['_std']
-        )
-    
-    return all_data
+    def __len__(self):
+        return len(self.loader)
 
 
 def load_graphdata_channel1(graph_signal_matrix_filename: str, 
@@ -228,69 +82,100 @@ def load_graphdata_channel1(graph_signal_matrix_filename: str,
                            num_of_weeks: int, 
                            device: torch.device, 
                            batch_size: int, 
-                           shuffle: bool = True) -> Tuple:
+                           shuffle: bool = True,
+                           num_workers: int = 0) -> Tuple:
     """
     전처리된 그래프 데이터 로드 및 DataLoader 생성
     
+    전체 텐서는 CPU에 두고 배치 단위로 device에 전송 (반환 배치/타겟은 기존처럼 device에 위치)
+    CUDA면 DataLoader가 배치를 pinned memory에 올리고 non_blocking으로 전송
+    
     Args:
         graph_signal_matrix_filename: 원본 데이터 파일 경로
         num_of_hours: 시간 패턴 수
         num_of_days: 일간 패턴 수  
         num_of_weeks: 주간 패턴 수
-        device: PyTorch 디바이스
+        device: PyTorch 디바이스 (CUDA일 때만 pin_memory 사용)
         batch_size: 배치 크기
         shuffle: 셔플 여부
+        num_workers: DataLoader 워커 수 (기본 0, 메모리 내 TensorDataset이라 필요할 때만 지정)
     
     Returns:
         (train_loader, train_target_tensor, val_loader, val_target_tensor, 
-         test_loader, test_target_tensor, mean, std)
+         test_loader, test_target_tensor, mean, std) - loader 배치와 target 텐서는 device에 위치
     """
     
     file = os.path.basename(graph_signal_matrix_filename).split('.')[0]
     dirpath = os.path.dirname(graph_signal_matrix_filename)
-    filename = os.path.join(dirpath, f"{file}_r{num_of_hours}_d{num_of_days}_w{num_of_weeks}_mstgcn.npz")
-    
-    print(f'Loading preprocessed file: {filename}')
+    filename = os.path.join(dirpath, f"{file}_r{num_of_hours}_d{num_of_days}_w{num_of_weeks}_mstgcn")
     
-    if not os.path.exists(filename):
-        raise FileNotFoundError(f"Preprocessed file not found: {filename}")
-    
-    file_data = np.load(filename)
+    # save_split_bins로 저장한 .bin 캐시가 있으면 memmap으로 바로 사용, 없으면 npz 로드
+    cached = load_split_bins(filename)
+    if cached is not None:
+        print(f'Loading preprocessed bins: {filename}_*.bin')
+        file_data, mean, std = cached
+    else:
+        filename = f"{filename}.npz"
+        print(f'Loading preprocessed file: {filename}')
+        
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"Preprocessed file not found: {filename}")
+        
+        file_data = np.load(filename)
+        mean, std = file_data['mean'], file_data['std']
     
     train_x, train_target = file_data['train_x'], file_data['train_target']
     val_x, val_target = file_data['val_x'], file_data['val_target']
     test_x, test_target = file_data['test_x'], file_data['test_target']
-    mean, std = file_data['mean'], file_data['std']
     
-    # 첫 번째 특성만 사용 (DRT probability)
+    # 첫 번째 특성만 사용 (DRT probability), 연속 배열로 한 번만 복사
+    # (read_and_generate_dataset(keep_features=[0])로 저장하면 이 단계 생략)
     if train_x.shape[2] > 1:
         print(f"Original feature size: {train_x.shape[2]}, using the first feature.")
-        train_x = train_x[:, :, 0:1, :]
-        val_x = val_x[:, :, 0:1, :]
-        test_x = test_x[:, :, 0:1, :]
+        train_x = np.ascontiguousarray(train_x[:, :, 0:1, :])
+        val_x = np.ascontiguousarray(val_x[:, :, 0:1, :])
+        test_x = np.ascontiguousarray(test_x[:, :, 0:1, :])
         if len(mean.shape) > 0:
             mean = mean[0] if hasattr(mean, 'shape') else mean
             std = std[0] if hasattr(std, 'shape') else std
     
-    # PyTorch 텐서로 변환
-    train_x_tensor = torch.from_numpy(train_x).type(torch.FloatTensor).to(device)
-    train_target_tensor = torch.from_numpy(train_target).type(torch.FloatTensor).to(device)
+    # PyTorch 텐서로 변환 (float32 배열은 as_tensor가 복사 없이 메모리 공유, 이전 float64 파일만 변환)
+    # 전체 텐서를 미리 device로 올리지 않음 (GPU 메모리보다 큰 데이터셋도 배치 단위로 전송)
+    train_x_tensor = torch.as_tensor(train_x, dtype=torch.float32)
+    train_target_tensor = torch.as_tensor(train_target, dtype=torch.float32)
+    
+    val_x_tensor = torch.as_tensor(val_x, dtype=torch.float32)
+    val_target_tensor = torch.as_tensor(val_target, dtype=torch.float32)
     
-    val_x_tensor = torch.from_numpy(val_x).type(torch.FloatTensor).to(device)
-    val_target_tensor = torch.from_numpy(val_target).type(torch.FloatTensor).to(device)
+    test_x_tensor = torch.as_tensor(test_x, dtype=torch.float32)
+    test_target_tensor = torch.as_tensor(test_target, dtype=torch.float32)
     
-    test_x_tensor = torch.from_numpy(test_x).type(torch.FloatTensor).to(device)
-    test_target_tensor = torch.from_numpy(test_target).type(torch.FloatTensor).to(device)
+    # DataLoader 생성 (CUDA면 배치를 pinned memory에 올려 H2D 복사와 연산을 겹침)
+    loader_kwargs = {
+        'batch_size': batch_size,
+        'pin_memory': torch.device(device).type == 'cuda',
+        'num_workers': num_workers,
+        'persistent_workers': num_workers > 0,
+    }
     
-    # DataLoader 생성
     train_dataset = torch.utils.data.TensorDataset(train_x_tensor, train_target_tensor)
-    train_loader = torch.utils.data.DataLoader(train_dataset, batch_size=batch_size, shuffle=shuffle)
+    train_loader = DeviceDataLoader(
+        torch.utils.data.DataLoader(train_dataset, shuffle=shuffle, **loader_kwargs), device)
     
     val_dataset = torch.utils.data.TensorDataset(val_x_tensor, val_target_tensor)
-    val_loader = torch.utils.data.DataLoader(val_dataset, batch_size=batch_size, shuffle=False)
+    val_loader = DeviceDataLoader(
+        torch.utils.data.DataLoader(val_dataset, shuffle=False, **loader_kwargs), device)
     
     test_dataset = torch.utils.data.TensorDataset(test_x_tensor, test_target_tensor)
-    test_loader = torch.utils.data.DataLoader(test_dataset, batch_size=batch_size, shuffle=False)
+    test_loader = DeviceDataLoader(
+        torch.utils.data.DataLoader(test_dataset, shuffle=False, **loader_kwargs), device)
+    
+    # 평가용으로 반환하는 target 텐서만 device로 전송 (CUDA면 pinned 버퍼에서 비동기 복사)
+    pin = loader_kwargs['pin_memory']
+    train_target_tensor, val_target_tensor, test_target_tensor = [
+        (t.pin_memory() if pin else t).to(device, non_blocking=pin)
+        for t in (train_target_tensor, val_target_tensor, test_target_tensor)
+    ]
     
     print('Train:', train_x_tensor.size(), train_target_tensor.size())
     print('Validation:', val_x_tensor.size(), val_target_tensor.size())
@@ -314,42 +199,51 @@ def calculate_cheb_poly(adj_matrix: np.ndarray, K: int) -> List[torch.Tensor]:
     
     num_nodes = adj_matrix.shape[0]
     
+    # 희소 행렬(create_adjacency_from_csv 결과)은 고유값 계산을 위해 밀집 행렬로 변환
+    if hasattr(adj_matrix, 'toarray'):
+        adj_matrix = adj_matrix.toarray()
+    # 이후 라플라시안/고유값/점화식을 모두 연속 float32 버퍼에서 계산 (BLAS sgemm, LAPACK ssyevd)
+    adj_matrix = np.ascontiguousarray(adj_matrix, dtype=np.float32)
+    eye = np.eye(num_nodes, dtype=np.float32)
+    
     # 정규화된 라플라시안 계산
     degree = np.sum(adj_matrix, axis=1)
     degree[degree == 0] = 1  # 0으로 나누기 방지
     
-    D_inv_sqrt = np.diag(1.0 / np.sqrt(degree))
-    normalized_laplacian = np.eye(num_nodes) - D_inv_sqrt @ adj_matrix @ D_inv_sqrt
+    # D^{-1/2} A D^{-1/2}를 대각 행렬 곱 대신 행/열 스케일링으로 계산 (O(N^2))
+    d_inv_sqrt = 1.0 / np.sqrt(degree)
+    normalized_laplacian = eye - (adj_matrix * d_inv_sqrt[:, None]) * d_inv_sqrt[None, :]
     
-    # 고유값의 최대값으로 스케일링
-    eigenvalues = np.linalg.eigvals(normalized_laplacian)
-    lambda_max = np.max(eigenvalues.real)
+    # 고유값의 최대값으로 스케일링 (대칭 행렬이므로 eigvalsh, 오름차순 정렬 반환)
+    lambda_max = np.linalg.eigvalsh(normalized_laplacian)[-1]
     
     if lambda_max > 1e-8:
-        scaled_laplacian = (2.0 / lambda_max) * normalized_laplacian - np.eye(num_nodes)
+        scaled_laplacian = np.float32(2.0 / lambda_max) * normalized_laplacian - eye
     else:
         scaled_laplacian = normalized_laplacian
     
-    # 체비셰프 다항식 계산
-    cheb_polynomials = []
-    
+    # 체비셰프 다항식 계산 (NumPy float32로 점화식 계산 후 마지막에 한 번만 torch 변환)
     # T_0 = I
-    cheb_polynomials.append(torch.FloatTensor(np.eye(num_nodes)))
+    polynomials = [eye]
     
     if K > 1:
         # T_1 = L_scaled
-        cheb_polynomials.append(torch.FloatTensor(scaled_laplacian))
+        polynomials.append(scaled_laplacian)
     
-    # T_k = 2 * L_scaled * T_{k-1} - T_{k-2}
+    # T_k = 2 * L_scaled * T_{k-1} - T_{k-2} (matmul 결과 버퍼에서 제자리 연산, 2 * L_scaled 임시 행렬 없음)
     for k in range(2, K):
-        T_k = 2 * scaled_laplacian @ cheb_polynomials[-1].numpy() - cheb_polynomials[-2].numpy()
-        cheb_polynomials.append(torch.FloatTensor(T_k))
+        T_k = np.matmul(scaled_laplacian, polynomials[-1])
+        T_k *= 2
+        T_k -= polynomials[-2]
+        polynomials.append(T_k)
+    
+    cheb_polynomials = [torch.from_numpy(T_k) for T_k in polynomials]
     
     return cheb_polynomials
 
 
 def create_adjacency_from_csv(csv_file: str, 
-                             distance_threshold: float = 5.0) -> Tuple[np.ndarray, dict]:
+                             distance_threshold: float = 5.0):
     """
     CSV 파일에서 인접 행렬 생성
     
@@ -358,7 +252,7 @@ def create_adjacency_from_csv(csv_file: str,
         distance_threshold: 거리 임계값 (km)
     
     Returns:
-        (adjacency_matrix, stop_mapping)
+        (adjacency_matrix, stop_mapping) - adjacency_matrix는 scipy.sparse CSR 행렬
     """
     
     df = pd.read_csv(csv_file)
@@ -367,26 +261,27 @@ def create_adjacency_from_csv(csv_file: str,
     stops_df = df[['stop_id', 'stop_name', 'latitude', 'longitude']].drop_duplicates()
     
     num_stops = len(stops_df)
-    adj_matrix = np.zeros((num_stops, num_stops))
     
-    stop_mapping = {}
-    for idx, row in stops_df.iterrows():
-        stop_mapping[row['stop_id']] = {
-            'index': idx,
-            'name': row['stop_name'],
-            'lat': row['latitude'], 
-            'lon': row['longitude']
-        }
+    # 행별 Series 생성 없이 열 배열을 zip으로 순회 (index는 인접 행렬의 행 위치)
+    stop_mapping = {
+        stop_id: {'index': idx, 'name': name, 'lat': lat, 'lon': lon}
+        for idx, (stop_id, name, lat, lon) in enumerate(zip(
+            stops_df['stop_id'].to_numpy(), stops_df['stop_name'].to_numpy(),
+            stops_df['latitude'].to_numpy(), stops_df['longitude'].to_numpy()
+        ))
+    }
     
     # 거리 기반 인접성 계산
-    coords = stops_df[['latitude', 'longitude']].values
-    coords_rad = np.radians(coords)
+    coords_rad = np.radians(stops_df[['latitude', 'longitude']].to_numpy(dtype=np.float32))
     
-    from sklearn.metrics.pairwise import haversine_distances
-    distances = haversine_distances(coords_rad) * 6371  # km
+    # BallTree 반경 질의로 임계값 이내 정류장 쌍만 계산 (N x N 거리 행렬 없음, numba_utils.radius_pairs)
+    from scipy import sparse
+    rows, cols = radius_pairs(coords_rad, distance_threshold)
     
-    # 임계값 이내의 정류장들을 연결
-    adj_matrix = (distances <= distance_threshold).astype(float)
-    np.fill_diagonal(adj_matrix, 0)  # 자기 자신과의 연결 제거
+    # 임계값 이내의 정류장들을 양방향으로 연결 (자기 자신 제외)
+    adj_matrix = sparse.csr_matrix(
+        (np.ones(2 * len(rows)), (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+        shape=(num_stops, num_stops)
+    )
     
     return adj_matrix, stop_mapping
\ No newline at end of file
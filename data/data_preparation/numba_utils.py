@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# data_preparation/numba_utils.py
+# numba JIT 커널 및 BallTree 반경 질의 (거리 임계값 기반 인접 정류장 쌍 계산용)
+
+import math
+
+import numpy as np
+
+# numba를 선택적으로 import (없으면 NUMBA_AVAILABLE = False)
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+EARTH_RADIUS_KM = 6371.0
+BALLTREE_MIN_NODES = 500  # 이 이상이면 BallTree 반경 질의로 인접 쌍 계산 (미만은 전체 쌍 계산)
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def build_adj(lat, lon, thr):
+        """
+        거리 임계값 기반 인접 행렬 (uint8, 대칭)
+        lat, lon: 라디안 단위 연속 배열 (float32 권장), thr: km
+        상삼각(j > i)만 계산하고 (j, i)에 대칭 기록
+        """
+        n = lat.shape[0]
+        adj = np.zeros((n, n), np.uint8)
+        cos_lat = np.cos(lat)
+        # haversine의 a 값으로 직접 비교 (asin/sqrt 생략)
+        # d <= thr  <=>  a <= sin(thr / 2R)^2
+        a_thr = math.sin(thr / (2.0 * EARTH_RADIUS_KM)) ** 2
+
+        for i in prange(n):
+            for j in range(i + 1, n):
+                a = (math.sin((lat[j] - lat[i]) / 2.0) ** 2
+                     + cos_lat[i] * cos_lat[j] * math.sin((lon[j] - lon[i]) / 2.0) ** 2)
+                if a <= a_thr:
+                    adj[i, j] = 1
+                    adj[j, i] = 1
+
+        return adj
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def build_adj_pairs(lat, lon, thr):
+        """
+        거리 임계값 이내 정류장 쌍 (i < j) 목록 (희소 인접 행렬 구성용)
+        1차 루프에서 행별 이웃 수를 세고, 2차 루프에서 행별 오프셋 위치에 기록 (NxN 배열 없음)
+        lat, lon: 라디안 단위 연속 배열 (float32 권장), thr: km
+        """
+        n = lat.shape[0]
+        cos_lat = np.cos(lat)
+        a_thr = math.sin(thr / (2.0 * EARTH_RADIUS_KM)) ** 2
+
+        counts = np.zeros(n, np.int64)
+        for i in prange(n):
+            c = 0
+            for j in range(i + 1, n):
+                a = (math.sin((lat[j] - lat[i]) / 2.0) ** 2
+                     + cos_lat[i] * cos_lat[j] * math.sin((lon[j] - lon[i]) / 2.0) ** 2)
+                if a <= a_thr:
+                    c += 1
+            counts[i] = c
+
+        offsets = np.zeros(n + 1, np.int64)
+        offsets[1:] = np.cumsum(counts)
+        rows = np.empty(offsets[n], np.int64)
+        cols = np.empty(offsets[n], np.int64)
+
+        for i in prange(n):
+            k = offsets[i]
+            for j in range(i + 1, n):
+                a = (math.sin((lat[j] - lat[i]) / 2.0) ** 2
+                     + cos_lat[i] * cos_lat[j] * math.sin((lon[j] - lon[i]) / 2.0) ** 2)
+                if a <= a_thr:
+                    rows[k] = i
+                    cols[k] = j
+                    k += 1
+
+        return rows, cols
+
+
+def radius_pairs(coords, threshold_km):
+    """
+    BallTree(haversine) 반경 질의로 threshold_km 이내 정류장 쌍 (i < j) 계산
+    coords: (N, 2) [위도, 경도] 라디안 배열
+    """
+    from sklearn.neighbors import BallTree  # 반경 질의 경로에서만 필요
+    
+    tree = BallTree(coords, metric='haversine')
+    neighbors = tree.query_radius(coords, r=threshold_km / EARTH_RADIUS_KM)
+    rows = np.repeat(np.arange(len(coords)), [len(ind) for ind in neighbors])
+    cols = np.concatenate(neighbors).astype(np.int64) if len(neighbors) else np.empty(0, dtype=np.int64)
+    upper = rows < cols  # 자기 자신/중복 방향 제거
+    return rows[upper], cols[upper]
+
+
+def warmup():
+    """
+    커널을 작은 입력(N=4)으로 한 번 호출해 JIT 컴파일/캐시 로드를 미리 수행
+    (병렬 작업 시작 전에 호출하면 첫 작업이 컴파일 시간을 떠안지 않음)
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    # 호출부와 같은 float32 좌표로 컴파일 (dtype별로 별도 시그니처가 생성됨)
+    lat = np.radians(np.array([37.50, 37.51, 37.52, 37.53], dtype=np.float32))
+    lon = np.radians(np.array([127.00, 127.01, 127.02, 127.03], dtype=np.float32))
+    build_adj(lat, lon, 1.0)
+    build_adj_pairs(lat, lon, 1.0)
@@ -6,9 +6,36 @@ Raw to Processed Data Pipeline
 
 import pandas as pd
 import os
+import codecs
 import logging
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# orjson을 선택적으로 import (없으면 표준 json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+    ORJSON_AVAILABLE = False
+
+# polars를 선택적으로 import (없으면 pyarrow, 그것도 없으면 pandas로 필터링)
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -16,6 +43,63 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# pandas 경로에서 CSV를 나눠 읽는 행 수 (전체 파일을 한 번에 메모리에 올리지 않음)
+CSV_CHUNK_ROWS = 200_000
+
+# 고유값 비율이 이 값보다 낮은 문자열 컬럼은 Parquet에 category(dictionary)로 저장
+CATEGORY_RATIO = 0.5
+
+
+def compress_polars_frame(df):
+    """정수 컬럼은 값 범위에 맞는 가장 작은 정수형으로, 반복이 많은 문자열 컬럼은 Categorical로 변환"""
+    exprs = []
+    for name, dtype in df.schema.items():
+        if dtype.is_integer() and df[name].null_count() < df.height:
+            # shrink_dtype는 polars 2.0에서 제거되어 min/max로 직접 다운캐스트 (compress_arrow_table과 동일 규칙)
+            lo, hi = df[name].min(), df[name].max()
+            for int_type, bits in ((pl.Int8, 8), (pl.Int16, 16), (pl.Int32, 32)):
+                limit = 1 << (bits - 1)
+                if -limit <= lo and hi < limit:
+                    exprs.append(pl.col(name).cast(int_type))
+                    break
+        elif dtype == pl.String and df.height and df[name].n_unique() / df.height < CATEGORY_RATIO:
+            exprs.append(pl.col(name).cast(pl.Categorical))
+    return df.with_columns(exprs) if exprs else df
+
+
+def compress_arrow_table(table):
+    """compress_polars_frame의 pyarrow 버전 (정수 다운캐스트, 문자열은 dictionary 인코딩)"""
+    columns = []
+    for column in table.columns:
+        if pa.types.is_integer(column.type) and column.null_count < len(column):
+            bounds = pc.min_max(column).as_py()
+            for int_type in (pa.int8(), pa.int16(), pa.int32()):
+                limit = 1 << (int_type.bit_width - 1)
+                if -limit <= bounds['min'] and bounds['max'] < limit:
+                    column = column.cast(int_type)
+                    break
+        elif pa.types.is_string(column.type) and len(column) and pc.count_distinct(column).as_py() / len(column) < CATEGORY_RATIO:
+            column = pc.dictionary_encode(column)
+        columns.append(column)
+    return pa.table(columns, names=table.column_names)
+
+
+def write_arrow_csv(table, out, include_header=True):
+    """
+    Arrow Table을 out(바이너리 파일)에 CSV로 기록 (pandas/polars 출력과 같은 최소 인용: 필요한 값만 따옴표)
+    pyarrow에는 최소 인용 옵션이 없어 인용 없이 먼저 기록하고,
+    구분자/따옴표/줄바꿈이 들어간 값 때문에 실패하면 해당 테이블만 pandas로 기록
+    """
+    buf = pa.BufferOutputStream()
+    try:
+        pa_csv.write_csv(table, buf, write_options=pa_csv.WriteOptions(
+            include_header=include_header, quoting_style='none'
+        ))
+    except pa.ArrowInvalid:
+        table.to_pandas().to_csv(out, header=include_header, index=False, encoding='utf-8')
+        return
+    out.write(buf.getvalue())
+
 
 class RawToProcessed:
     def __init__(self, raw_dir, processed_dir):
@@ -30,13 +114,28 @@ class RawToProcessed:
     def load_authorized_route_names(self):
         """1. 202507_authorized_route.csv의 인가 노선명들을 모두 추출"""
         file_path = self.raw_dir / '202507_authorized_route.csv'
+        cache_path = self.processed_dir / '.auth_routes.pkl'
         logger.info(f"Loading authorized route names from {file_path}")
         
         try:
+            # 원본 파일의 (mtime, size)가 같으면 이전 실행의 파싱 결과 재사용
+            stat = file_path.stat()
+            cache_key = (stat.st_mtime_ns, stat.st_size)
+            if cache_path.exists():
+                with open(cache_path, 'rb') as f:
+                    cached = pickle.load(f)
+                if cached.get('key') == cache_key:
+                    authorized_routes = frozenset(cached['routes'])
+                    logger.info(f"✅ Loaded {len(authorized_routes)} authorized route names (cached)")
+                    return authorized_routes
+            
             df = pd.read_csv(file_path, encoding='utf-8-sig')
             
             # 노선명 추출 및 정리
-            authorized_routes = set(df['노선명'].str.strip().unique())
+            authorized_routes = frozenset(df['노선명'].str.strip().unique())
+            
+            with open(cache_path, 'wb') as f:
+                pickle.dump({'key': cache_key, 'routes': list(authorized_routes)}, f)
             
             logger.info(f"✅ Loaded {len(authorized_routes)} authorized route names")
             logger.info(f"   Sample routes: {list(authorized_routes)[:10]}")
@@ -55,100 +154,179 @@ class RawToProcessed:
         logger.info(f"Filtering route info from {input_path}")
         
         try:
-            df = pd.read_csv(input_path, encoding='utf-8-sig')
-            original_count = len(df)
-            
-            # Type 8 (기타) 제외 필터링
-            df = df[df['노선유형'] != 8]
+            seen_names = set()
+            type_counts = []
+            
+            def route_filter(chunk):
+                # Type 8 (기타) 제외 필터링
+                chunk = chunk[chunk['노선유형'] != 8]
+                type_counts.append(chunk['노선유형'].value_counts())
+                
+                # 노선명 중복 제거 (이전 청크까지 나온 노선명 포함, 첫 번째 것만 유지)
+                chunk = chunk.drop_duplicates(subset=['노선명'], keep='first')
+                chunk = chunk[~chunk['노선명'].isin(seen_names)]
+                seen_names.update(chunk['노선명'])
+                return chunk
+            
+            original_count = filtered_count = 0
+            route_ids = set()
+            for chunk_rows, chunk in self._stream_filtered_csv(
+                input_path, output_path, route_filter, dtype={'노선ID': 'string'}
+            ):
+                original_count += chunk_rows
+                filtered_count += len(chunk)
+                route_ids.update(chunk['노선ID'])
             
             # 노선 타입별 통계 로깅
-            type_counts = df['노선유형'].value_counts().sort_index()
-            type_mapping = {
-                1: '간선버스', 2: '지선버스', 3: '순환버스', 
-                4: '광역버스', 5: '마을버스', 6: '공항버스', 7: '심야버스'
-            }
-            
-            logger.info("📊 Route types included:")
-            for route_type, count in type_counts.items():
-                type_name = type_mapping.get(route_type, f'Type {route_type}')
-                logger.info(f"   Type {route_type} ({type_name}): {count} routes")
-            
-            # 노선명 중복 제거 (첫 번째 것만 유지)
-            df = df.drop_duplicates(subset=['노선명'], keep='first')
-            
-            filtered_count = len(df)
-            unique_routes = df['노선명'].nunique()
-            
-            # 저장
-            df.to_csv(output_path, index=False, encoding='utf-8-sig')
+            if type_counts:
+                self._log_route_types(pd.concat(type_counts).groupby(level=0).sum().sort_index().items())
             
             logger.info(f"✅ Filtered route info: {original_count} → {filtered_count} records")
-            logger.info(f"   Unique route names: {unique_routes}")
+            logger.info(f"   Unique route names: {len(seen_names)}")
             logger.info(f"   Saved to: {output_path}")
             
-            # 필터링된 route_id 목록 반환
-            return set(df['노선ID'].astype(str).unique())
+            # 필터링된 route_id 목록 반환 (다음 단계에서 변경 없이 조회만 하므로 frozenset)
+            return frozenset(route_ids)
             
         except Exception as e:
             logger.error(f"❌ Error filtering route info: {e}")
             raise
     
-    def filter_route_nodes(self, authorized_route_ids):
-        """3. seoul_route_node.csv를 인가된 노선 기준으로 필터링"""
+    def _stream_filtered_csv(self, input_path, output_path, chunk_filter, dtype=None):
+        """
+        CSV를 CSV_CHUNK_ROWS 단위로 읽어 chunk_filter를 통과한 행만 output_path에 이어 쓰기
+        ID 컬럼은 dtype으로 읽을 때부터 문자열('string')로 파싱 (astype(str) 변환/보조 컬럼 없음)
+        청크마다 (원본 청크 행 수, 필터링된 청크)를 yield (통계는 호출부에서 누적)
+        """
+        reader = pd.read_csv(input_path, encoding='utf-8-sig', chunksize=CSV_CHUNK_ROWS, dtype=dtype)
+        with open(output_path, 'wb') as out:
+            out.write(codecs.BOM_UTF8)  # 기존 utf-8-sig 출력과 동일하게 BOM 유지
+            for i, chunk in enumerate(reader):
+                filtered = chunk_filter(chunk)
+                if PYARROW_AVAILABLE:
+                    # pyarrow C++ CSV writer (행별 Python 포맷팅 없음)
+                    write_arrow_csv(pa.Table.from_pandas(filtered, preserve_index=False), out, include_header=(i == 0))
+                else:
+                    filtered.to_csv(out, header=(i == 0), index=False, encoding='utf-8')
+                yield len(chunk), filtered
+    
+    def _log_route_types(self, type_counts):
+        """노선 타입별 노선 수 로깅 (type_counts: (노선유형, 개수) 순회 가능 객체)"""
+        type_mapping = {
+            1: '간선버스', 2: '지선버스', 3: '순환버스', 
+            4: '광역버스', 5: '마을버스', 6: '공항버스', 7: '심야버스'
+        }
+        
+        logger.info("📊 Route types included:")
+        for route_type, count in type_counts:
+            type_name = type_mapping.get(route_type, f'Type {route_type}')
+            logger.info(f"   Type {route_type} ({type_name}): {count} routes")
+    
+    def filter_route_nodes(self, authorized_route_ids, table=None):
+        """
+        3. seoul_route_node.csv를 인가된 노선 기준으로 필터링
+        table: 미리 읽어 둔 Arrow Table (run()에서 이전 단계와 병렬로 읽은 경우, pyarrow 경로에서만 사용)
+        """
         input_path = self.raw_dir / 'seoul_route_node.csv'
         output_path = self.processed_dir / 'seoul_route_node_filtered.csv'
         
         logger.info(f"Filtering route-node mappings from {input_path}")
         
         try:
-            df = pd.read_csv(input_path, encoding='utf-8-sig')
-            original_count = len(df)
-            
-            # 노선ID로 필터링
-            df['노선ID_str'] = df['노선ID'].astype(str)
-            df = df[df['노선ID_str'].isin(authorized_route_ids)]
-            df = df.drop(columns=['노선ID_str'])
-            
-            filtered_count = len(df)
-            unique_nodes = df['노드ID'].nunique()
-            unique_routes = df['노선ID'].nunique()
-            
-            # 저장
-            df.to_csv(output_path, index=False, encoding='utf-8-sig')
+            if PYARROW_AVAILABLE:
+                table, original_count = self._filter_csv_arrow(input_path, output_path, '노선ID', authorized_route_ids, table)
+                node_ids = pc.unique(table['노드ID'].cast(pa.string()))
+                
+                logger.info(f"✅ Filtered route-node mappings: {original_count} → {table.num_rows} records")
+                logger.info(f"   Unique routes: {pc.count_distinct(table['노선ID']).as_py()}")
+                logger.info(f"   Unique nodes: {len(node_ids)}")
+                logger.info(f"   Saved to: {output_path}")
+                
+                # 필터링된 node_id 목록 반환 (Arrow 문자열 배열)
+                return node_ids
+            
+            # 노선ID로 필터링 (ID 컬럼은 문자열로 읽어 비교용 보조 컬럼 없음)
+            # 조회 대상 ID는 청크마다 set → list 변환하지 않도록 string 배열로 한 번만 변환
+            lookup_ids = pd.array(list(authorized_route_ids), dtype='string')
+            original_count = filtered_count = 0
+            route_ids, node_ids = set(), set()
+            for chunk_rows, chunk in self._stream_filtered_csv(
+                input_path, output_path,
+                lambda chunk: chunk[chunk['노선ID'].isin(lookup_ids)],
+                dtype={'노선ID': 'string', '노드ID': 'string'}
+            ):
+                original_count += chunk_rows
+                filtered_count += len(chunk)
+                route_ids.update(chunk['노선ID'])
+                node_ids.update(chunk['노드ID'])
             
             logger.info(f"✅ Filtered route-node mappings: {original_count} → {filtered_count} records")
-            logger.info(f"   Unique routes: {unique_routes}")
-            logger.info(f"   Unique nodes: {unique_nodes}")
+            logger.info(f"   Unique routes: {len(route_ids)}")
+            logger.info(f"   Unique nodes: {len(node_ids)}")
             logger.info(f"   Saved to: {output_path}")
             
             # 필터링된 node_id 목록 반환
-            return set(df['노드ID'].astype(str).unique())
+            return frozenset(node_ids)
             
         except Exception as e:
             logger.error(f"❌ Error filtering route nodes: {e}")
             raise
     
-    def filter_node_info(self, used_node_ids):
-        """4. seoul_node_info.csv를 사용되는 노드만 필터링"""
+    def _filter_csv_arrow(self, input_path, output_path, id_column, ids, table=None):
+        """
+        pyarrow C++ CSV 리더로 읽고 id_column이 ids에 포함된 행만 저장
+        (pandas의 행별 astype(str) 보조 컬럼 없이 pc.is_in으로 마스크 계산)
+        table이 주어지면 다시 읽지 않고 그대로 사용
+        반환: (필터링된 Arrow Table, 원본 행 수)
+        """
+        if table is None:
+            table = pa_csv.read_csv(input_path)
+        value_set = ids if isinstance(ids, pa.Array) else pa.array(list(ids), type=pa.string())
+        
+        mask = pc.is_in(table[id_column].cast(pa.string()), value_set=value_set)
+        filtered = table.filter(mask)
+        with open(output_path, 'wb') as out:
+            out.write(codecs.BOM_UTF8)  # _stream_filtered_csv와 같은 BOM/인용 형식
+            write_arrow_csv(filtered, out)
+        
+        return filtered, table.num_rows
+    
+    def filter_node_info(self, used_node_ids, table=None):
+        """
+        4. seoul_node_info.csv를 사용되는 노드만 필터링
+        table: 미리 읽어 둔 Arrow Table (filter_route_nodes와 동일)
+        """
         input_path = self.raw_dir / 'seoul_node_info.csv'
         output_path = self.processed_dir / 'seoul_node_info_filtered.csv'
         
         logger.info(f"Filtering node info from {input_path}")
         
         try:
-            df = pd.read_csv(input_path, encoding='utf-8-sig')
-            original_count = len(df)
-            
-            # 노드ID로 필터링
-            df['노드ID_str'] = df['노드ID'].astype(str)
-            df = df[df['노드ID_str'].isin(used_node_ids)]
-            df = df.drop(columns=['노드ID_str'])
-            
-            filtered_count = len(df)
-            node_types = df['노드유형'].value_counts().to_dict()
-            
-            # 저장
-            df.to_csv(output_path, index=False, encoding='utf-8-sig')
+            if PYARROW_AVAILABLE:
+                table, original_count = self._filter_csv_arrow(input_path, output_path, '노드ID', used_node_ids, table)
+                type_counts = pc.value_counts(table['노드유형']).to_pylist()
+                node_types = {item['values']: item['counts'] for item in type_counts}
+                
+                logger.info(f"✅ Filtered node info: {original_count} → {table.num_rows} records")
+                logger.info(f"   Node type distribution: {node_types}")
+                logger.info(f"   Saved to: {output_path}")
+                
+                return table.num_rows
+            
+            # 노드ID로 필터링 (ID 컬럼은 문자열로 읽어 비교용 보조 컬럼 없음)
+            lookup_ids = pd.array(list(used_node_ids), dtype='string')
+            original_count = filtered_count = 0
+            type_counts = []
+            for chunk_rows, chunk in self._stream_filtered_csv(
+                input_path, output_path,
+                lambda chunk: chunk[chunk['노드ID'].isin(lookup_ids)],
+                dtype={'노드ID': 'string'}
+            ):
+                original_count += chunk_rows
+                filtered_count += len(chunk)
+                type_counts.append(chunk['노드유형'].value_counts())
+            
+            node_types = pd.concat(type_counts).groupby(level=0).sum().to_dict() if type_counts else {}
             
             logger.info(f"✅ Filtered node info: {original_count} → {filtered_count} records")
             logger.info(f"   Node type distribution: {node_types}")
@@ -160,6 +338,84 @@ class RawToProcessed:
             logger.error(f"❌ Error filtering node info: {e}")
             raise
     
+    def filter_all_polars(self):
+        """
+        2~4단계를 하나의 polars lazy 플랜으로 실행 (노선 → 노선-노드 → 노드 semi join)
+        collect_all로 세 sink를 함께 실행해 공통 부분(필터된 노선/노드)을 한 번만 계산
+        sink_csv(lazy=True)는 polars 1.x 이상 필요
+        반환: (route_ids, node_ids) polars Series
+        """
+        route_info_path = self.processed_dir / 'seoul_route_info_filtered.csv'
+        route_node_path = self.processed_dir / 'seoul_route_node_filtered.csv'
+        node_info_path = self.processed_dir / 'seoul_node_info_filtered.csv'
+        
+        logger.info("Filtering route info / route-node mappings / node info in one polars plan")
+        
+        # Type 8 (기타) 제외 + 노선명 중복 제거 (첫 번째 것만 유지)
+        # 노선유형이 비어 있는 행은 pandas 경로와 같이 유지 (!= 8은 null 행을 버리므로 ne_missing 사용)
+        routes = pl.scan_csv(self.raw_dir / 'seoul_route_info.csv').filter(
+            pl.col('노선유형').ne_missing(8)
+        ).unique(subset=['노선명'], keep='first', maintain_order=True)
+        route_keys = routes.select(pl.col('노선ID').cast(pl.Utf8))
+        
+        # 필터된 노선에 속한 노선-노드 매핑 / 그 매핑에 등장하는 노드 정보
+        nodes_map = pl.scan_csv(self.raw_dir / 'seoul_route_node.csv').join(
+            route_keys, left_on=pl.col('노선ID').cast(pl.Utf8), right_on='노선ID', how='semi'
+        )
+        node_keys = nodes_map.select(pl.col('노드ID').cast(pl.Utf8)).unique()
+        node_info = pl.scan_csv(self.raw_dir / 'seoul_node_info.csv').join(
+            node_keys, left_on=pl.col('노드ID').cast(pl.Utf8), right_on='노드ID', how='semi'
+        )
+        
+        # pandas/pyarrow 경로와 같은 출력 형식 (UTF-8 BOM, 필요한 값만 따옴표)
+        pl.collect_all([
+            frame.sink_csv(path, include_bom=True, quote_style='necessary', lazy=True)
+            for frame, path in (
+                (routes, route_info_path), (nodes_map, route_node_path), (node_info, node_info_path)
+            )
+        ])
+        
+        # 통계/반환값은 저장된 (작은) 결과 파일에서 필요한 컬럼만 읽어 계산
+        route_ids = pl.scan_csv(route_info_path).select(pl.col('노선ID').cast(pl.Utf8)).collect().to_series()
+        node_ids = pl.scan_csv(route_node_path).select(
+            pl.col('노드ID').cast(pl.Utf8)
+        ).unique().collect().to_series()
+        node_count = pl.scan_csv(node_info_path).select(pl.len()).collect().item()
+        
+        logger.info(f"✅ Filtered routes: {len(route_ids)}, nodes: {len(node_ids)}, node info: {node_count} records")
+        logger.info(f"   Saved to: {self.processed_dir}")
+        
+        return route_ids, node_ids
+    
+    def write_parquet_outputs(self):
+        """
+        필터링된 CSV를 같은 이름의 zstd Parquet으로도 저장
+        (다음 단계 ETL은 한글 CSV를 다시 파싱하지 않고 타입이 있는 컬럼 형식으로 읽음, CSV는 호환용으로 유지)
+        """
+        filenames = ('seoul_route_info_filtered.csv', 'seoul_route_node_filtered.csv', 'seoul_node_info_filtered.csv')
+        if not (POLARS_AVAILABLE or PYARROW_AVAILABLE):
+            logger.warning("⚠️  polars/pyarrow not installed, skipping Parquet outputs")
+            # 이전 실행의 Parquet이 방금 만든 CSV 대신 읽히지 않도록 제거
+            for filename in filenames:
+                parquet_path = (self.processed_dir / filename).with_suffix('.parquet')
+                if parquet_path.exists():
+                    parquet_path.unlink()
+                    logger.info(f"🗑️  Removed stale Parquet: {parquet_path}")
+            return
+        
+        for filename in filenames:
+            csv_path = self.processed_dir / filename
+            parquet_path = csv_path.with_suffix('.parquet')
+            if not csv_path.exists():
+                continue
+            
+            # 정수 다운캐스트 + 반복 문자열(노선명 등) category 변환 후 저장 (읽는 쪽 메모리/value_counts 비용 감소)
+            if POLARS_AVAILABLE:
+                compress_polars_frame(pl.read_csv(csv_path)).write_parquet(parquet_path, compression='zstd')
+            else:
+                pq.write_table(compress_arrow_table(pa_csv.read_csv(csv_path)), parquet_path, compression='zstd')
+            logger.info(f"✅ Saved Parquet: {parquet_path}")
+    
     def copy_other_files(self):
         """나머지 파일들 그대로 복사"""
         files_to_copy = [
@@ -178,6 +434,16 @@ class RawToProcessed:
             else:
                 logger.warning(f"⚠️  File not found: {filename}")
     
+    def _write_summary(self, summary):
+        """요약 통계를 filter_summary.json으로 저장 (orjson이 있으면 bytes로 바로 기록)"""
+        summary_path = self.processed_dir / 'filter_summary.json'
+        if ORJSON_AVAILABLE:
+            summary_path.write_bytes(orjson.dumps(summary, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+        logger.info(f"📊 Summary saved to: {summary_path}")
+    
     def print_summary(self, authorized_routes, route_ids, node_ids):
         """처리 결과 요약 출력"""
         logger.info("=" * 60)
@@ -196,11 +462,7 @@ class RawToProcessed:
             'authorized_routes_sample': list(authorized_routes)[:20]
         }
         
-        import json
-        summary_path = self.processed_dir / 'filter_summary.json'
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
-        logger.info(f"📊 Summary saved to: {summary_path}")
+        self._write_summary(summary)
     
     def print_summary_v2(self, route_ids, node_ids):
         """처리 결과 요약 출력 (Type 8 제외 방식)"""
@@ -218,27 +480,37 @@ class RawToProcessed:
             'filtered_node_ids_count': len(node_ids)
         }
         
-        import json
-        summary_path = self.processed_dir / 'filter_summary.json'
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
-        logger.info(f"📊 Summary saved to: {summary_path}")
+        self._write_summary(summary)
     
     def run(self):
         """전체 파이프라인 실행 (Type 8 제외 필터링)"""
         logger.info("🚀 Starting Raw to Processed Pipeline (excluding Type 8 routes)...")
         
         try:
-            # 1. seoul_route_info.csv 필터링 (Type 8 제외)
-            authorized_route_ids = self.filter_route_info()
-            
-            # 2. seoul_route_node.csv 필터링
-            used_node_ids = self.filter_route_nodes(authorized_route_ids)
-            
-            # 3. seoul_node_info.csv 필터링
-            self.filter_node_info(used_node_ids)
-            
-            # 4. 나머지 파일 복사
+            if POLARS_AVAILABLE:
+                # 1~3. 세 파일 필터링을 하나의 lazy 플랜으로 실행
+                authorized_route_ids, used_node_ids = self.filter_all_polars()
+            elif PYARROW_AVAILABLE:
+                # 2, 3단계 입력 CSV 파싱을 앞 단계 필터링과 겹쳐 실행 (pyarrow CSV 리더는 GIL 해제)
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    route_node_table = pool.submit(pa_csv.read_csv, self.raw_dir / 'seoul_route_node.csv')
+                    node_info_table = pool.submit(pa_csv.read_csv, self.raw_dir / 'seoul_node_info.csv')
+                    
+                    authorized_route_ids = self.filter_route_info()
+                    used_node_ids = self.filter_route_nodes(authorized_route_ids, route_node_table.result())
+                    self.filter_node_info(used_node_ids, node_info_table.result())
+            else:
+                # 1. seoul_route_info.csv 필터링 (Type 8 제외)
+                authorized_route_ids = self.filter_route_info()
+                
+                # 2. seoul_route_node.csv 필터링
+                used_node_ids = self.filter_route_nodes(authorized_route_ids)
+                
+                # 3. seoul_node_info.csv 필터링
+                self.filter_node_info(used_node_ids)
+            
+            # 4. 필터링 결과 Parquet 저장 + 나머지 파일 복사
+            self.write_parquet_outputs()
             self.copy_other_files()
             
             # 5. 요약 출력
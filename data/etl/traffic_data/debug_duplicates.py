@@ -7,14 +7,39 @@ ETL 중복 키 디버깅 스크립트
 import os
 import sys
 import json
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 from datetime import datetime, timedelta
-from collections import Counter, defaultdict
+from collections import defaultdict
+
+# orjson을 선택적으로 import (없으면 response.json() 사용)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# xxhash를 선택적으로 import (없으면 hashlib.blake2b 8바이트 다이제스트 사용)
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
 
 # ETL 클래스 임포트
 sys.path.append('/Users/leekyoungsoo/teamProject/DDF-ASTGCN/data/etl/traffic_data')
 from etl_trafficData import SeoulTrafficETL
 
+# 연결 재사용 세션 (API 호출마다 TCP/TLS 핸드셰이크 반복 없음, 일시 오류는 재시도)
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5)
+))
+
 def debug_api_duplicates(api_num: int, date: str = '20250719'):
     """특정 API의 중복 키 생성 패턴 분석"""
     print(f"\n🔍 API{api_num} 중복 키 분석 - 날짜: {date}")
@@ -36,45 +61,45 @@ def debug_api_duplicates(api_num: int, date: str = '20250719'):
     
     try:
         url = api_config['endpoint']
-        response = requests.get(url, params=params, timeout=30)
+        response = _SESSION.get(url, params=params, timeout=30)
         
         if response.status_code != 200:
             print(f"❌ API 호출 실패: {response.status_code}")
             return
             
-        data = response.json()
+        data = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
         
+        # 키 구성 컬럼 (날짜는 요청 단위로 고정이므로 키 배열에서 제외하고 출력 시에만 붙임)
         if api_num in [1, 3]:
             # 노드별 승차 데이터 분석
-            items = data.get('CardBusStatisticsService', {}).get('row', [])
-            keys = []
-            for item in items:
-                for hour in range(24):
-                    hour_str = f"{hour:02d}"
-                    key = (date, item.get('ROUTE_ID', ''), item.get('NODE_ID', ''), hour_str)
-                    keys.append(key)
-        
+            id_fields = ('ROUTE_ID', 'NODE_ID')
         elif api_num in [2, 4]:
             # 구간별 이동 데이터 분석  
-            items = data.get('CardBusStatisticsService', {}).get('row', [])
-            keys = []
-            for item in items:
-                for hour in range(24):
-                    hour_str = f"{hour:02d}"
-                    key = (date, item.get('ROUTE_ID', ''), item.get('FR_NODE_ID', ''), item.get('TO_NODE_ID', ''), hour_str)
-                    keys.append(key)
+            id_fields = ('ROUTE_ID', 'FR_NODE_ID', 'TO_NODE_ID')
         
-        # 중복 검사
-        key_counts = Counter(keys)
-        duplicates = {k: v for k, v in key_counts.items() if v > 1}
+        items = data.get('CardBusStatisticsService', {}).get('row', [])
+        key_dtype = [(field, 'U32') for field in id_fields] + [('hour', 'u1')]
+        
+        # 항목별 ID 배열을 한 번만 만들고 24시간 축으로 확장 (항목 x 시간 이중 루프 없음)
+        keys = np.empty(len(items) * 24, dtype=key_dtype)
+        for field in id_fields:
+            ids = np.array([str(item.get(field, '')) for item in items], dtype='U32')
+            keys[field] = np.repeat(ids, 24)
+        keys['hour'] = np.tile(np.arange(24, dtype=np.uint8), len(items))
+        
+        # 중복 검사 (정렬/개수 집계를 numpy에서 처리)
+        unique_keys, key_counts = np.unique(keys, return_counts=True)
+        duplicates = unique_keys[key_counts > 1]
+        duplicate_counts = key_counts[key_counts > 1]
         
         print(f"✅ 총 키 개수: {len(keys)}")
-        print(f"✅ 유니크 키 개수: {len(key_counts)}")
+        print(f"✅ 유니크 키 개수: {len(unique_keys)}")
         
-        if duplicates:
+        if len(duplicates):
             print(f"🚨 중복 키 발견: {len(duplicates)}개")
-            for key, count in list(duplicates.items())[:5]:  # 처음 5개만 출력
-                print(f"   {key} -> {count}회 중복")
+            for key, count in zip(duplicates[:5], duplicate_counts[:5]):  # 처음 5개만 출력
+                *ids, hour = key.tolist()
+                print(f"   {(date, *ids, f'{hour:02d}')} -> {count}회 중복")
         else:
             print("✅ 중복 없음")
             
@@ -84,6 +109,13 @@ def debug_api_duplicates(api_num: int, date: str = '20250719'):
         print(f"❌ 분석 실패: {e}")
         return None
 
+def key_fingerprint(key) -> int:
+    """PK 튜플 (date, route, node, hour)을 64비트 정수 지문으로 변환 (키당 8바이트로 비교)"""
+    packed = '|'.join(key)
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh64_intdigest(packed)
+    return int.from_bytes(hashlib.blake2b(packed.encode(), digest_size=8).digest(), 'little')
+
 def debug_batch_processing():
     """배치 처리 과정에서 중복 생성 패턴 분석"""
     print("\n🔍 배치 처리 중복 분석")
@@ -96,16 +128,19 @@ def debug_batch_processing():
         ('20250719', 'ROUTE_002', 'NODE_002', '10'),
     ]
     
-    # 중복 검사 로직 테스트
-    keys_seen = set()
-    duplicates = []
+    # 중복 검사 로직 테스트 (전체가 PK, 튜플 set 대신 uint64 지문 배열로 비교)
+    fingerprints = np.fromiter(
+        (key_fingerprint(record) for record in test_batch), dtype=np.uint64, count=len(test_batch)
+    )
+    
+    # 지문별 첫 등장 위치 외의 레코드가 중복 (입력 순서대로 보고)
+    _, first_idx = np.unique(fingerprints, return_index=True)
+    is_duplicate = np.ones(len(test_batch), dtype=bool)
+    is_duplicate[first_idx] = False
     
-    for record in test_batch:
-        key = record  # 전체가 PK
-        if key in keys_seen:
-            duplicates.append(key)
-            print(f"🚨 중복 발견: {key}")
-        keys_seen.add(key)
+    duplicates = [test_batch[i] for i in np.flatnonzero(is_duplicate)]
+    for key in duplicates:
+        print(f"🚨 중복 발견: {key}")
     
     print(f"배치 크기: {len(test_batch)}")
     print(f"중복 개수: {len(duplicates)}")
@@ -646,6 +646,10 @@ class SeoulTrafficETL:
             # execute_values로 고성능 배치 삽입 (execute_batch보다 5-10배 빠름)
             execute_values(cur, sql, batch_data, page_size=self.db_batch_size)
             
+            # 시간대별 교통 패턴 증분 갱신 대상 월 기록 (같은 트랜잭션, migrations/006)
+            record_dates = sorted({record[0] for record in batch_data})
+            cur.execute("SELECT mark_hourly_traffic_dirty(%s::date[])", (record_dates,))
+            
             # 배치 커밋 최적화: N개 배치마다 커밋
             self.batch_counter += 1
             if self.batch_counter % self.commit_batch_count == 0:
@@ -15,6 +15,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def read_processed_table(file_path):
+    """
+    processed CSV 로드 (RawToProcessed가 만든 같은 이름의 .parquet이 CSV보다 새로우면 CSV 파싱 없이 Parquet 로드)
+    CSV만 다시 만들어진 경우(Parquet 미작성 실행) 이전 Parquet은 무시
+    """
+    parquet_path = os.path.splitext(file_path)[0] + '.parquet'
+    if os.path.exists(parquet_path) and (
+            not os.path.exists(file_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(file_path)):
+        df = pd.read_parquet(parquet_path)
+        # 저장 시 축소한 타입(int8 등 소형 정수, category)을 CSV 로드와 같은 int64/object로 맞춤
+        # (이후 fillna('')/iterrows 기반 레코드 생성이 CSV 경로와 동일하게 동작)
+        restore = {}
+        for col, dtype in df.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                restore[col] = object
+            elif pd.api.types.is_integer_dtype(dtype):
+                restore[col] = 'int64'
+        return df.astype(restore) if restore else df
+    return pd.read_csv(file_path, encoding='utf-8-sig')
+
+
 class SeoulBusETL:
     def __init__(self, db_config):
         self.db_config = db_config
@@ -49,8 +71,8 @@ class SeoulBusETL:
             logger.info("Existing bus_stops data deleted (with CASCADE)")
             self.conn.commit()
             
-            # CSV 읽기
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
+            # CSV 읽기 (Parquet이 있으면 Parquet)
+            df = read_processed_table(file_path)
             
             # Korean to English column mapping
             column_mapping = {
@@ -169,8 +191,8 @@ class SeoulBusETL:
             logger.info("Existing bus_routes data deleted (with CASCADE)")
             self.conn.commit()
             
-            # CSV 읽기
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
+            # CSV 읽기 (Parquet이 있으면 Parquet)
+            df = read_processed_table(file_path)
             
             # Korean to English column mapping
             column_mapping = {
@@ -360,8 +382,8 @@ class SeoulBusETL:
         logger.info(f"Processing route-stops mapping from {file_path}")
         
         try:
-            # CSV 읽기
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
+            # CSV 읽기 (Parquet이 있으면 Parquet)
+            df = read_processed_table(file_path)
             
             # Korean to English column mapping
             column_mapping = {
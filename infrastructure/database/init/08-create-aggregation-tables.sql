@@ -19,4 +19,12 @@
 \i /docker-entrypoint-initdb.d/migrations/004_tourism_drt_aggregation.sql
 \i /docker-entrypoint-initdb.d/migrations/005_vulnerable_drt_aggregation.sql
 
+-- 4. 시간대별 교통 패턴 증분 갱신 전환
+\echo 'Switching hourly traffic patterns to incremental refresh...'
+\i /docker-entrypoint-initdb.d/migrations/006_incremental_hourly_traffic.sql
+
+-- 5. 시간대별 교통 패턴 커버링 인덱스
+\echo 'Creating covering indexes for hourly traffic patterns...'
+\i /docker-entrypoint-initdb.d/migrations/007_hourly_traffic_covering_index.sql
+
 \echo 'All materialized views and DRT aggregation tables created successfully!'
\ No newline at end of file
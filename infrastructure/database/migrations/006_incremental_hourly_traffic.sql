@@ -0,0 +1,197 @@
+-- =====================================================
+-- DRT Dashboard - 시간대별 교통 패턴 증분 갱신
+-- 작성일: 2025-09-02
+-- 목적: mv_hourly_traffic_patterns / mv_seoul_hourly_patterns 전체 REFRESH 제거
+--
+-- ## 설계 원칙:
+-- - 두 MV를 동일한 이름/컬럼의 일반 테이블로 전환 (API 쿼리 변경 없음)
+-- - station_passenger_history 적재 시 ETL이 해당 월만 dirty로 기록 (mark_hourly_traffic_dirty)
+--   (압축 하이퍼테이블은 transition table 트리거를 지원하지 않으므로 트리거 미사용)
+-- - 갱신 시 dirty 월만 DELETE + INSERT (한 트랜잭션, 다른 월은 계속 조회 가능)
+-- - (month_date, sgg_name, day_type, hour) PK로 월 단위 클러스터링
+-- =====================================================
+
+-- 1. 기존 MV 제거 (mv_seoul_hourly_patterns는 의존 MV라 함께 제거됨)
+DROP MATERIALIZED VIEW IF EXISTS mv_seoul_hourly_patterns CASCADE;
+DROP MATERIALIZED VIEW IF EXISTS mv_hourly_traffic_patterns CASCADE;
+
+-- 2. 구별 시간대별 교통 패턴 테이블 (기존 MV와 동일 컬럼)
+CREATE TABLE IF NOT EXISTS mv_hourly_traffic_patterns (
+    month_date DATE NOT NULL,
+    day_type VARCHAR(10) NOT NULL,
+    sgg_code VARCHAR(10),
+    sgg_name VARCHAR(50) NOT NULL,
+    hour INTEGER NOT NULL,
+    avg_ride_passengers NUMERIC(10,2),
+    avg_alight_passengers NUMERIC(10,2),
+    avg_total_passengers NUMERIC(10,2),
+    max_ride_passengers INTEGER,
+    max_alight_passengers INTEGER,
+    min_ride_passengers INTEGER,
+    min_alight_passengers INTEGER,
+    sample_count BIGINT,
+    station_count BIGINT,
+    day_count BIGINT,
+    PRIMARY KEY (month_date, sgg_name, day_type, hour)
+);
+
+CREATE INDEX IF NOT EXISTS idx_mv_hourly_traffic_lookup
+ON mv_hourly_traffic_patterns(month_date, day_type, sgg_name, hour);
+
+-- 3. 서울시 전체 시간대별 패턴 테이블 (기존 MV와 동일 컬럼)
+CREATE TABLE IF NOT EXISTS mv_seoul_hourly_patterns (
+    month_date DATE NOT NULL,
+    day_type VARCHAR(10) NOT NULL,
+    hour INTEGER NOT NULL,
+    avg_ride_passengers NUMERIC,
+    avg_alight_passengers NUMERIC,
+    avg_total_passengers NUMERIC,
+    max_ride_passengers INTEGER,
+    max_alight_passengers INTEGER,
+    total_samples NUMERIC,
+    total_stations NUMERIC,
+    PRIMARY KEY (month_date, day_type, hour)
+);
+
+-- 4. 변경된 월 기록 테이블 (delta log)
+CREATE TABLE IF NOT EXISTS hourly_traffic_dirty_months (
+    month_date DATE PRIMARY KEY,
+    marked_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 5. 월 단위 재계산 함수
+--
+-- ## 처리 순서:
+-- 1) 해당 월 구별 패턴 DELETE + INSERT
+-- 2) 해당 월 서울시 전체 패턴 DELETE + INSERT (구별 결과 기반 가중평균)
+-- 3) dirty 기록 제거
+CREATE OR REPLACE FUNCTION refresh_hourly_traffic_month(target_month DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    month_end DATE;
+    row_count INTEGER;
+BEGIN
+    month_start := DATE_TRUNC('month', target_month);
+    month_end := month_start + INTERVAL '1 month';
+
+    RAISE NOTICE 'Refreshing hourly traffic patterns for: %', month_start;
+
+    DELETE FROM mv_hourly_traffic_patterns WHERE month_date = month_start;
+
+    INSERT INTO mv_hourly_traffic_patterns
+    SELECT
+        month_start as month_date,
+        CASE
+            WHEN EXTRACT(DOW FROM sph.record_date) BETWEEN 1 AND 5 THEN 'weekday'
+            ELSE 'weekend'
+        END as day_type,
+        sm.sgg_code,
+        sm.sgg_name,
+        sph.hour,
+        AVG(sph.ride_passenger)::numeric(10,2) as avg_ride_passengers,
+        AVG(sph.alight_passenger)::numeric(10,2) as avg_alight_passengers,
+        AVG(sph.ride_passenger + sph.alight_passenger)::numeric(10,2) as avg_total_passengers,
+        MAX(sph.ride_passenger) as max_ride_passengers,
+        MAX(sph.alight_passenger) as max_alight_passengers,
+        MIN(sph.ride_passenger) as min_ride_passengers,
+        MIN(sph.alight_passenger) as min_alight_passengers,
+        COUNT(*) as sample_count,
+        COUNT(DISTINCT sph.node_id) as station_count,
+        COUNT(DISTINCT sph.record_date) as day_count
+    FROM station_passenger_history sph
+    INNER JOIN spatial_mapping sm ON sph.node_id = sm.node_id
+    WHERE sm.is_seoul = TRUE
+        AND sph.record_date >= month_start
+        AND sph.record_date < month_end
+    GROUP BY 2, sm.sgg_code, sm.sgg_name, sph.hour;
+
+    GET DIAGNOSTICS row_count = ROW_COUNT;
+
+    DELETE FROM mv_seoul_hourly_patterns WHERE month_date = month_start;
+
+    INSERT INTO mv_seoul_hourly_patterns
+    SELECT
+        month_date,
+        day_type,
+        hour,
+        SUM(avg_ride_passengers * sample_count) / SUM(sample_count) as avg_ride_passengers,
+        SUM(avg_alight_passengers * sample_count) / SUM(sample_count) as avg_alight_passengers,
+        SUM(avg_total_passengers * sample_count) / SUM(sample_count) as avg_total_passengers,
+        MAX(max_ride_passengers) as max_ride_passengers,
+        MAX(max_alight_passengers) as max_alight_passengers,
+        SUM(sample_count) as total_samples,
+        SUM(station_count) as total_stations
+    FROM mv_hourly_traffic_patterns
+    WHERE month_date = month_start
+    GROUP BY month_date, day_type, hour;
+
+    DELETE FROM hourly_traffic_dirty_months WHERE month_date = month_start;
+
+    RAISE NOTICE 'Hourly traffic patterns refreshed: % rows', row_count;
+    RETURN row_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 6. dirty 월만 갱신 (ETL 완료 후 실행)
+CREATE OR REPLACE FUNCTION refresh_dirty_hourly_traffic()
+RETURNS INTEGER AS $$
+DECLARE
+    rec RECORD;
+    month_count INTEGER := 0;
+BEGIN
+    FOR rec IN SELECT month_date FROM hourly_traffic_dirty_months ORDER BY month_date LOOP
+        PERFORM refresh_hourly_traffic_month(rec.month_date);
+        month_count := month_count + 1;
+    END LOOP;
+
+    RAISE NOTICE 'Refreshed % dirty months', month_count;
+    RETURN month_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 7. 변경 월 기록 함수 (station_passenger_history 적재 ETL이 같은 트랜잭션에서 호출)
+--
+-- station_passenger_history는 압축 TimescaleDB 하이퍼테이블이라
+-- REFERENCING NEW/OLD TABLE 트리거를 만들 수 없으므로 적재 측에서 직접 기록
+-- 사용 예: SELECT mark_hourly_traffic_dirty(ARRAY['2025-07-01', '2025-07-02']::date[]);
+CREATE OR REPLACE FUNCTION mark_hourly_traffic_dirty(record_dates DATE[])
+RETURNS void AS $$
+BEGIN
+    INSERT INTO hourly_traffic_dirty_months (month_date)
+    SELECT DISTINCT DATE_TRUNC('month', d)::date FROM UNNEST(record_dates) AS d
+    ON CONFLICT (month_date) DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 8. 초기 적재: 기존 데이터의 모든 월을 dirty로 표시 후 갱신
+INSERT INTO hourly_traffic_dirty_months (month_date)
+SELECT DISTINCT DATE_TRUNC('month', record_date)::date FROM station_passenger_history
+ON CONFLICT (month_date) DO NOTHING;
+
+SELECT refresh_dirty_hourly_traffic();
+
+-- 9. 전체 갱신 함수 재정의 (시간대별 패턴은 증분 갱신으로 대체)
+CREATE OR REPLACE FUNCTION refresh_all_traffic_views()
+RETURNS void AS $$
+BEGIN
+    RAISE NOTICE 'Refreshing hourly traffic patterns (dirty months only)...';
+    PERFORM refresh_dirty_hourly_traffic();
+
+    RAISE NOTICE 'Refreshing district monthly traffic...';
+    REFRESH MATERIALIZED VIEW mv_district_monthly_traffic;
+
+    RAISE NOTICE 'Refreshing station monthly traffic...';
+    REFRESH MATERIALIZED VIEW mv_station_monthly_traffic;
+
+    RAISE NOTICE 'All views refreshed successfully!';
+END;
+$$ LANGUAGE plpgsql;
+
+-- =====================================================
+-- 사용 예시:
+-- SELECT refresh_dirty_hourly_traffic();             -- ETL 후 변경된 월만 갱신
+-- SELECT refresh_hourly_traffic_month('2025-07-01'); -- 특정 월 강제 갱신
+-- SELECT * FROM hourly_traffic_dirty_months;         -- 갱신 대기 월 확인
+-- SELECT mark_hourly_traffic_dirty(ARRAY['2025-07-15']::date[]); -- 수동 적재 후 월 표시
+-- =====================================================
@@ -0,0 +1,40 @@
+-- =====================================================
+-- DRT Dashboard - 시간대별 교통 패턴 커버링 인덱스
+-- 작성일: 2025-09-02
+-- 목적: 시간대별 교통량 API 쿼리를 index-only scan으로 처리 (heap 조회 제거)
+--
+-- ## 설계 원칙:
+-- - API 조회 조건 (month_date, day_type[, sgg_name]) + hour 정렬을 키로 사용
+-- - 조회 컬럼(avg_*_passengers)은 INCLUDE로 인덱스에 포함
+-- - 기존 lookup 인덱스는 커버링 인덱스로 대체
+-- - index-only scan은 visibility map에 의존하므로 갱신 후 VACUUM 필요
+--   (infrastructure/etl/run_etl.py에서 증분 갱신 직후 VACUUM ANALYZE 실행)
+-- =====================================================
+
+-- 1. 구별 시간대별 패턴 커버링 인덱스
+CREATE INDEX CONCURRENTLY IF NOT EXISTS mv_hourly_traffic_patterns_covering
+ON mv_hourly_traffic_patterns (month_date, day_type, sgg_name, hour)
+INCLUDE (avg_ride_passengers, avg_alight_passengers, avg_total_passengers);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_mv_hourly_traffic_lookup;
+
+-- 2. 서울시 전체 시간대별 패턴 커버링 인덱스 (PK는 키 컬럼만 포함)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS mv_seoul_hourly_patterns_covering
+ON mv_seoul_hourly_patterns (month_date, day_type, hour)
+INCLUDE (avg_ride_passengers, avg_alight_passengers, avg_total_passengers);
+
+-- 3. visibility map / 통계 갱신
+VACUUM (ANALYZE) mv_hourly_traffic_patterns;
+VACUUM (ANALYZE) mv_seoul_hourly_patterns;
+
+-- =====================================================
+-- 확인 예시:
+-- EXPLAIN (ANALYZE, BUFFERS)
+-- SELECT hour, avg_ride_passengers, avg_alight_passengers, avg_total_passengers
+-- FROM mv_hourly_traffic_patterns
+-- WHERE month_date = '2025-07-01' AND day_type = 'weekday' AND sgg_name = '강남구';
+-- -- "Index Only Scan using mv_hourly_traffic_patterns_covering", "Heap Fetches: 0" 확인
+--
+-- SELECT name, statement, generic_plans, custom_plans FROM pg_prepared_statements;
+-- -- API 커넥션에서 prepared statement 재사용 여부 확인
+-- =====================================================
@@ -101,22 +101,23 @@ class DRTETLPipeline:
         logger.info("Materialized Views 갱신 시작...")
         
         try:
-            # 1. 기본 교통 패턴 갱신
-            logger.info("1/4: 시간대별 교통 패턴 갱신...")
-            await self.connection.execute("REFRESH MATERIALIZED VIEW mv_hourly_traffic_patterns;")
+            # 1. 시간대별 교통 패턴 갱신 (변경된 월만 증분 갱신, 서울시 전체 패턴 포함)
+            logger.info("1/3: 시간대별 교통 패턴 증분 갱신...")
+            refreshed_months = await self.connection.fetchval("SELECT refresh_dirty_hourly_traffic();")
+            logger.info(f"시간대별 교통 패턴: {refreshed_months}개 월 갱신")
+            if refreshed_months:
+                # DELETE + INSERT 후 visibility map 갱신 (커버링 인덱스 index-only scan 유지)
+                await self.connection.execute("VACUUM (ANALYZE) mv_hourly_traffic_patterns;")
+                await self.connection.execute("VACUUM (ANALYZE) mv_seoul_hourly_patterns;")
             
             # 2. 구별 월간 교통량 갱신
-            logger.info("2/4: 구별 월간 교통량 갱신...")
+            logger.info("2/3: 구별 월간 교통량 갱신...")
             await self.connection.execute("REFRESH MATERIALIZED VIEW mv_district_monthly_traffic;")
             
             # 3. 정류장별 월간 교통량 갱신
-            logger.info("3/4: 정류장별 월간 교통량 갱신...")
+            logger.info("3/3: 정류장별 월간 교통량 갱신...")
             await self.connection.execute("REFRESH MATERIALIZED VIEW mv_station_monthly_traffic;")
             
-            # 4. 서울시 전체 시간대별 패턴 갱신 (의존성 있음)
-            logger.info("4/4: 서울시 전체 시간대별 패턴 갱신...")
-            await self.connection.execute("REFRESH MATERIALIZED VIEW mv_seoul_hourly_patterns;")
-            
             logger.info("✅ 모든 Materialized Views 갱신 완료")
             
         except Exception as e:
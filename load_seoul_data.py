@@ -162,6 +162,10 @@ def create_sample_passenger_data(cur, conn):
         cur.executemany(insert_sql, sample_data)
         conn.commit()
     
+    # 시간대별 교통 패턴 증분 갱신 대상 월 기록 (시작/종료일로 걸친 월 모두 포함)
+    cur.execute("SELECT mark_hourly_traffic_dirty(%s::date[])", ([start_date, end_date],))
+    conn.commit()
+    
     logger.info("Sample passenger data created")
 
 def create_spatial_mapping(cur, conn):